@@ -1,4 +1,5 @@
 from fastapi import FastAPI, HTTPException, Request # type: ignore
+from fastapi.encoders import jsonable_encoder # type: ignore
 from fastapi.middleware.cors import CORSMiddleware # type: ignore
 from fastapi.responses import JSONResponse # type: ignore
 from fastapi.exceptions import RequestValidationError # type: ignore
@@ -8,9 +9,17 @@ import asyncio
 from dotenv import load_dotenv
 from starlette.exceptions import HTTPException as StarletteHTTPException # type: ignore
 import time
+from contextlib import asynccontextmanager
 
-from app.models.request import ItineraryRequest
-from app.services.itinerary_service import generate_complete_itinerary
+from app.models.request import ItineraryRequest, ImageBatchRequest
+from app.models.response import ImageStatus, ImageBatchResponse
+from app.services.itinerary_service import generate_complete_itinerary, refit_itinerary
+from app.services.image_service import get_image_status
+from app.services.pack_store import load_pack_index
+from app.services.prewarm_service import record_request, start_prewarming, stop_prewarming
+from app.utils.http_client import close_http_sessions, get_http_metrics, open_http_sessions
+from app.utils.metrics import metrics
+from app.utils.response_cache import get_or_generate_response
 
 # Load environment variables
 load_dotenv()
@@ -23,10 +32,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger("app.main")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Outbound HTTP sessions share one connection pool, open from startup until shutdown
+    open_http_sessions()
+    load_pack_index()
+    start_prewarming()
+    yield
+    await stop_prewarming()
+    await close_http_sessions()
+
 app = FastAPI(
     title="Trip Itinerary Generator API",
     description="Generate personalized travel itineraries",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -84,18 +104,62 @@ async def root():
     return {"message": "Trip Itinerary Generator API is running"}
 
 @app.post("/generate")
-async def generate_itinerary(request: ItineraryRequest):
+async def generate_itinerary(request: ItineraryRequest, defer_images: bool = False):
     """
     Generate a complete trip itinerary based on the provided parameters.
+    
+    With defer_images=true the itinerary is returned without waiting for image search;
+    activities and restaurants carry an image_id to resolve through /images.
+    
+    Requests for the same trip (see request_fingerprint) are answered from the response
+    cache, and near-duplicates of a cached trip from its re-fitted itinerary, reported in
+    the Cache-Status header.
     """
     try:
         logger.info(f"Received itinerary request for: {request.location.destination}")
-        itinerary = await generate_complete_itinerary(request)
-        return itinerary
+        record_request(request)
+        
+        async def generate():
+            return jsonable_encoder(await generate_complete_itinerary(request, defer_images=defer_images))
+        
+        async def refit(itinerary, source, similar_request):
+            return jsonable_encoder(await refit_itinerary(itinerary, source, similar_request))
+        
+        # Deferred image ids only live in this process, so only complete itineraries are cached;
+        # a deferred request is still happy to get one
+        itinerary, status = await get_or_generate_response(
+            request, generate, store=not defer_images, shared_key="deferred" if defer_images else "", refit=refit
+        )
+        return JSONResponse(content=itinerary, headers={"Cache-Status": status})
     except Exception as e:
         logger.error(f"Error generating itinerary: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate itinerary: {str(e)}")
 
+@app.get("/images/{image_id}", response_model=ImageStatus)
+async def get_image(image_id: str):
+    """
+    Get the state of a deferred image: pending, resolved (with url) or not_found.
+    """
+    image = get_image_status(image_id)
+    if image is None:
+        raise HTTPException(status_code=404, detail=f"Unknown image id: {image_id}")
+    return image
+
+@app.post("/images/batch", response_model=ImageBatchResponse)
+async def get_images(request: ImageBatchRequest):
+    """
+    Get the state of several deferred images at once. Unknown ids are omitted.
+    """
+    images = [get_image_status(image_id) for image_id in request.ids]
+    return {"images": [image for image in images if image is not None]}
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Service counters, including outbound HTTP connection reuse per client.
+    """
+    return {**metrics.snapshot(), **get_http_metrics()}
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
\ No newline at end of file
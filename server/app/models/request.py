@@ -41,4 +41,7 @@ class ItineraryRequest(BaseModel):
     budget: Optional[BudgetInfo] = None
     tripStyle: List[str] = Field(..., description="Primary styles or purposes of the trip")
     preferences: PreferencesInfo
-    additionalContext: Optional[str] = Field(None, description="Any additional details, preferences, or restrictions")
\ No newline at end of file
+    additionalContext: Optional[str] = Field(None, description="Any additional details, preferences, or restrictions")
+
+class ImageBatchRequest(BaseModel):
+    ids: List[str] = Field(..., max_length=200, description="Image placeholder ids returned with the itinerary")
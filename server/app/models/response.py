@@ -11,6 +11,19 @@ class Weather(BaseModel):
     conditions: str
     advisory: str
 
+class BlockTemperature(BaseModel):
+    min: float
+    max: float
+    avg: float
+
+class BlockWeather(BaseModel):
+    temperature: BlockTemperature
+    conditions: str
+    # Missing when Open-Meteo has no data for the window
+    precipitation_probability: Optional[int] = None
+    precipitation_mm: Optional[float] = None
+    wind_speed: Optional[float] = None
+
 class Coordinates(BaseModel):
     lat: float
     lng: float
@@ -39,9 +52,11 @@ class Activity(BaseModel):
     duration: int
     cost: CostEstimate
     images: List[str] = []
+    image_id: Optional[str] = None
     booking_link: Optional[str] = Field(None, alias="link")
     priority: int = Field(..., ge=1, le=5)
     highlights: List[str] = []
+    tags: List[str] = []
     backup_alternative_options: Optional[List["Activity"]] = None
 
 class TravelOption(BaseModel):
@@ -59,13 +74,24 @@ class TimeBlock(BaseModel):
     duration_minutes: int
     activity: Optional[Activity] = None
     travel: Optional[TravelOption] = None
+    weather: Optional[BlockWeather] = None
     warnings: List[Warning] = []
 
+class HotelTransfer(BaseModel):
+    distance_km: float
+    duration_minutes: int
+
+class DayAccommodation(BaseModel):
+    name: str
+    to_first_stop: HotelTransfer
+    from_last_stop: HotelTransfer
+
 class DayItinerary(BaseModel):
     day_number: int
     date: str
     weather: Weather
     time_blocks: List[TimeBlock]
+    accommodation: Optional[DayAccommodation] = None
 
 class Accommodation(BaseModel):
     name: str
@@ -83,6 +109,7 @@ class Dining(BaseModel):
     price_range: str
     dietary_options: List[str]
     images: List[str]
+    image_id: Optional[str] = None
     reservation_link: Optional[str] = Field(None, alias="link")
 
 class BudgetBreakdown(BaseModel):
@@ -134,9 +161,43 @@ class Recommendations(BaseModel):
     dining: List[Dining]
     transportation: List[TravelOption]
 
+class DayRoute(BaseModel):
+    day_number: int
+    distance_km: float
+    km_saved: float
+
+class RouteSummary(BaseModel):
+    distance_km: float
+    km_saved: float
+    days: List[DayRoute] = []
+
+class HotelStay(BaseModel):
+    name: str
+    days: List[int]
+
+class HotelRank(BaseModel):
+    name: str
+    total_km: float
+    max_km: float
+
+class AccommodationPlan(BaseModel):
+    base_hotel: str
+    stays: List[HotelStay]
+    ranking: List[HotelRank]
+
 class ItineraryResponse(BaseModel):
     metadata: Metadata
     itinerary: List[DayItinerary]
     recommendations: Recommendations
     essential_info: EssentialInfo
-    journey_path: JourneyPath
\ No newline at end of file
+    journey_path: JourneyPath
+    route_summary: Optional[RouteSummary] = None
+    accommodation_plan: Optional[AccommodationPlan] = None
+
+class ImageStatus(BaseModel):
+    id: str
+    status: str
+    url: str = ""
+
+class ImageBatchResponse(BaseModel):
+    images: List[ImageStatus]
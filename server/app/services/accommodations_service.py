@@ -1,23 +1,64 @@
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import json
 import asyncio
-import aiohttp # type: ignore
 import os
 import urllib.parse
 
+import numpy as np
+
 from app.models.request import ItineraryRequest
 from app.services.gemini_service import get_gemini_structured_response
+from app.services.venue_store import (
+    POOL_CURRENCY, add_to_pool, excluded_names, load_pool, pool_request, record_pool_use, select_accommodations,
+    select_dining
+)
+from app.utils.helpers import haversine_matrix
+from app.utils.http_client import get_http_session, register_http_client
+from app.utils.image_cache import cuisine_image_key, get_cached_image, cache_image, normalize_cache_text
+from app.utils.metrics import metrics
+from app.utils.name_matching import match_names
+from app.utils.persistent_cache import PersistentCache, MISSING
+from app.utils.spatial import venue_coordinates
+from app.utils.travel_time import travel_minutes
 
 logger = logging.getLogger(__name__)
 
 # Configure the hotel scraper API endpoint
 HOTEL_SCRAPER_API_URL = os.environ.get("HOTEL_SCRAPER_API_URL", " http://127.0.0.1:7860/api/hotels")
 API_ACCESS_TOKEN = os.environ.get("API_ACCESS_TOKEN")
+HOTEL_SCRAPER_TIMEOUT = float(os.environ.get("HOTEL_SCRAPER_TIMEOUT", "30"))
+# Hotels per scraper request, and how long each chunk may take before it is given up on
+HOTEL_SCRAPER_CHUNK_SIZE = int(os.environ.get("HOTEL_SCRAPER_CHUNK_SIZE", "3"))
+HOTEL_SCRAPER_CHUNK_TIMEOUT = float(os.environ.get("HOTEL_SCRAPER_CHUNK_TIMEOUT", "12"))
+HOTEL_CACHE_PATH = os.environ.get("HOTEL_CACHE_PATH", ".hotel_cache.sqlite")
+HOTEL_CACHE_TTL = int(os.environ.get("HOTEL_CACHE_TTL", str(7 * 24 * 3600)))
+# Minimum token similarity for joining a scraper result to a differently written hotel name
+HOTEL_NAME_MATCH_THRESHOLD = float(os.environ.get("HOTEL_NAME_MATCH_THRESHOLD", "0.5"))
+PEXELS_API_URL = os.environ.get("PEXELS_API_URL", "https://api.pexels.com/v1/search")
+PEXELS_TIMEOUT = float(os.environ.get("PEXELS_TIMEOUT", "10"))
+PEXELS_PER_PAGE = int(os.environ.get("PEXELS_PER_PAGE", "10"))
+# Maximum number of Pexels searches in flight for one dining list
+PEXELS_CONCURRENCY = int(os.environ.get("PEXELS_CONCURRENCY", "4"))
+# A change of hotel is suggested only if it brings the days' stops at least this many km
+# closer in total, and only for stays of at least MIN_HOTEL_STAY_NIGHTS
+HOTEL_CHANGE_MIN_SAVING_KM = float(os.environ.get("HOTEL_CHANGE_MIN_SAVING_KM", "25"))
+MIN_HOTEL_STAY_NIGHTS = int(os.environ.get("MIN_HOTEL_STAY_NIGHTS", "2"))
+# Mode used for hotel transfers at the start and end of each day
+HOTEL_TRANSFER_MODE = "taxi"
+
+# Scraped hotel details (rating, images, amenities, booking link) keyed by hotel and destination
+hotel_cache = PersistentCache(HOTEL_CACHE_PATH, "hotels")
+
+register_http_client("scraper", timeout=HOTEL_SCRAPER_TIMEOUT)
+register_http_client("pexels", timeout=PEXELS_TIMEOUT)
+
+metrics.add_ratio("hotels.scraper_match_rate", "hotels.scraper_matched", "hotels.scraper_lookups")
 
 async def get_accommodations(request: ItineraryRequest) -> Dict[str, Any]:
     """
-    Generate hotel recommendations for the trip using Gemini AI.
+    Get hotel recommendations for the trip from the destination's hotel pool,
+    generating (and scraping) new hotels only when too few are pooled.
     
     Args:
         request: The itinerary request object
@@ -25,14 +66,42 @@ async def get_accommodations(request: ItineraryRequest) -> Dict[str, Any]:
     Returns:
         Dictionary containing accommodation recommendations
     """
+    destination = request.location.destination
+    pool = load_pool("accommodations", destination, refresh=lambda: generate_accommodations(pool_request(request)))
+    accommodations, thin = select_accommodations(pool, request)
+    
+    if thin:
+        generated = await generate_accommodations(pool_request(request), excluded_names(pool))
+        if generated:
+            pool = add_to_pool("accommodations", destination, generated)
+            accommodations, _ = select_accommodations(pool, request)
+    else:
+        logger.info(f"Serving accommodations for {destination} from the hotel pool")
+    record_pool_use("accommodations", request, thin)
+    
+    return {"accommodations": accommodations}
+
+async def generate_accommodations(request: ItineraryRequest, exclude: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Generate hotel recommendations for the trip using Gemini AI, enhanced with scraped data.
+    
+    Prices are asked for in POOL_CURRENCY; pooled hotels come from pool_request.
+    
+    Args:
+        request: The itinerary request object
+        exclude: Hotels that are already known and should not be suggested again
+        
+    Returns:
+        List of accommodation recommendations
+    """
     logger.info(f"Generating accommodations for {request.location.destination}")
     
+    known_hotels = f"Do not include these hotels, they are already known: {'; '.join(exclude)}" if exclude else ""
+    
     # Extract budget information
     budget_info = "No specific budget mentioned"
-    currency = "USD"
     if request.budget:
         budget_info = f"{request.budget.ceiling} {request.budget.currency}"
-        currency = request.budget.currency
     
     # Create a prompt for Gemini to generate accommodations
     prompt = f"""
@@ -46,6 +115,7 @@ async def get_accommodations(request: ItineraryRequest) -> Dict[str, Any]:
     
     Additional preferences:
     {request.additionalContext if request.additionalContext else "No additional preferences specified"}
+    {known_hotels}
     
     Provide recommendations for accommodations:
     - A range of options (luxury, mid-range, budget) aligned with trip styles: {', '.join(request.tripStyle)}
@@ -57,7 +127,7 @@ async def get_accommodations(request: ItineraryRequest) -> Dict[str, Any]:
     - Hotel name (realistic and accurate)
     - Hotel type (luxury hotel, resort, boutique hotel, etc.)
     - Location (neighborhood or address)
-    - Price range appropriate for the destination and budget
+    - Price range per night in {POOL_CURRENCY}, appropriate for the destination and budget
     - A brief description (2-3 sentences)
     
     Return exactly 4-6 hotel options as a structured JSON with this exact schema:
@@ -73,7 +143,7 @@ async def get_accommodations(request: ItineraryRequest) -> Dict[str, Any]:
                         "lng": number (longitude)
                     }}
                 }},
-                "price_range": string (e.g., "$200-280"),
+                "price_range": string (amounts in {POOL_CURRENCY}, e.g., "4,000-6,000 per night"),
                 "description": string (brief description)
             }}
         ]
@@ -94,23 +164,58 @@ async def get_accommodations(request: ItineraryRequest) -> Dict[str, Any]:
         
         if not recommendations or "accommodations" not in recommendations or not recommendations["accommodations"]:
             logger.warning("Gemini returned empty accommodations list")
-            return {"accommodations": []}
+            return []
         
         logger.info(f"Gemini generated {len(recommendations['accommodations'])} accommodation recommendations")
         
         # Enhance recommendations with real data from hotel scraper API
-        enhanced_accommodations = await enhance_with_scraper_data(recommendations["accommodations"], request.location.destination)
-        
-        return {"accommodations": enhanced_accommodations}
+        return await enhance_with_scraper_data(recommendations["accommodations"], request.location.destination)
     except Exception as e:
         logger.error(f"Error generating accommodations: {str(e)}")
-        # Return a minimal structure in case of error
-        return {"accommodations": []}
+        return []
+
+def _scraped_hotel_key(hotel_name: str, destination: str) -> str:
+    """Cache key for a hotel's scraped data"""
+    return f"hotel|{normalize_cache_text(hotel_name)}|{normalize_cache_text(destination)}"
+
+async def scrape_hotel_chunk(hotels: List[Dict], destination: str) -> List[Dict]:
+    """
+    Send one chunk of hotels to the hotel scraper API.
+    
+    Args:
+        hotels: Accommodation dictionaries in this chunk
+        destination: The destination location
+        
+    Returns:
+        Scraper results for the chunk (empty if the request failed)
+    """
+    payload = {"hotels": [{"hotel_name": hotel["name"], "destination": destination} for hotel in hotels]}
+    
+    session = get_http_session("scraper")
+    # Add the API token header to the request
+    headers = {"X-API-Token": API_ACCESS_TOKEN} if API_ACCESS_TOKEN else {}
+    
+    async with session.post(HOTEL_SCRAPER_API_URL, json=payload, headers=headers) as response:
+        if response.status != 200:
+            logger.warning(f"Hotel scraper API returned status {response.status}")
+            return []
+        
+        data = await response.json()
+    
+    if data.get("status") != "success" or not data.get("results"):
+        logger.warning("Hotel scraper API returned unsuccessful response")
+        return []
+    
+    return data["results"]
 
 async def enhance_with_scraper_data(accommodations: List[Dict], destination: str) -> List[Dict]:
     """
     Enhance Gemini-generated accommodations with data from the hotel scraper API.
     
+    Hotels with cached scraped data skip the scraper. The rest are sent in concurrent
+    chunks, each with its own deadline, so one slow hotel only delays its own chunk.
+    Hotels whose chunk fails or misses the deadline fall back to Gemini enrichment.
+    
     Args:
         accommodations: List of accommodation dictionaries from Gemini
         destination: The destination location
@@ -121,46 +226,37 @@ async def enhance_with_scraper_data(accommodations: List[Dict], destination: str
     if not accommodations:
         return []
     
-    # Format the request payload for batch processing
-    hotels_payload = []
+    scraped_results = []
+    pending = []
     for hotel in accommodations:
-        hotels_payload.append({
-            "hotel_name": hotel["name"],
-            "destination": destination
-        })
-    
-    payload = {"hotels": hotels_payload}
-    
-    logger.info(f"Sending batch request to hotel scraper API for {len(hotels_payload)} hotels")
-    
-    try:
-        async with aiohttp.ClientSession() as session:
-            # Add the API token header to the request
-            headers = {"X-API-Token": API_ACCESS_TOKEN}
-            
-            # Make a single batch request to the hotel scraper API
-            async with session.post(
-                HOTEL_SCRAPER_API_URL, 
-                json=payload, 
-                headers=headers,
-                timeout=30
-            ) as response:
-                if response.status != 200:
-                    logger.warning(f"Hotel scraper API returned status {response.status}")
-                    return accommodations
-                
-                data = await response.json()
-                
-                if data.get("status") != "success" or not data.get("results"):
-                    logger.warning("Hotel scraper API returned unsuccessful response")
-                    return accommodations
-                
-                # Process the results and merge with original accommodations
-                return await merge_scraped_data(accommodations, data["results"])
-                
-    except Exception as e:
-        logger.error(f"Error fetching details from hotel scraper API: {str(e)}")
-        return accommodations  # Return original hotel data if scraping fails
+        cached = hotel_cache.get(_scraped_hotel_key(hotel["name"], destination))
+        if cached is MISSING:
+            pending.append(hotel)
+        else:
+            scraped_results.append({"hotel_name": hotel["name"], "data": cached})
+    
+    chunks = [pending[i:i + HOTEL_SCRAPER_CHUNK_SIZE] for i in range(0, len(pending), HOTEL_SCRAPER_CHUNK_SIZE)]
+    if chunks:
+        logger.info(f"Sending {len(pending)} hotels to the hotel scraper API in {len(chunks)} chunks "
+                    f"({len(scraped_results)} served from cache)")
+    
+    responses = await asyncio.gather(
+        *(asyncio.wait_for(scrape_hotel_chunk(chunk, destination), HOTEL_SCRAPER_CHUNK_TIMEOUT) for chunk in chunks),
+        return_exceptions=True
+    )
+    
+    for chunk, response in zip(chunks, responses):
+        if isinstance(response, BaseException):
+            reason = "timed out" if isinstance(response, asyncio.TimeoutError) else str(response)
+            logger.warning(f"Hotel scraper chunk of {len(chunk)} hotels failed ({reason}), using enrichment instead")
+            continue
+        # Cache under the accommodation's own name so later lookups hit even if the scraper renamed it
+        for hotel_name, data in join_scraped_results(chunk, response).items():
+            hotel_cache.set(_scraped_hotel_key(hotel_name, destination), data, HOTEL_CACHE_TTL)
+            scraped_results.append({"hotel_name": hotel_name, "data": data})
+    
+    # Process the results and merge with original accommodations
+    return await merge_scraped_data(accommodations, scraped_results)
     
 async def enrich_with_gemini(hotel_name, hotel_type, location, missing_fields):
     """
@@ -212,9 +308,97 @@ def create_google_maps_link(hotel_name, location_name):
     query = urllib.parse.quote(f"{hotel_name} {location_name}")
     return f"https://www.google.com/maps/search/?api=1&query={query}"
     
+async def enrich_hotels_with_gemini(hotels: List[Dict]) -> Dict[str, Dict]:
+    """
+    Use a single Gemini call to fill in missing fields for several hotels at once.
+    Hotels missing from the batched answer are enriched concurrently, one call each.
+    
+    Args:
+        hotels: List of dicts with name, type, location and missing_fields
+        
+    Returns:
+        Dictionary mapping hotel name to its enriched fields
+    """
+    if not hotels:
+        return {}
+    
+    hotel_lines = "\n".join(
+        f'- "{hotel["name"]}" ({hotel["type"]}) located in {hotel["location"]}: {", ".join(hotel["missing_fields"])}'
+        for hotel in hotels
+    )
+    prompt = f"""
+    For each of the following hotels, generate realistic information for the listed fields:
+    {hotel_lines}
+    
+    Return as a structured JSON with this exact schema:
+    {{
+        "hotels": [
+            {{
+                "name": string (exactly as given above),
+                "amenities": [string] (only if requested),
+                "booking_link": string (only if requested)
+            }}
+        ]
+    }}
+    """
+    
+    system_instruction = """
+    You are a hospitality expert. Generate realistic details for each requested hotel.
+    Return one entry per hotel with only the requested fields.
+    """
+    
+    enriched = {}
+    try:
+        response = await get_gemini_structured_response(prompt, system_instruction)
+        returned = {
+            (item.get("name") or "").strip().lower(): item
+            for item in response.get("hotels", [])
+            if isinstance(item, dict)
+        }
+        for hotel in hotels:
+            item = returned.get(hotel["name"].strip().lower())
+            if item:
+                enriched[hotel["name"]] = {field: item.get(field) for field in hotel["missing_fields"] if item.get(field)}
+        logger.info(f"Batched Gemini enrichment covered {len(enriched)}/{len(hotels)} hotels")
+    except Exception as e:
+        logger.warning(f"Batched Gemini enrichment failed, enriching hotels individually: {str(e)}")
+    
+    # Fall back to concurrent per-hotel calls for anything the batch did not cover
+    remaining = [hotel for hotel in hotels if hotel["name"] not in enriched]
+    if remaining:
+        results = await asyncio.gather(*(
+            enrich_with_gemini(hotel["name"], hotel["type"], hotel["location"], hotel["missing_fields"])
+            for hotel in remaining
+        ))
+        for hotel, result in zip(remaining, results):
+            enriched[hotel["name"]] = result or {}
+    
+    return enriched
+
+def join_scraped_results(accommodations: List[Dict], scraped_results: List[Dict]) -> Dict[str, Dict]:
+    """
+    Join scraper results to accommodations, tolerating differences in casing,
+    punctuation and suffixes such as "Hotel" or "& Spa" between the two names.
+    
+    Args:
+        accommodations: Accommodation dictionaries from Gemini
+        scraped_results: Results from the hotel scraper API
+        
+    Returns:
+        Dictionary mapping accommodation name to its scraped data
+    """
+    usable = [item for item in scraped_results if not item.get("error") and item.get("data")]
+    matches = match_names(
+        [hotel["name"] for hotel in accommodations],
+        [item.get("hotel_name", "") for item in usable],
+        threshold=HOTEL_NAME_MATCH_THRESHOLD
+    )
+    return {accommodations[i]["name"]: usable[j]["data"] for i, j in matches.items()}
+
 async def merge_scraped_data(original_accommodations: List[Dict], scraped_results: List[Dict]) -> List[Dict]:
     """
     Merge the original Gemini-generated accommodations with scraped data.
+    Fields the scraper could not provide are filled for all hotels with one batched Gemini call.
     
     Args:
         original_accommodations: Original list of accommodations from Gemini
@@ -225,41 +409,43 @@ async def merge_scraped_data(original_accommodations: List[Dict], scraped_result
     """
     enhanced_accommodations = []
     
-    # Create a map of hotel names to their scraped data for quick lookup
-    scraped_map = {}
-    for item in scraped_results:
-        if not item.get("error") and item.get("data"):
-            scraped_map[item["hotel_name"]] = item["data"]
+    # Match scraped results to hotels by normalized, similarity-tolerant names
+    scraped_map = join_scraped_results(original_accommodations, scraped_results)
+    metrics.increment("hotels.scraper_lookups", len(original_accommodations))
+    metrics.increment("hotels.scraper_matched", len(scraped_map))
     
-    # Merge each original accommodation with its scraped data
+    # Collect the fields every hotel is missing so they can be enriched in one go
+    enrichment_requests = []
     for hotel in original_accommodations:
-        # Look for matching scraped data
         scraped_data = scraped_map.get(hotel["name"])
         
+        missing_fields = []
+        if not scraped_data or not scraped_data.get("amenities"):
+            missing_fields.append("amenities")
+        if not scraped_data or not scraped_data.get("booking_link"):
+            missing_fields.append("booking_link")
+        
+        if missing_fields:
+            enrichment_requests.append({
+                "name": hotel["name"],
+                "type": hotel["type"],
+                "location": hotel["location"]["name"],
+                "missing_fields": missing_fields
+            })
+    
+    enriched_map = await enrich_hotels_with_gemini(enrichment_requests)
+    
+    # Merge each original accommodation with its scraped and enriched data
+    for hotel in original_accommodations:
+        scraped_data = scraped_map.get(hotel["name"])
+        enriched_data = enriched_map.get(hotel["name"], {})
+        
         if scraped_data:
             # Process rating - if rating > 5, divide by 2 (since it's out of 10)
             rating = scraped_data.get("rating", 4.0)
             if rating and rating > 5:
                 rating = rating / 2
             
-            # Identify missing fields that need enrichment
-            missing_fields = []
-            if not scraped_data.get("amenities"):
-                missing_fields.append("amenities")
-            if not scraped_data.get("booking_link"):
-                missing_fields.append("booking_link")
-                
-            # Enrich with Gemini if needed
-            enriched_data = {}
-            if missing_fields:
-                location_name = hotel["location"]["name"]
-                enriched_data = await enrich_with_gemini(
-                    hotel["name"], 
-                    hotel["type"], 
-                    location_name,
-                    missing_fields
-                )
-            
             # Create enhanced hotel with merged data
             enhanced_hotel = {
                 # Keep Gemini-generated fields
@@ -277,15 +463,7 @@ async def merge_scraped_data(original_accommodations: List[Dict], scraped_result
                 "booking_link": scraped_data.get("booking_link") or enriched_data.get("booking_link") or create_google_maps_link(hotel["name"], hotel["location"]["name"])
             }
         else:
-            # If no scraped data was found, enrich with Gemini completely
-            location_name = hotel["location"]["name"]
-            enriched_data = await enrich_with_gemini(
-                hotel["name"],
-                hotel["type"],
-                location_name,
-                ["amenities", "booking_link"]
-            )
-            
+            # If no scraped data was found, rely on the Gemini enrichment completely
             enhanced_hotel = {
                 **hotel,
                 "rating": 4.0,  # Default rating
@@ -302,22 +480,22 @@ async def merge_scraped_data(original_accommodations: List[Dict], scraped_result
 
 # Add these functions after enrich_with_gemini function and before get_dining
 
-async def get_food_images_from_pexels(cuisine, dish_name=None):
+async def search_pexels_food_photos(cuisine, dish_name=None):
     """
-    Get a single relevant food image from Pexels API based on cuisine or dish name.
+    Search Pexels for food photos of a cuisine or dish.
     
     Args:
         cuisine: Type of cuisine
         dish_name: Optional specific dish name
         
     Returns:
-        A single image URL or empty string
+        List of image URLs (empty if nothing was found), or None if the search failed
     """
     try:
         pexels_api_key = os.environ.get("PEXELS_API")
         if not pexels_api_key:
             logger.warning("PEXELS_API key not found in environment variables")
-            return ""
+            return None
             
         # Construct a very specific food search query
         if dish_name and len(dish_name) > 3:
@@ -331,48 +509,156 @@ async def get_food_images_from_pexels(cuisine, dish_name=None):
         search_query += " close-up no-people food-photography"
         encoded_query = urllib.parse.quote(search_query)
         
-        # Request more results to have better chances of finding good ones
-        url = f"https://api.pexels.com/v1/search?query={encoded_query}&per_page=10&orientation=landscape"
+        # Request more results so restaurants sharing a cuisine get different photos
+        url = f"{PEXELS_API_URL}?query={encoded_query}&per_page={PEXELS_PER_PAGE}&orientation=landscape"
         headers = {"Authorization": pexels_api_key}
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status != 200:
-                    logger.warning(f"Pexels API returned status {response.status}")
-                    return ""
-                    
-                data = await response.json()
-                
-                # Extract photo URLs - get only the first good one
-                photos = data.get("photos", [])
-                for photo in photos:
-                    if "src" in photo and "medium" in photo["src"]:
-                        return photo["src"]["medium"]
+        session = get_http_session("pexels")
+        async with session.get(url, headers=headers) as response:
+            if response.status != 200:
+                logger.warning(f"Pexels API returned status {response.status}")
+                return None
                 
-                return ""
+            data = await response.json()
+        
+        return [
+            photo["src"]["medium"] for photo in data.get("photos", [])
+            if "src" in photo and "medium" in photo["src"]
+        ]
     except Exception as e:
         logger.warning(f"Error fetching images from Pexels: {str(e)}")
+        return None
+
+async def get_food_images_from_pexels(cuisine, dish_name=None):
+    """
+    Get a single relevant food image from Pexels API based on cuisine or dish name.
+    
+    Args:
+        cuisine: Type of cuisine
+        dish_name: Optional specific dish name
+        
+    Returns:
+        A single image URL or empty string
+    """
+    cache_key = cuisine_image_key(cuisine, dish_name)
+    cached_url = get_cached_image(cache_key)
+    if cached_url is not None:
+        return cached_url
+    
+    photos = await search_pexels_food_photos(cuisine, dish_name)
+    if photos is None:
+        # A failed search is retried next time rather than remembered as a miss
         return ""
+    image_url = photos[0] if photos else ""
+    # Misses are remembered too so the search is not repeated for a while
+    cache_image(cache_key, image_url)
+    return image_url
+
+def _restaurant_image_query(restaurant):
+    """Return the (cuisine, signature dish) pair used to look up a restaurant's food image"""
+    signature_dish = restaurant.get("signature_dishes", [""])[0] if restaurant.get("signature_dishes") else ""
+    return restaurant.get("cuisine", ""), signature_dish
+
+async def add_dining_images(restaurants: List[Dict]) -> None:
+    """
+    Add a Pexels food image to every restaurant without one.
+    
+    Cached (cuisine, dish) images are used first. The remaining restaurants are grouped
+    by cuisine and each cuisine is searched once, with a bounded number of searches in
+    flight; the returned photos are shared out so restaurants with the same cuisine get
+    different images.
+    
+    Args:
+        restaurants: Restaurant dictionaries (updated in place)
+    """
+    by_cuisine = {}
+    for restaurant in restaurants:
+        if restaurant.get("images"):
+            continue
+        cuisine, dish = _restaurant_image_query(restaurant)
+        cached_url = get_cached_image(cuisine_image_key(cuisine, dish))
+        if cached_url is not None:
+            restaurant["images"] = [cached_url] if cached_url else []
+            continue
+        by_cuisine.setdefault(normalize_cache_text(cuisine), []).append(restaurant)
+    
+    if not by_cuisine:
+        return
+    
+    semaphore = asyncio.Semaphore(PEXELS_CONCURRENCY)
+    
+    async def resolve_cuisine(group):
+        cuisine, dish = _restaurant_image_query(group[0])
+        async with semaphore:
+            # A lone restaurant keeps its dish-specific search, a group shares a cuisine search
+            photos = await search_pexels_food_photos(cuisine, dish if len(group) == 1 else None)
+        
+        for position, restaurant in enumerate(group):
+            image_url = photos[position % len(photos)] if photos else ""
+            restaurant["images"] = [image_url] if image_url else []
+            # Only a search that ran and found nothing is cached as a miss
+            if photos is not None:
+                cache_image(cuisine_image_key(*_restaurant_image_query(restaurant)), image_url)
+    
+    await asyncio.gather(*(resolve_cuisine(group) for group in by_cuisine.values()))
+    logger.info(f"Resolved food images with {len(by_cuisine)} Pexels searches")
 
 # Modify the get_dining function to enhance with images and links
-async def get_dining(request: ItineraryRequest) -> Dict[str, Any]:
+async def get_dining(request: ItineraryRequest, include_images: bool = True) -> Dict[str, Any]:
     """
-    Generate restaurant recommendations for the trip.
+    Get restaurant recommendations for the trip from the destination's restaurant pool.
+    
+    The pool is filtered by dietary preferences and ranked for the request; new
+    restaurants are generated only when too few match.
     
     Args:
         request: The itinerary request object
+        include_images: Fetch Pexels food images inline (False leaves them to the image service)
         
     Returns:
         Dictionary containing dining recommendations
     """
+    destination = request.location.destination
+    pool = load_pool("dining", destination, refresh=lambda: generate_dining(pool_request(request)))
+    dining, thin = select_dining(pool, request)
+    
+    if thin:
+        generated = await generate_dining(pool_request(request), excluded_names(pool))
+        if generated:
+            pool = add_to_pool("dining", destination, generated)
+            dining, _ = select_dining(pool, request)
+    else:
+        logger.info(f"Serving dining options for {destination} from the restaurant pool")
+    record_pool_use("dining", request, thin)
+    
+    # Get food images from Pexels based on cuisine or signature dish
+    if include_images:
+        await add_dining_images(dining)
+    
+    logger.info(f"Selected {len(dining)} dining options for {destination}")
+    return {"dining": dining}
+
+async def generate_dining(request: ItineraryRequest, exclude: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Generate restaurant recommendations for the trip.
+    
+    Prices are asked for in POOL_CURRENCY; pooled restaurants come from pool_request.
+    
+    Args:
+        request: The itinerary request object
+        exclude: Restaurants that are already known and should not be suggested again
+        
+    Returns:
+        List of dining recommendations
+    """
     logger.info(f"Generating dining options for {request.location.destination}")
     
+    known_restaurants = f"Do not include these restaurants, they are already known: {'; '.join(exclude)}" if exclude else ""
+    
     # Extract budget information
     budget_info = "No specific budget mentioned"
-    currency = "USD"
     if request.budget:
         budget_info = f"{request.budget.ceiling} {request.budget.currency}"
-        currency = request.budget.currency
     
     # Extract dietary preferences if available
     dietary_preferences = "No specific dietary preferences mentioned"
@@ -392,10 +678,11 @@ async def get_dining(request: ItineraryRequest) -> Dict[str, Any]:
     
     Additional preferences:
     {request.additionalContext if request.additionalContext else "No additional preferences specified"}
+    {known_restaurants}
     
     Provide recommendations for dining options:
     - Include a variety of cuisines with emphasis on local specialties
-    - Range of price points (high-end, casual, street food)
+    - Range of price points (high-end, casual, street food), with prices per person in {POOL_CURRENCY}
     - Options that accommodate any dietary preferences mentioned
     - Include signature dishes and dining experiences
     
@@ -430,9 +717,9 @@ async def get_dining(request: ItineraryRequest) -> Dict[str, Any]:
     try:
         recommendations = await get_gemini_structured_response(prompt, system_instruction)
         
-        # Enhance dining options with images and reservation links
+        # Enhance dining options with reservation links
+        enhanced_dining = []
         if "dining" in recommendations and recommendations["dining"]:
-            enhanced_dining = []
             
             # Process each dining option
             for restaurant in recommendations["dining"]:
@@ -440,38 +727,29 @@ async def get_dining(request: ItineraryRequest) -> Dict[str, Any]:
                 location_name = restaurant["location"]["name"] if "location" in restaurant and "name" in restaurant["location"] else request.location.destination
                 maps_link = create_google_maps_link(restaurant["name"], location_name)
                 
-                # Get food images from Pexels based on cuisine or signature dish
-                signature_dish = restaurant.get("signature_dishes", [""])[0] if restaurant.get("signature_dishes") else ""
-                cuisine = restaurant.get("cuisine", "")
-
-                # Fetch a single image asynchronously
-                image = await get_food_images_from_pexels(cuisine, signature_dish)
-
                 # Create enhanced restaurant entry
                 enhanced_restaurant = {
                     **restaurant,
-                    "images": [image] if image else [],  # Add as single-item list if successful
+                    "images": [],
                     "reservation_link": maps_link
                 }
                 
                 enhanced_dining.append(enhanced_restaurant)
             
-            recommendations["dining"] = enhanced_dining
-            
-        logger.info(f"Generated {len(recommendations.get('dining', []))} dining options for {request.location.destination}")
-        return recommendations
+        logger.info(f"Generated {len(enhanced_dining)} dining options for {request.location.destination}")
+        return enhanced_dining
     except Exception as e:
         logger.error(f"Error generating dining options: {str(e)}")
-        # Return a minimal structure in case of error
-        return {"dining": []}
+        return []
 
-async def get_accommodations_and_dining(request: ItineraryRequest) -> Dict[str, Any]:
+async def get_accommodations_and_dining(request: ItineraryRequest, include_images: bool = True) -> Dict[str, Any]:
     """
     Generate hotel and restaurant recommendations for the trip by combining
     results from separate accommodation and dining services.
     
     Args:
         request: The itinerary request object
+        include_images: Fetch restaurant images inline (False leaves them to the image service)
         
     Returns:
         Dictionary containing accommodation and dining recommendations
@@ -480,7 +758,7 @@ async def get_accommodations_and_dining(request: ItineraryRequest) -> Dict[str,
     
     # Run both functions concurrently for better performance
     accommodations_task = asyncio.create_task(get_accommodations(request))
-    dining_task = asyncio.create_task(get_dining(request))
+    dining_task = asyncio.create_task(get_dining(request, include_images))
     
     # Wait for both tasks to complete
     accommodations_result = await accommodations_task
@@ -490,4 +768,137 @@ async def get_accommodations_and_dining(request: ItineraryRequest) -> Dict[str,
     return {
         "accommodations": accommodations_result.get("accommodations", []),
         "dining": dining_result.get("dining", [])
-    }
\ No newline at end of file
+    }
+
+def _day_stops(day: Dict[str, Any]) -> List[Tuple[float, float]]:
+    """Coordinates of a day's stops in schedule order, leaving out the outbound and return journeys"""
+    stops = []
+    for block in day.get("time_blocks", []):
+        activity = block.get("activity") or {}
+        coordinates = venue_coordinates(activity) if activity.get("type") != "transport" else None
+        if coordinates:
+            stops.append(coordinates)
+    return stops
+
+def _transfer(hotel: Tuple[float, float], stop: Tuple[float, float], elevation_m: float) -> Dict[str, Any]:
+    distance = float(haversine_matrix([hotel[0]], [hotel[1]], [stop[0]], [stop[1]])[0, 0])
+    minutes = float(travel_minutes(distance, HOTEL_TRANSFER_MODE, elevation_m))
+    return {"distance_km": round(distance, 1), "duration_minutes": int(round(minutes))}
+
+def split_hotel_stays(distances: np.ndarray, ranking: np.ndarray) -> List[int]:
+    """
+    Split consecutive days into hotel stays with the least total distance.
+    
+    Every stay covers at least MIN_HOTEL_STAY_NIGHTS consecutive days (a shorter trip has
+    a single stay) and every change of hotel costs HOTEL_CHANGE_MIN_SAVING_KM, so a change
+    is only made when it saves that much. Solved exactly by dynamic programming over the
+    end of the last stay.
+    
+    Args:
+        distances: Hotel-by-day distance matrix in km
+        ranking: Hotel indexes, best first; ties go to the better ranked hotel
+        
+    Returns:
+        Hotel index for each day
+    """
+    day_count = distances.shape[1]
+    min_stay = max(1, min(MIN_HOTEL_STAY_NIGHTS, day_count))
+    # Distance of hotel h over days [start, end) is prefix[h, end] - prefix[h, start]
+    prefix = np.concatenate([np.zeros((len(distances), 1)), np.cumsum(distances, axis=1)], axis=1)
+    
+    # best[end][h]: (cost, start of the last stay) covering days [0, end) with a last stay at h
+    best: List[Dict[int, Tuple[float, int]]] = [{} for _ in range(day_count + 1)]
+    for end in range(min_stay, day_count + 1):
+        for hotel in ranking.tolist():
+            for start in range(0, end - min_stay + 1):
+                if start == 0:
+                    previous = 0.0
+                else:
+                    options = [cost for other, (cost, _) in best[start].items() if other != hotel]
+                    if not options:
+                        continue
+                    previous = min(options) + HOTEL_CHANGE_MIN_SAVING_KM
+                cost = previous + prefix[hotel, end] - prefix[hotel, start]
+                if hotel not in best[end] or cost < best[end][hotel][0] - 1e-9:
+                    best[end][hotel] = (cost, start)
+    
+    chosen = [0] * day_count
+    end = day_count
+    hotel = min(best[end], key=lambda option: best[end][option][0])
+    while end > 0:
+        _, start = best[end][hotel]
+        chosen[start:end] = [hotel] * (end - start)
+        if start:
+            hotel = min(
+                (other for other in best[start] if other != hotel), key=lambda option: best[start][option][0]
+            )
+        end = start
+    return chosen
+
+def plan_hotel_stays(day_itineraries: List[Dict[str, Any]], accommodations: List[Dict[str, Any]],
+                     elevation_m: float = 0.0) -> Optional[Dict[str, Any]]:
+    """
+    Choose where to stay from the distance between each hotel and each day's stops.
+    
+    Hotels are ranked by their total distance to the centroids of the days' stops (ties
+    broken by the farthest day), all from one hotel-by-day distance matrix. The best
+    hotel is the base. Trips covering several areas get a change of hotel where it pays
+    off: the days are split into contiguous stays of at least MIN_HOTEL_STAY_NIGHTS (see
+    split_hotel_stays). Each day gets the chosen hotel with the transfers to its first
+    stop and from its last stop.
+    
+    Args:
+        day_itineraries: Day itineraries with time blocks (updated in place)
+        accommodations: Hotel recommendations with location coordinates
+        elevation_m: Elevation of the destination in meters, for the transfer times
+        
+    Returns:
+        Dictionary with base_hotel, stays (hotel name and day numbers) and ranking
+        (hotel name, total_km, max_km), or None if no hotel or day has coordinates
+    """
+    hotels = [(hotel, venue_coordinates(hotel)) for hotel in accommodations]
+    hotels = [(hotel, point) for hotel, point in hotels if point]
+    days = [(day, _day_stops(day)) for day in day_itineraries]
+    days = [(day, stops) for day, stops in days if stops]
+    if not hotels or not days:
+        return None
+    
+    hotel_points = np.array([point for _, point in hotels])
+    centroids = np.array([np.mean(stops, axis=0) for _, stops in days])
+    distances = haversine_matrix(hotel_points[:, 0], hotel_points[:, 1], centroids[:, 0], centroids[:, 1])
+    
+    total = distances.sum(axis=1)
+    worst = distances.max(axis=1)
+    ranking = np.lexsort((worst, total))
+    base = ranking[0]
+    
+    chosen = split_hotel_stays(distances, ranking)
+    
+    stays = []
+    for (day, stops), hotel_index in zip(days, chosen):
+        hotel, point = hotels[hotel_index]
+        name = hotel.get("name", "")
+        day["accommodation"] = {
+            "name": name,
+            "to_first_stop": _transfer(point, stops[0], elevation_m),
+            "from_last_stop": _transfer(point, stops[-1], elevation_m)
+        }
+        if stays and stays[-1]["name"] == name:
+            stays[-1]["days"].append(day.get("day_number"))
+        else:
+            stays.append({"name": name, "days": [day.get("day_number")]})
+    
+    base_name = hotels[base][0].get("name", "")
+    logger.info(f"Suggested {base_name} as base hotel with {len(stays)} stay(s)")
+    return {
+        "base_hotel": base_name,
+        "stays": stays,
+        "ranking": [
+            {
+                "name": hotels[index][0].get("name", ""),
+                "total_km": round(float(total[index]), 1),
+                "max_km": round(float(worst[index]), 1)
+            }
+            for index in ranking
+        ]
+    }
@@ -1,13 +1,21 @@
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import json
+import asyncio
+import math
 from datetime import datetime, timedelta
-import aiohttp # type: ignore
 import urllib.parse
 import os
 
 from app.models.request import ItineraryRequest
 from app.services.gemini_service import get_gemini_structured_response
+from app.services.venue_store import (
+    ACTIVITY_CATEGORIES, POOL_CURRENCY, add_to_pool, excluded_names, load_pool, pool_request, record_pool_use,
+    select_activities
+)
+from app.utils.helpers import haversine_distance
+from app.utils.http_client import get_http_session, register_http_client
+from app.utils.image_cache import activity_image_key, get_cached_image, cache_image
 
 logger = logging.getLogger(__name__)
 
@@ -25,40 +33,136 @@ def create_google_maps_link(activity_name, location_name):
     query = urllib.parse.quote(f"{activity_name} {location_name}")
     return f"https://www.google.com/maps/search/?api=1&query={query}"
 
-async def get_wikimedia_image(activity_name, location_name, coordinates=None):
+WIKIMEDIA_API_URL = os.environ.get("WIKIMEDIA_API_URL", "https://commons.wikimedia.org/w/api.php")
+WIKIMEDIA_USER_AGENT = "AventraItineraryBot/1.0 (trip itinerary generator)"
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif']
+
+# Maximum number of activities resolving images at the same time
+IMAGE_LOOKUP_CONCURRENCY = int(os.environ.get("IMAGE_LOOKUP_CONCURRENCY", "8"))
+IMAGE_LOOKUP_TIMEOUT = float(os.environ.get("IMAGE_LOOKUP_TIMEOUT", "15"))
+
+register_http_client("wikimedia", headers={"User-Agent": WIKIMEDIA_USER_AGENT}, timeout=IMAGE_LOOKUP_TIMEOUT)
+
+def get_wikimedia_session():
+    """
+    Get the shared HTTP session for Wikimedia Commons requests.
+    
+    Returns:
+        aiohttp.ClientSession from the application-wide client pool
+    """
+    return get_http_session("wikimedia")
+
+async def fetch_wikimedia_json(session, params):
+    """
+    Run a Wikimedia Commons API query.
+    
+    Args:
+        session: Shared aiohttp session
+        params: Query parameters (format=json is added)
+        
+    Returns:
+        Parsed JSON response or None if the request failed
+    """
+    async with session.get(WIKIMEDIA_API_URL, params={**params, "format": "json"}) as response:
+        if response.status != 200:
+            logger.warning(f"Wikimedia API returned status {response.status}")
+            return None
+        return await response.json()
+
+def extract_image_url(data, origin=None):
+    """
+    Pick an image URL from a Wikimedia query response.
+    
+    Args:
+        data: Parsed Wikimedia API response
+        origin: Optional (lat, lng) tuple, the nearest geotagged image wins when given
+        
+    Returns:
+        Image URL or empty string
+    """
+    if not data or 'query' not in data or 'pages' not in data['query']:
+        return ""
+    
+    pages = list(data['query']['pages'].values())
+    if origin:
+        def distance_from_origin(page):
+            coordinates = page.get('coordinates')
+            if not coordinates:
+                return float('inf')
+            return haversine_distance(origin[0], origin[1], coordinates[0]['lat'], coordinates[0]['lon'])
+        pages.sort(key=distance_from_origin)
+    
+    for page_data in pages:
+        if 'imageinfo' in page_data and page_data['imageinfo']:
+            file_url = page_data['imageinfo'][0]['url']
+            if any(ext in file_url.lower() for ext in IMAGE_EXTENSIONS):
+                return file_url
+    return ""
+
+async def first_successful(coroutines):
+    """
+    Run coroutines concurrently and return the first truthy result, cancelling the rest.
+    
+    Args:
+        coroutines: Coroutines returning a result or a falsy value on a miss
+        
+    Returns:
+        First truthy result, empty string if all of them miss, or None if none hit and
+        at least one failed (raised or returned None)
+    """
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    failed = False
+    try:
+        for finished in asyncio.as_completed(tasks):
+            try:
+                result = await finished
+            except Exception as e:
+                logger.warning(f"Image search strategy failed: {str(e)}")
+                failed = True
+                continue
+            if result:
+                return result
+            failed = failed or result is None
+        return None if failed else ""
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+async def get_wikimedia_image(activity_name, location_name, coordinates=None, session=None):
     """
     Get a relevant image from Wikimedia Commons API based on activity and location.
-    Uses multiple methods with explicit fallbacks between them.
+    Geosearch, category search and basic search race each other and the first hit wins.
     
     Args:
         activity_name: Name of the activity
         location_name: Name of the location
         coordinates: Optional dict with lat and lng fields
+        session: Optional aiohttp session (the shared Wikimedia session by default)
         
     Returns:
         Image URL or empty string
     """
+    cache_key = activity_image_key(activity_name, location_name)
+    cached_url = get_cached_image(cache_key)
+    if cached_url is not None:
+        return cached_url
+    
+    if session is None:
+        session = get_wikimedia_session()
+    
     try:
-        # METHOD 1: Geosearch with lat/long coordinates
-        image_url = await try_geosearch_method(activity_name, coordinates)
-        if image_url:
-            logger.info(f"Successfully found image via geosearch for {activity_name}")
-            return image_url
-            
-        logger.info(f"Geosearch failed for {activity_name}, trying category search")
-            
-        # METHOD 2: Category search with properly formatted category names
-        image_url = await try_category_search_method(activity_name, location_name)
-        if image_url:
-            logger.info(f"Successfully found image via category search for {activity_name}")
-            return image_url
-            
-        logger.info(f"Category search failed for {activity_name}, trying basic search")
-            
-        # METHOD 3: Basic search as final fallback
-        image_url = await try_basic_search_method(activity_name, location_name)
+        image_url = await first_successful([
+            try_geosearch_method(activity_name, coordinates, session),
+            try_category_search_method(activity_name, location_name, session),
+            try_basic_search_method(activity_name, location_name, session)
+        ])
+        if image_url is None:
+            # A search failed, so the miss may not be real: do not remember it
+            return ""
+        cache_image(cache_key, image_url)
         if image_url:
-            logger.info(f"Successfully found image via basic search for {activity_name}")
+            logger.info(f"Successfully found image for {activity_name}")
             return image_url
         
         logger.info(f"All image search methods failed for {activity_name} at {location_name}")
@@ -67,7 +171,7 @@ async def get_wikimedia_image(activity_name, location_name, coordinates=None):
         logger.warning(f"Error in main get_wikimedia_image function: {str(e)}")
         return ""
 
-async def try_geosearch_method(activity_name, coordinates):
+async def try_geosearch_method(activity_name, coordinates, session):
     """Try finding images using geosearch based on coordinates"""
     try:
         if not coordinates or 'lat' not in coordinates or 'lng' not in coordinates:
@@ -78,79 +182,80 @@ async def try_geosearch_method(activity_name, coordinates):
         
         if lat == 0 and lng == 0:  # Skip if coordinates are zeros
             return ""
-            
-        # Try with increasing radius to ensure we find something
-        for radius in [300, 500, 1000, 2000]:
-            url = f"https://commons.wikimedia.org/w/api.php?action=query&generator=geosearch&ggscoord={lat}|{lng}&ggsradius={radius}&ggsnamespace=6&ggslimit=10&prop=imageinfo&iiprop=url&format=json"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status != 200:
-                        logger.warning(f"Wikimedia geosearch API returned status {response.status}")
-                        continue
-                    
-                    data = await response.json()
-                    
-                    # Extract the first image URL if available
-                    if 'query' in data and 'pages' in data['query']:
-                        for page_id, page_data in data['query']['pages'].items():
-                            if 'imageinfo' in page_data and page_data['imageinfo']:
-                                file_url = page_data['imageinfo'][0]['url']
-                                if any(ext in file_url.lower() for ext in ['.jpg', '.jpeg', '.png', '.gif']):
-                                    return file_url
-        return ""
+        
+        # One query at the widest radius, then prefer the image closest to the activity
+        data = await fetch_wikimedia_json(session, {
+            "action": "query",
+            "generator": "geosearch",
+            "ggscoord": f"{lat}|{lng}",
+            "ggsradius": 2000,
+            "ggsnamespace": 6,
+            "ggslimit": 10,
+            "prop": "imageinfo|coordinates",
+            "iiprop": "url"
+        })
+        if data is None:
+            return None
+        return extract_image_url(data, origin=(lat, lng))
     except Exception as e:
         logger.warning(f"Error in geosearch method: {str(e)}")
-        return ""
+        return None
 
-async def try_category_search_method(activity_name, location_name):
-    """Try finding images using category search"""
-    try:
-        # Clean up the search terms for category names
-        category_terms = [
-            f"{activity_name}, {location_name}",
-            activity_name,
-            location_name
-        ]
-        
-        # Format terms for category search
-        formatted_terms = []
-        for term in category_terms:
-            # Standard format: Title_Case_With_Underscores
-            simple = term.strip().title().replace(' ', '_')
-            formatted_terms.append(simple)
-            
-            # Clean format: remove non-alphanumeric chars
-            clean = ''.join(c for c in term if c.isalnum() or c.isspace()).strip().title().replace(' ', '_')
-            if clean != simple:
-                formatted_terms.append(clean)
+def format_category_terms(activity_name, location_name):
+    """Build candidate Commons category names for an activity"""
+    category_terms = [
+        f"{activity_name}, {location_name}",
+        activity_name,
+        location_name
+    ]
+    
+    formatted_terms = []
+    for term in category_terms:
+        # Standard format: Title_Case_With_Underscores
+        simple = term.strip().title().replace(' ', '_')
+        formatted_terms.append(simple)
         
-        for term in formatted_terms:
-            if len(term) < 4:  # Skip very short terms
+        # Clean format: remove non-alphanumeric chars
+        clean = ''.join(c for c in term if c.isalnum() or c.isspace()).strip().title().replace(' ', '_')
+        if clean != simple:
+            formatted_terms.append(clean)
+    
+    # Skip very short terms
+    return [term for term in formatted_terms if len(term) >= 4]
+
+async def try_category_search_method(activity_name, location_name, session):
+    """Try finding images using category search (None if a query failed, like try_basic_search_method)"""
+    try:
+        failed = False
+        for term in format_category_terms(activity_name, location_name):
+            data = await fetch_wikimedia_json(session, {
+                "action": "query",
+                "generator": "categorymembers",
+                "gcmtitle": f"Category:{term}",
+                "gcmlimit": 10,
+                "gcmtype": "file",
+                "prop": "imageinfo",
+                "iiprop": "url"
+            })
+            if data is None:
+                failed = True
                 continue
-                
-            url = f"https://commons.wikimedia.org/w/api.php?action=query&generator=categorymembers&gcmtitle=Category:{term}&gcmlimit=10&gcmtype=file&prop=imageinfo&iiprop=url&format=json"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status != 200:
-                        continue
-                        
-                    data = await response.json()
-                    
-                    if 'query' in data and 'pages' in data['query']:
-                        for page_id, page_data in data['query']['pages'].items():
-                            if 'imageinfo' in page_data and page_data['imageinfo']:
-                                file_url = page_data['imageinfo'][0]['url']
-                                if any(ext in file_url.lower() for ext in ['.jpg', '.jpeg', '.png', '.gif']):
-                                    return file_url
-        return ""
+            image_url = extract_image_url(data)
+            if image_url:
+                return image_url
+        return None if failed else ""
     except Exception as e:
         logger.warning(f"Error in category search method: {str(e)}")
-        return ""
+        return None
 
-async def try_basic_search_method(activity_name, location_name):
-    """Try finding images using basic search as final fallback"""
+async def try_basic_search_method(activity_name, location_name, session):
+    """
+    Try finding images using basic search as final fallback.
+    
+    Returns:
+        Image URL, empty string if every search answered without an image, or None if
+        a search failed (so the miss is not known to be real)
+    """
     try:
         search_terms = [
             f"{activity_name} {location_name}",
@@ -158,40 +263,540 @@ async def try_basic_search_method(activity_name, location_name):
             activity_name
         ]
         
+        failed = False
         for search_term in search_terms:
-            encoded_query = urllib.parse.quote(search_term)
-            url = f"https://commons.wikimedia.org/w/api.php?action=query&generator=search&gsrsearch={encoded_query}&prop=imageinfo&iiprop=url&format=json&gsrlimit=10"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status != 200:
-                        continue
-                        
-                    data = await response.json()
-                    
-                    if 'query' in data and 'pages' in data['query']:
-                        for page_id, page_data in data['query']['pages'].items():
-                            if 'imageinfo' in page_data and page_data['imageinfo']:
-                                file_url = page_data['imageinfo'][0]['url']
-                                if any(ext in file_url.lower() for ext in ['.jpg', '.jpeg', '.png', '.gif']):
-                                    return file_url
-        return ""
+            data = await fetch_wikimedia_json(session, {
+                "action": "query",
+                "generator": "search",
+                "gsrsearch": search_term,
+                "gsrlimit": 10,
+                "prop": "imageinfo",
+                "iiprop": "url"
+            })
+            if data is None:
+                failed = True
+                continue
+            image_url = extract_image_url(data)
+            if image_url:
+                return image_url
+        return None if failed else ""
     except Exception as e:
         logger.warning(f"Error in basic search method: {str(e)}")
-        return ""
+        return None
+
+# Commons API limits for batched queries
+WIKIMEDIA_MAX_TITLES = 50
+WIKIMEDIA_GEOSEARCH_MAX_RADIUS = 10000  # meters
+WIKIMEDIA_GEOSEARCH_LIMIT = 500
+# Geotagged images further than this from an activity are not considered a match
+ACTIVITY_IMAGE_MAX_DISTANCE_KM = 2.0
+
+def _valid_coordinates(activity):
+    """Return (lat, lng) for an activity with usable coordinates, otherwise None"""
+    coordinates = activity.get('location', {}).get('coordinates') or {}
+    lat = coordinates.get('lat')
+    lng = coordinates.get('lng')
+    if not isinstance(lat, (int, float)) or not isinstance(lng, (int, float)) or (lat == 0 and lng == 0):
+        return None
+    return (lat, lng)
+
+def cluster_by_distance(points, radius_km):
+    """
+    Greedily group points so that every point lies within radius_km of its group's seed.
+    
+    Args:
+        points: List of (lat, lng) tuples
+        radius_km: Maximum distance from the seed point
+        
+    Returns:
+        List of (seed, [indexes]) tuples
+    """
+    clusters = []
+    assigned = [False] * len(points)
+    for i, seed in enumerate(points):
+        if assigned[i]:
+            continue
+        members = []
+        for j in range(i, len(points)):
+            if not assigned[j] and haversine_distance(seed[0], seed[1], points[j][0], points[j][1]) <= radius_km:
+                assigned[j] = True
+                members.append(j)
+        clusters.append((seed, members))
+    return clusters
+
+def _geotagged_images(data):
+    """Extract (url, lat, lng) for every geotagged image in a Wikimedia response"""
+    images = []
+    if not data or 'query' not in data or 'pages' not in data['query']:
+        return images
+    for page_data in data['query']['pages'].values():
+        coordinates = page_data.get('coordinates')
+        if not coordinates or not page_data.get('imageinfo'):
+            continue
+        file_url = page_data['imageinfo'][0]['url']
+        if any(ext in file_url.lower() for ext in IMAGE_EXTENSIONS):
+            images.append((file_url, coordinates[0]['lat'], coordinates[0]['lon']))
+    return images
+
+async def batch_geosearch_images(activities, session):
+    """
+    Resolve images for geolocated activities with one geosearch query per area.
+    
+    Activities are grouped into clusters that fit inside the maximum geosearch radius,
+    each cluster is fetched with a single query returning up to 500 geotagged files,
+    and every activity takes the closest unused image within ACTIVITY_IMAGE_MAX_DISTANCE_KM.
+    
+    Args:
+        activities: Activities without images
+        session: Shared aiohttp session
+        
+    Returns:
+        Dictionary mapping activity index to image URL
+    """
+    located = [(i, _valid_coordinates(activity)) for i, activity in enumerate(activities)]
+    located = [(i, point) for i, point in located if point]
+    if not located:
+        return {}
+    
+    # Leave room for the match distance inside the query radius
+    cluster_radius_km = WIKIMEDIA_GEOSEARCH_MAX_RADIUS / 1000 - ACTIVITY_IMAGE_MAX_DISTANCE_KM
+    clusters = cluster_by_distance([point for _, point in located], cluster_radius_km)
+    
+    async def fetch_cluster(seed):
+        return await fetch_wikimedia_json(session, {
+            "action": "query",
+            "generator": "geosearch",
+            "ggscoord": f"{seed[0]}|{seed[1]}",
+            "ggsradius": WIKIMEDIA_GEOSEARCH_MAX_RADIUS,
+            "ggsnamespace": 6,
+            "ggslimit": WIKIMEDIA_GEOSEARCH_LIMIT,
+            "prop": "imageinfo|coordinates",
+            "iiprop": "url",
+            "colimit": "max"
+        })
     
-async def get_activities(request: ItineraryRequest) -> Dict[str, Any]:
+    responses = await asyncio.gather(*(fetch_cluster(seed) for seed, _ in clusters), return_exceptions=True)
+    
+    results = {}
+    used_urls = set()
+    for (seed, members), data in zip(clusters, responses):
+        if isinstance(data, Exception):
+            logger.warning(f"Batched geosearch failed: {str(data)}")
+            continue
+        images = _geotagged_images(data)
+        for member in members:
+            index, (lat, lng) = located[member]
+            candidates = sorted(
+                (haversine_distance(lat, lng, image_lat, image_lng), url)
+                for url, image_lat, image_lng in images
+            )
+            candidates = [(distance, url) for distance, url in candidates if distance <= ACTIVITY_IMAGE_MAX_DISTANCE_KM]
+            # Prefer an image no other activity is using, reuse only if nothing else is close
+            for distance, url in candidates:
+                if url not in used_urls:
+                    break
+            else:
+                url = candidates[0][1] if candidates else ""
+            if url:
+                results[index] = url
+                used_urls.add(url)
+    
+    logger.info(f"Batched geosearch matched {len(results)}/{len(located)} activities with {len(clusters)} queries")
+    return results
+
+async def find_existing_categories(terms, session):
+    """
+    Check which Commons categories exist and contain files, 50 titles per query.
+    
+    Args:
+        terms: Category names without the Category: prefix
+        session: Shared aiohttp session
+        
+    Returns:
+        Set of the input terms whose category holds at least one file
+    """
+    unique_terms = list(dict.fromkeys(terms))
+    chunks = [unique_terms[i:i + WIKIMEDIA_MAX_TITLES] for i in range(0, len(unique_terms), WIKIMEDIA_MAX_TITLES)]
+    
+    async def check_chunk(chunk):
+        return chunk, await fetch_wikimedia_json(session, {
+            "action": "query",
+            "titles": "|".join(f"Category:{term}" for term in chunk),
+            "prop": "categoryinfo"
+        })
+    
+    existing = set()
+    for result in await asyncio.gather(*(check_chunk(chunk) for chunk in chunks), return_exceptions=True):
+        if isinstance(result, Exception):
+            logger.warning(f"Batched category lookup failed: {str(result)}")
+            continue
+        chunk, data = result
+        if not data or 'query' not in data:
+            continue
+        
+        # Map API-normalized titles back to the requested ones
+        normalized = {item['to']: item['from'] for item in data['query'].get('normalized', [])}
+        for page_data in data['query'].get('pages', {}).values():
+            if page_data.get('categoryinfo', {}).get('files', 0) > 0:
+                title = normalized.get(page_data['title'], page_data['title'])
+                existing.add(title[len("Category:"):])
+    return existing
+
+async def batch_category_images(activities, destination, session, semaphore):
+    """
+    Resolve images from Commons categories for a batch of activities.
+    
+    Category existence is checked with multi-title queries, then each distinct existing
+    category is listed once and its files are shared between the activities pointing at it.
+    
+    Args:
+        activities: Dictionary mapping activity index to activity
+        destination: Destination name used when an activity has no location name
+        session: Shared aiohttp session
+        semaphore: Semaphore bounding concurrent requests
+        
+    Returns:
+        Dictionary mapping activity index to image URL
+    """
+    activity_terms = {
+        index: format_category_terms(activity['title'], activity.get('location', {}).get('name', destination))
+        for index, activity in activities.items()
+    }
+    existing = await find_existing_categories(
+        [term for terms in activity_terms.values() for term in terms], session
+    )
+    
+    chosen = {}
+    for index, terms in activity_terms.items():
+        for term in terms:
+            if term in existing:
+                chosen[index] = term
+                break
+    
+    async def list_category(term):
+        async with semaphore:
+            data = await fetch_wikimedia_json(session, {
+                "action": "query",
+                "generator": "categorymembers",
+                "gcmtitle": f"Category:{term}",
+                "gcmlimit": 50,
+                "gcmtype": "file",
+                "prop": "imageinfo",
+                "iiprop": "url"
+            })
+        urls = []
+        if data and 'query' in data and 'pages' in data['query']:
+            for page_data in data['query']['pages'].values():
+                if page_data.get('imageinfo'):
+                    file_url = page_data['imageinfo'][0]['url']
+                    if any(ext in file_url.lower() for ext in IMAGE_EXTENSIONS):
+                        urls.append(file_url)
+        return urls
+    
+    terms = list(dict.fromkeys(chosen.values()))
+    listings = await asyncio.gather(*(list_category(term) for term in terms), return_exceptions=True)
+    category_images = {
+        term: listing for term, listing in zip(terms, listings) if not isinstance(listing, Exception)
+    }
+    
+    results = {}
+    for index, term in chosen.items():
+        images = category_images.get(term)
+        if images:
+            # Activities sharing a category take turns through its files
+            results[index] = images.pop(0) if len(images) > 1 else images[0]
+    
+    logger.info(f"Batched category search matched {len(results)}/{len(activities)} activities with {len(terms)} listings")
+    return results
+
+async def resolve_activity_images_batch(activities: List[Dict], destination: str, session) -> Dict[int, str]:
+    """
+    Resolve Wikimedia images for all of a trip's activities in as few API calls as possible:
+    batched geosearch first, then multi-title category lookups, then a bounded
+    per-activity basic search for whatever is still missing.
+    
+    Args:
+        activities: Activities without images
+        destination: Destination name used when an activity has no location name
+        session: Shared aiohttp session
+        
+    Returns:
+        Dictionary mapping activity index to image URL, or to an empty string when every
+        search answered without an image; activities whose lookup failed are left out
+    """
+    semaphore = asyncio.Semaphore(IMAGE_LOOKUP_CONCURRENCY)
+    results = await batch_geosearch_images(activities, session)
+    
+    remaining = {i: activity for i, activity in enumerate(activities) if i not in results}
+    if remaining:
+        results.update(await batch_category_images(remaining, destination, session, semaphore))
+    
+    remaining = {i: activity for i, activity in enumerate(activities) if i not in results}
+    
+    async def basic_search(index, activity):
+        async with semaphore:
+            location_name = activity.get('location', {}).get('name', destination)
+            return index, await try_basic_search_method(activity['title'], location_name, session)
+    
+    for index, image_url in await asyncio.gather(*(basic_search(i, a) for i, a in remaining.items())):
+        if image_url is not None:
+            results[index] = image_url
+    
+    return results
+
+async def add_activity_images(activities: Dict[str, List[Dict]], destination: str) -> None:
+    """
+    Resolve Wikimedia images for every activity without one. The persistent image
+    cache is consulted first, the rest go through the batched resolver over the
+    shared Wikimedia session.
+    
+    Args:
+        activities: Activities grouped by category (updated in place)
+        destination: Destination name used when an activity has no location name
+    """
+    pending = []
+    cache_hits = 0
+    for category_activities in activities.values():
+        for activity in category_activities:
+            if activity.get('images'):
+                continue
+            cached_url = get_cached_image(
+                activity_image_key(activity['title'], activity.get('location', {}).get('name', destination))
+            )
+            if cached_url is None:
+                pending.append(activity)
+                continue
+            cache_hits += 1
+            if cached_url:
+                activity['images'] = [cached_url]
+    
+    if cache_hits:
+        logger.info(f"Served {cache_hits} activity images from the image cache")
+    if not pending:
+        return
+    
+    images = await resolve_activity_images_batch(pending, destination, get_wikimedia_session())
+    
+    for index, activity in enumerate(pending):
+        image_url = images.get(index)
+        if image_url is None:
+            # The lookup failed, so try again next time rather than remembering a miss
+            continue
+        # Genuine misses are cached too (with a shorter TTL) so they are not searched again on every trip
+        cache_image(activity_image_key(activity['title'], activity.get('location', {}).get('name', destination)), image_url)
+        if image_url:
+            activity['images'] = [image_url]
+    
+    logger.info(f"Resolved images for {sum(1 for url in images.values() if url)}/{len(pending)} activities")
+    
+# Activities closer than this with similar titles are treated as the same place
+DUPLICATE_DISTANCE_KM = 0.15
+# Activities with the same title are the same place up to this far apart, which allows for
+# coordinate noise but keeps same-name places in different towns of a circuit apart
+DUPLICATE_SAME_TITLE_DISTANCE_KM = 1.0
+DUPLICATE_TITLE_SIMILARITY = 0.5
+TITLE_FILLER_WORDS = {"the", "a", "an", "visit", "visiting", "explore", "exploring", "tour", "trip", "to", "of", "at", "in"}
+
+def normalize_activity_title(title):
+    """Lowercase a title, drop punctuation and filler words so variants of one place compare equal"""
+    words = ''.join(c if c.isalnum() else ' ' for c in (title or '').lower()).split()
+    return ' '.join(word for word in words if word not in TITLE_FILLER_WORDS)
+
+def _titles_similar(first, second):
+    if not first or not second:
+        return False
+    if first in second or second in first:
+        return True
+    first_tokens, second_tokens = set(first.split()), set(second.split())
+    return len(first_tokens & second_tokens) / len(first_tokens | second_tokens) >= DUPLICATE_TITLE_SIMILARITY
+
+def is_duplicate_activity(activity: Dict[str, Any], others: List[Dict[str, Any]]) -> bool:
+    """
+    Check whether an activity is the same place as any of others, by the rules of
+    deduplicate_activities.
+    
+    Args:
+        activity: Activity to check
+        others: Activities already kept
+        
+    Returns:
+        True if the activity duplicates one of others
+    """
+    title = normalize_activity_title(activity.get('title'))
+    coordinates = _valid_coordinates(activity)
+    for other in others:
+        other_title = normalize_activity_title(other.get('title'))
+        other_coordinates = _valid_coordinates(other)
+        if coordinates is None or other_coordinates is None:
+            if title and title == other_title:
+                return True
+            continue
+        distance = haversine_distance(coordinates[0], coordinates[1], other_coordinates[0], other_coordinates[1])
+        if title and title == other_title and distance <= DUPLICATE_SAME_TITLE_DISTANCE_KM:
+            return True
+        if _titles_similar(title, other_title) and distance <= DUPLICATE_DISTANCE_KM:
+            return True
+    return False
+
+def deduplicate_activities(activities: Dict[str, List[Dict]], categories: List[str]) -> int:
+    """
+    Remove places listed in more than one category, keeping the first occurrence
+    and recording every category it appeared in as its tags.
+    
+    Two activities are the same place when their normalized titles match and they lie
+    within DUPLICATE_SAME_TITLE_DISTANCE_KM of each other (or one has no coordinates), or
+    when they lie within DUPLICATE_DISTANCE_KM of each other and their titles are similar.
+    Nearby activities are found through a grid keyed by coordinates, so the pass is linear
+    in the number of activities.
+    
+    Args:
+        activities: Activities grouped by category (updated in place)
+        categories: Category names in priority order
+        
+    Returns:
+        Number of duplicates removed
+    """
+    def distance(first, second):
+        return haversine_distance(first[0], first[1], second[0], second[1])
+    
+    # Grid cells at least DUPLICATE_DISTANCE_KM wide, so neighbours are always in adjacent
+    # cells. A degree of longitude shrinks with cos(latitude), so longitude cells are sized
+    # for the highest latitude in the trip
+    located = [_valid_coordinates(activity) for category in categories for activity in activities.get(category, [])]
+    max_latitude = max((abs(point[0]) for point in located if point), default=0.0)
+    lat_cell_degrees = DUPLICATE_DISTANCE_KM / 111.0
+    lng_cell_degrees = lat_cell_degrees / max(math.cos(math.radians(min(max_latitude, 89.0))), 0.01)
+    
+    def cell_of(coordinates):
+        return (int(coordinates[0] // lat_cell_degrees), int(coordinates[1] // lng_cell_degrees))
+    
+    by_title = {}
+    grid = {}
+    removed = 0
+    
+    for category in categories:
+        kept = []
+        for activity in activities.get(category, []):
+            title = normalize_activity_title(activity.get('title'))
+            coordinates = _valid_coordinates(activity)
+            
+            original = None
+            for other_coordinates, other in by_title.get(title, []) if title else []:
+                if (coordinates is None or other_coordinates is None
+                        or distance(coordinates, other_coordinates) <= DUPLICATE_SAME_TITLE_DISTANCE_KM):
+                    original = other
+                    break
+            
+            if original is None and coordinates:
+                cell = cell_of(coordinates)
+                neighbours = (
+                    entry
+                    for d_lat in (-1, 0, 1)
+                    for d_lng in (-1, 0, 1)
+                    for entry in grid.get((cell[0] + d_lat, cell[1] + d_lng), [])
+                )
+                for other_title, other_coordinates, other in neighbours:
+                    if (_titles_similar(title, other_title)
+                            and distance(coordinates, other_coordinates) <= DUPLICATE_DISTANCE_KM):
+                        original = other
+                        break
+            
+            if original is not None:
+                # Merge into the first occurrence instead of keeping a second copy
+                if category not in original['tags']:
+                    original['tags'].append(category)
+                original['priority'] = min(original.get('priority', 5), activity.get('priority', 5))
+                removed += 1
+                continue
+            
+            activity['tags'] = list(dict.fromkeys([category, *activity.get('tags', [])]))
+            if title:
+                by_title.setdefault(title, []).append((coordinates, activity))
+            if coordinates:
+                grid.setdefault(cell_of(coordinates), []).append((title, coordinates, activity))
+            kept.append(activity)
+        activities[category] = kept
+    
+    if removed:
+        logger.info(f"Removed {removed} duplicate activities across categories")
+    return removed
+
+async def get_activities(request: ItineraryRequest, include_images: bool = True) -> Dict[str, Any]:
+    """
+    Get activities/things to do for the trip from the destination's activity pool.
+    
+    The pool is filtered and ranked for the request; only categories with too few
+    suitable activities are topped up by generating new ones.
+    
+    Args:
+        request: The itinerary request object
+        include_images: Resolve Wikimedia images inline (False leaves them to the image service)
+        
+    Returns:
+        Dictionary containing activities and things to do
+    """
+    destination = request.location.destination
+    
+    async def regenerate():
+        return pooled_activities(await generate_activities(pool_request(request)))
+    
+    pool = load_pool("activities", destination, refresh=regenerate)
+    activities, thin_categories = select_activities(pool, request)
+    
+    if thin_categories:
+        new_activities = pooled_activities(
+            await generate_activities(pool_request(request), thin_categories, excluded_names(pool))
+        )
+        if new_activities:
+            pool = add_to_pool("activities", destination, new_activities)
+            activities, _ = select_activities(pool, request)
+    else:
+        logger.info(f"Serving activities for {destination} from the activity pool")
+    record_pool_use("activities", request, bool(thin_categories))
+    
+    # Pooled activities come from several generations, so the same place can be pooled
+    # under different categories or slightly different titles
+    deduplicate_activities(activities, ACTIVITY_CATEGORIES)
+    
+    # Add Wikimedia images for activities without one, all lookups run concurrently
+    if include_images:
+        await add_activity_images(activities, destination)
+    
+    logger.info(f"Selected {sum(len(items) for items in activities.values())} activities for {destination}")
+    return activities
+
+def pooled_activities(activities: Dict[str, Any]) -> List[Dict]:
+    """Flatten generated activities into pool entries tagged with their category"""
+    return [
+        {**activity, "category": category}
+        for category in ACTIVITY_CATEGORIES
+        for activity in activities.get(category, [])
+    ]
+
+async def generate_activities(request: ItineraryRequest, categories: Optional[List[str]] = None,
+                              exclude: Optional[List[str]] = None) -> Dict[str, Any]:
     """
     Generate activities/things to do for the trip.
     
+    Costs are asked for in POOL_CURRENCY; pooled activities come from pool_request.
+    
     Args:
         request: The itinerary request object
+        categories: Categories to generate (all when not given)
+        exclude: Places that are already known and should not be suggested again
         
     Returns:
         Dictionary containing activities and things to do
     """
     logger.info(f"Generating activities for {request.location.destination}")
     
+    # Top-up requests ask only for the thin categories and for places not seen before
+    top_up = ""
+    if categories and set(categories) != set(ACTIVITY_CATEGORIES):
+        top_up += f"\n    Only these categories are needed (return empty arrays for the others): {', '.join(categories)}"
+    if exclude:
+        top_up += f"\n    Do not include these places, they are already known: {'; '.join(exclude)}"
+    
     # Calculate trip duration in days
     start_date = datetime.strptime(request.dates.startDate, "%Y-%m-%d")
     end_date = datetime.strptime(request.dates.endDate, "%Y-%m-%d")
@@ -215,6 +820,7 @@ async def get_activities(request: ItineraryRequest) -> Dict[str, Any]:
     
     Additional preferences:
     {request.additionalContext if request.additionalContext else "No additional preferences specified"}
+    {top_up}
     
     Provide a diverse range of activities including:
     1. Must-see attractions and landmarks
@@ -227,7 +833,7 @@ async def get_activities(request: ItineraryRequest) -> Dict[str, Any]:
     For each activity include:
     - Detailed description
     - Duration
-    - Cost
+    - Cost in {POOL_CURRENCY}
     - Location information
     - Priority level (1-5, with 1 being highest)
     - Any relevant warnings or considerations
@@ -312,16 +918,6 @@ async def get_activities(request: ItineraryRequest) -> Dict[str, Any]:
                 if 'images' not in activity or not activity['images'] or any("example.com" in img for img in activity['images']):
                     activity['images'] = []
                 
-                # Add Wikimedia image if images array is empty
-                if not activity['images']:
-                    image_url = await get_wikimedia_image(
-                        activity['title'], 
-                        location_name,
-                        activity['location'].get('coordinates') if 'location' in activity and 'coordinates' in activity['location'] else None
-                    )
-                    if image_url:
-                        activity['images'] = [image_url]
-                
                 # Ensure booking_link exists (can be empty)
                 if 'booking_link' not in activity:
                     activity['booking_link'] = ""
@@ -330,6 +926,9 @@ async def get_activities(request: ItineraryRequest) -> Dict[str, Any]:
                 if 'cost' in activity and isinstance(activity['cost'], dict) and activity['cost'].get('currency') == "INR":
                     activity['cost']['currency'] = "₹"
         
+        # Drop places repeated across categories before they are pooled
+        deduplicate_activities(activities, categories)
+        
         logger.info(f"Generated {sum(len(activities.get(k, [])) for k in categories)} activities for {request.location.destination}")
         return activities
     except Exception as e:
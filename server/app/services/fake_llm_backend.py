@@ -0,0 +1,344 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.services.gemini_service import LLMBackend
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_CATEGORIES = ["must_see", "cultural", "outdoor", "local_experiences", "hidden_gems", "family_friendly"]
+ACTIVITY_WORDS = ["Fort", "Temple", "Lake", "Market", "Museum", "Viewpoint", "Garden", "Waterfall", "Monastery", "Trail", "Bazaar", "Palace"]
+ACTIVITY_ADJECTIVES = ["Old", "Royal", "Hidden", "Grand", "Sunset", "Riverside", "Ancient", "Misty", "Silver", "Golden"]
+HOTEL_TYPES = ["luxury hotel", "boutique hotel", "resort", "homestay", "budget hotel", "mid-range hotel"]
+CUISINES = ["North Indian", "South Indian", "Tibetan", "Italian", "Cafe", "Street food", "Chinese", "Local"]
+DISHES = ["Dal Makhani", "Masala Dosa", "Momos", "Thukpa", "Wood-fired Pizza", "Chole Bhature", "Siddu", "Trout Fry"]
+CONDITIONS = ["Clear sky", "Mainly clear", "Partly cloudy", "Overcast", "Slight rain", "Moderate rain showers"]
+NAME_THEMES = ["Escapade", "Trails", "Bliss", "Getaway", "Discoveries", "Sojourn"]
+
+# Patterns that pull the place a prompt is about out of each call site's wording
+DESTINATION_PATTERNS = [
+    r"trip from .+? to ([^\n.]+?)\.",
+    r"trip to ([^\n.]+?) from ",
+    r"trip to ([^\n.]+?)\.",
+    r"things to do in ([^\n]+?) for a ",
+    r"recommendations for ([^\n.]+?)\.",
+    r"Day \d+ in ([^\n.]+?)\.",
+    r"forecast for ([^\n]+?) (?:for the trip days|starting from)",
+    r"coordinates for ([^\n]+?)\.\s*\n",
+]
+
+def _stable_seed(*parts) -> int:
+    return int(hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:12], 16)
+
+def _destination(prompt: str) -> str:
+    for pattern in DESTINATION_PATTERNS:
+        match = re.search(pattern, prompt)
+        if match:
+            return match.group(1).strip()
+    return "Destination"
+
+def _dates(prompt: str) -> Tuple[str, str]:
+    match = re.search(r"(\d{4}-\d{2}-\d{2}) to (\d{4}-\d{2}-\d{2})", prompt)
+    if match:
+        return match.group(1), match.group(2)
+    match = re.search(r"\d{4}-\d{2}-\d{2}", prompt)
+    start = match.group(0) if match else datetime.now().strftime("%Y-%m-%d")
+    return start, start
+
+def place_coordinates(name: str) -> Tuple[float, float]:
+    """Stable made-up coordinates for a place name, so every call site agrees on them"""
+    rng = random.Random(_stable_seed(" ".join(name.lower().split())))
+    return round(rng.uniform(8.0, 34.0), 4), round(rng.uniform(68.0, 95.0), 4)
+
+def _nearby(rng: random.Random, center: Tuple[float, float], spread: float = 0.05) -> Dict[str, float]:
+    return {"lat": round(center[0] + rng.uniform(-spread, spread), 5), "lng": round(center[1] + rng.uniform(-spread, spread), 5)}
+
+def _cost(rng: random.Random, low: int, high: int, per_unit: Optional[str] = None) -> Dict[str, str]:
+    start = rng.randint(low, high) // 10 * 10
+    cost = {"currency": "INR", "range": f"{start}-{start + rng.randint(1, 5) * 100}"}
+    if per_unit:
+        cost["per_unit"] = per_unit
+    return cost
+
+def fake_meta(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    match = re.search(r"trip from (.+?) to ([^\n.]+?)\.", prompt)
+    base, destination = (match.group(1).strip(), match.group(2).strip()) if match else ("Origin", _destination(prompt))
+    origin, target = place_coordinates(base), place_coordinates(destination)
+    steps = 5
+    overview = [
+        {"lat": round(origin[0] + (target[0] - origin[0]) * i / steps, 4), "lng": round(origin[1] + (target[1] - origin[1]) * i / steps, 4)}
+        for i in range(steps + 1)
+    ]
+    distance = round(math.dist(origin, target) * 111, 1)
+    elevations = [rng.randint(200, 3000) for _ in range(steps + 1)]
+    return {
+        "journey_path": {
+            "overview": overview,
+            "distance_km": distance,
+            "elevation_profile": [{"distance": round(distance * i / steps, 1), "elevation": e} for i, e in enumerate(elevations)]
+        },
+        "altitude_info": {
+            "highest_point": max(elevations),
+            "lowest_point": min(elevations),
+            "advisory": "Stay hydrated and acclimatize gradually at higher altitudes."
+        },
+        "key_coordinates": [
+            {"name": base, "lat": origin[0], "lng": origin[1], "altitude": elevations[0]},
+            {"name": destination, "lat": target[0], "lng": target[1], "altitude": elevations[-1]}
+        ]
+    }
+
+def fake_transport(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    match = re.search(r"trip from (.+?) to ([^\n.]+?)\.", prompt)
+    base, destination = (match.group(1).strip(), match.group(2).strip()) if match else ("Origin", _destination(prompt))
+    return {
+        "main_transport": [
+            {
+                "mode": mode, "from": base, "to": destination,
+                "departure_time": f"{rng.randint(5, 22):02d}:00", "arrival_time": f"{rng.randint(5, 22):02d}:30",
+                "duration": rng.randint(90, 900), "operator": f"{destination} {mode.title()} Services",
+                "cost": _cost(rng, 500, 6000, "per person"), "booking_link": "",
+                "details": f"{mode.title()} from {base} to {destination}"
+            }
+            for mode in ("flight", "bus", "car")
+        ],
+        "local_transport": [
+            {"mode": mode, "area": destination, "cost": _cost(rng, 50, 800, "per trip"), "details": f"{mode.title()} around {destination}"}
+            for mode in ("taxi", "auto-rickshaw", "local bus")
+        ],
+        "transfers": [
+            {"from": f"{destination} Airport", "to": f"{destination} Center", "mode": "taxi", "duration": rng.randint(20, 90), "cost": _cost(rng, 300, 1500)}
+        ],
+        "route_transport": [
+            {"from": base, "to": destination, "recommended_mode": "car", "duration": rng.randint(120, 720), "details": "Most flexible option"}
+        ]
+    }
+
+def fake_activities(prompt: str, rng: random.Random, items: int) -> Dict[str, Any]:
+    destination = _destination(prompt)
+    center = place_coordinates(destination)
+    result = {}
+    for category in ACTIVITY_CATEGORIES:
+        activities = []
+        for _ in range(items):
+            title = f"{rng.choice(ACTIVITY_ADJECTIVES)} {rng.choice(ACTIVITY_WORDS)} of {destination}"
+            activities.append({
+                "title": title,
+                "type": category.replace("_", " "),
+                "description": f"A popular {category.replace('_', ' ')} stop in {destination}.",
+                "location": {"name": f"{title.split(' of ')[0]}, {destination}", "coordinates": _nearby(rng, center)},
+                "duration": rng.choice([60, 90, 120, 180]),
+                "cost": _cost(rng, 0, 1500),
+                "priority": rng.randint(1, 5),
+                "images": [],
+                "warnings": [{"type": "crowd", "message": "Can be busy on weekends", "priority": 3}] if rng.random() < 0.3 else []
+            })
+        result[category] = activities
+    return result
+
+def fake_accommodations(prompt: str, rng: random.Random, items: int) -> Dict[str, Any]:
+    destination = _destination(prompt)
+    center = place_coordinates(destination)
+    hotels = []
+    for i in range(items):
+        hotel_type = rng.choice(HOTEL_TYPES)
+        name = f"{rng.choice(ACTIVITY_ADJECTIVES)} {rng.choice(['Pines', 'Residency', 'Retreat', 'Heights', 'Manor'])} {destination}"
+        hotels.append({
+            "name": name,
+            "type": hotel_type,
+            "location": {"name": f"Ward {i + 1}, {destination}", "coordinates": _nearby(rng, center)},
+            "price_range": f"INR {rng.randint(15, 90) * 100}-{rng.randint(100, 250) * 100}",
+            "description": f"A {hotel_type} in {destination} with easy access to the main sights."
+        })
+    return {"accommodations": hotels}
+
+def fake_hotel_fields(fields: List[str], name: str, rng: random.Random) -> Dict[str, Any]:
+    data = {}
+    if "amenities" in fields:
+        data["amenities"] = rng.sample(["Free Wi-Fi", "Restaurant", "Room service", "Parking", "Spa", "Mountain view", "Gym"], k=4)
+    if "booking_link" in fields:
+        data["booking_link"] = f"https://www.google.com/maps/search/?api=1&query={'+'.join(name.split())}"
+    return data
+
+def fake_hotel_batch(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    hotels = []
+    for name, fields in re.findall(r'- "(.+?)" \(.*?\) located in .*?: (.+)', prompt):
+        hotels.append({"name": name, **fake_hotel_fields([f.strip() for f in fields.split(",")], name, rng)})
+    return {"hotels": hotels}
+
+def fake_hotel_fields_single(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    name_match = re.search(r'hotel named "(.+?)"', prompt)
+    fields_match = re.search(r"following fields:\s*\n\s*(.+)", prompt)
+    fields = [f.strip() for f in fields_match.group(1).split(",")] if fields_match else []
+    return fake_hotel_fields(fields, name_match.group(1) if name_match else "Hotel", rng)
+
+def fake_dining(prompt: str, rng: random.Random, items: int) -> Dict[str, Any]:
+    destination = _destination(prompt)
+    center = place_coordinates(destination)
+    restaurants = []
+    for _ in range(items + 3):
+        cuisine = rng.choice(CUISINES)
+        restaurants.append({
+            "name": f"{rng.choice(ACTIVITY_ADJECTIVES)} {rng.choice(['Kitchen', 'Dhaba', 'Cafe', 'Bistro', 'Table'])}",
+            "cuisine": cuisine,
+            "price_range": rng.choice(["$", "$$", "$$$"]),
+            "dietary_options": rng.sample(["vegetarian", "vegan", "gluten-free", "jain"], k=2),
+            "signature_dishes": rng.sample(DISHES, k=2),
+            "location": {"name": f"Main Road, {destination}", "coordinates": _nearby(rng, center)},
+            "description": f"{cuisine} favourite in {destination}."
+        })
+    return {"dining": restaurants}
+
+def _listed_names(prompt: str, heading: str) -> List[str]:
+    match = re.search(heading + r":[ \t]*\n[ \t]*(.*)", prompt)
+    if not match:
+        return []
+    return [name.strip() for name in match.group(1).split(",") if name.strip()]
+
+def fake_day_plan(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    restaurants = _listed_names(prompt, "Available restaurants") or ["Local Restaurant"]
+    activities = _listed_names(prompt, "Available activities") or ["Explore the town"]
+    slots = [
+        ("fixed", "08:00", "09:00", restaurants[0]),
+        ("flexible", "09:30", "12:30", activities[0]),
+        ("fixed", "13:00", "14:00", restaurants[1 % len(restaurants)]),
+        ("flexible", "14:30", "18:00", activities[1 % len(activities)]),
+        ("fixed", "19:30", "21:00", restaurants[2 % len(restaurants)]),
+    ]
+    return {"time_blocks": [
+        {"type": kind, "start_time": start, "end_time": end, "activity": {"title": title}}
+        for kind, start, end, title in slots
+    ]}
+
+def fake_advisories(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    dates = sorted(set(re.findall(r'"date": "(\d{4}-\d{2}-\d{2})"', prompt)))
+    return {
+        "daily_advisories": [
+            {"date": date, "advisory": rng.choice([
+                "Carry a light jacket for the evening.",
+                "Good day for outdoor sightseeing, use sunscreen.",
+                "Keep an umbrella handy for passing showers."
+            ])}
+            for date in dates
+        ],
+        "general_advisory": "Pack layers; mornings and evenings are cooler than afternoons."
+    }
+
+def fake_forecast(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    start, _ = _dates(prompt)
+    start_date = datetime.strptime(start, "%Y-%m-%d")
+    forecast = []
+    for i in range(5):
+        low = rng.randint(2, 22)
+        forecast.append({
+            "date": (start_date + timedelta(days=i)).strftime("%Y-%m-%d"),
+            "temperature": {"min": low, "max": low + rng.randint(4, 12)},
+            "conditions": rng.choice(CONDITIONS),
+            "precipitation": {"probability": rng.randint(0, 90), "amount": rng.choice(["None", "Light", "Moderate"])},
+            "wind": {"speed": rng.randint(3, 30), "unit": "km/h", "direction": rng.choice(["N", "NE", "E", "SE", "S", "SW", "W", "NW"])},
+            "advisory": "Check local conditions before heading out."
+        })
+    return {"forecast": forecast, "general_advisory": "Typical seasonal weather expected."}
+
+def fake_essential_info(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    return {
+        "documents": ["Government-issued photo ID", "Hotel booking confirmations", "Travel insurance"],
+        "emergency_contacts": [
+            {"type": "Police", "number": "100"},
+            {"type": "Ambulance", "number": "102"},
+            {"type": "National Emergency Number", "number": "112"}
+        ]
+    }
+
+def fake_name(prompt: str, rng: random.Random) -> str:
+    return f"{rng.choice(ACTIVITY_ADJECTIVES)} {rng.choice(NAME_THEMES)} in {_destination(prompt)}"
+
+def fake_completion(prompt: str, system_instruction: Optional[str], rng: random.Random, items: int) -> str:
+    """
+    Build a response for a prompt, recognizing each call site by the schema it asks for.
+
+    Returns:
+        JSON text for structured call sites, plain text for the itinerary name
+    """
+    if "travel itinerary name" in prompt:
+        return fake_name(prompt, rng)
+    if '"latitude": 00.0000' in prompt:
+        lat, lng = place_coordinates(_destination(prompt))
+        result = {"latitude": lat, "longitude": lng}
+    elif '"lat": 00.0000' in prompt:
+        lat, lng = place_coordinates(_destination(prompt))
+        result = {"lat": lat, "lng": lng}
+    elif '"journey_path"' in prompt:
+        result = fake_meta(prompt, rng)
+    elif '"main_transport"' in prompt:
+        result = fake_transport(prompt, rng)
+    elif '"must_see"' in prompt:
+        result = fake_activities(prompt, rng, items)
+    elif '"hotels": [' in prompt:
+        result = fake_hotel_batch(prompt, rng)
+    elif "following fields" in prompt:
+        result = fake_hotel_fields_single(prompt, rng)
+    elif '"accommodations"' in prompt:
+        result = fake_accommodations(prompt, rng, items)
+    elif '"dining"' in prompt:
+        result = fake_dining(prompt, rng, items)
+    elif '"time_blocks"' in prompt:
+        result = fake_day_plan(prompt, rng)
+    elif '"daily_advisories"' in prompt:
+        result = fake_advisories(prompt, rng)
+    elif '"forecast": [' in prompt:
+        result = fake_forecast(prompt, rng)
+    elif '"emergency_contacts"' in prompt:
+        result = fake_essential_info(prompt, rng)
+    else:
+        logger.warning("Fake LLM backend received an unrecognized prompt, returning an empty object")
+        result = {}
+    return json.dumps(result, indent=2)
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Deterministic stand-in for Gemini.
+
+    Responses depend only on the prompt, the retry attempt and FAKE_LLM_SEED, so runs
+    are repeatable regardless of request interleaving. Latency is a lognormal time to
+    first token plus generation time at a fixed token rate; a share of calls fail with
+    a 503 or return truncated JSON.
+    """
+
+    name = "fake"
+
+    def __init__(self):
+        self.seed = int(os.environ.get("FAKE_LLM_SEED", "0"))
+        self.latency_ms = float(os.environ.get("FAKE_LLM_LATENCY_MS", "400"))
+        self.latency_jitter = float(os.environ.get("FAKE_LLM_LATENCY_JITTER", "0.3"))
+        self.tokens_per_second = float(os.environ.get("FAKE_LLM_TOKENS_PER_SECOND", "150"))
+        self.error_rate = float(os.environ.get("FAKE_LLM_ERROR_RATE", "0"))
+        self.malformed_rate = float(os.environ.get("FAKE_LLM_MALFORMED_RATE", "0"))
+        self.items = int(os.environ.get("FAKE_LLM_ITEMS", "5"))
+
+    def generate(self, prompt: str, system_instruction: Optional[str] = None, attempt: int = 0) -> str:
+        prompt_key = _stable_seed(self.seed, system_instruction, prompt)
+        # Retries of a call draw new latencies and failures, but every call of the same
+        # prompt goes through the same sequence
+        behaviour = random.Random(_stable_seed(prompt_key, attempt))
+
+        latency = self.latency_ms * math.exp(behaviour.gauss(0, self.latency_jitter)) if self.latency_jitter else self.latency_ms
+        if behaviour.random() < self.error_rate:
+            time.sleep(latency / 1000)
+            raise Exception("503 The model is overloaded. Please try again later.")
+
+        text = fake_completion(prompt, system_instruction, random.Random(prompt_key), self.items)
+        if behaviour.random() < self.malformed_rate:
+            text = text[: max(1, len(text) // 2)]
+
+        # Roughly four characters per token
+        generation = len(text) / 4 / self.tokens_per_second if self.tokens_per_second > 0 else 0
+        time.sleep(latency / 1000 + generation)
+        return text
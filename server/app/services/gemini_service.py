@@ -4,10 +4,14 @@ import json
 import logging
 import re
 import asyncio
+import abc
 import concurrent.futures
+import contextvars
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 
+from app.utils.metrics import Counters, metrics
+
 load_dotenv()
 logger = logging.getLogger(__name__)
 
@@ -17,25 +21,88 @@ genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 # Thread pool for running blocking Gemini calls
 _THREAD_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=10)
 
-def _sync_gemini_call(prompt: str, system_instruction: Optional[str] = None) -> str:
+# Extra counters charged with the LLM calls made in the current context (and tasks it starts)
+_call_counters = contextvars.ContextVar("llm_call_counters", default=None)
+
+class LLMBackend(abc.ABC):
     """
-    Synchronous call to Gemini API - will be run in a thread pool
+    Text generation backend behind get_gemini_response.
+    
+    generate is blocking and runs in the thread pool; it should raise on failure so
+    the retry logic in get_gemini_response applies. attempt counts the retries of the
+    same call, starting at 0.
     """
-    model = genai.GenerativeModel(model_name="gemini-2.0-flash")
     
-    try:
-        if system_instruction:
-            chat = model.start_chat(history=[])
-            response = chat.send_message(
-                f"System instruction: {system_instruction}\n\nUser prompt: {prompt}"
-            )
-        else:
-            response = model.generate_content(prompt)
+    name = "base"
+    
+    @abc.abstractmethod
+    def generate(self, prompt: str, system_instruction: Optional[str] = None, attempt: int = 0) -> str:
+        """Generate a completion for prompt"""
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini through the google.generativeai client"""
+    
+    name = "gemini"
+    
+    def __init__(self, model_name: str = "gemini-2.0-flash"):
+        self.model_name = model_name
+    
+    def generate(self, prompt: str, system_instruction: Optional[str] = None, attempt: int = 0) -> str:
+        model = genai.GenerativeModel(model_name=self.model_name)
         
-        return response.text
-    except Exception as e:
-        logger.error(f"Error in Gemini API call: {str(e)}")
-        raise
+        try:
+            if system_instruction:
+                chat = model.start_chat(history=[])
+                response = chat.send_message(
+                    f"System instruction: {system_instruction}\n\nUser prompt: {prompt}"
+                )
+            else:
+                response = model.generate_content(prompt)
+            
+            return response.text
+        except Exception as e:
+            logger.error(f"Error in Gemini API call: {str(e)}")
+            raise
+
+_backend: Optional[LLMBackend] = None
+
+def create_llm_backend(name: str) -> LLMBackend:
+    """
+    Create an LLM backend by name.
+    
+    Args:
+        name: "gemini" or "fake"
+        
+    Returns:
+        LLMBackend instance
+    """
+    if name == "fake":
+        # Imported here because the fake backend builds on LLMBackend from this module
+        from app.services.fake_llm_backend import FakeLLMBackend
+        return FakeLLMBackend()
+    if name != "gemini":
+        raise ValueError(f"Unknown LLM_BACKEND: {name}")
+    return GeminiBackend()
+
+def get_llm_backend() -> LLMBackend:
+    """Backend selected by the LLM_BACKEND environment variable (gemini by default)"""
+    global _backend
+    if _backend is None:
+        _backend = create_llm_backend(os.getenv("LLM_BACKEND", "gemini").lower())
+        logger.info(f"Using the {_backend.name} LLM backend")
+    return _backend
+
+def set_llm_backend(backend: Optional[LLMBackend]) -> None:
+    """Replace the active backend (None goes back to the LLM_BACKEND setting)"""
+    global _backend
+    _backend = backend
+
+def track_llm_calls(counters: Optional[Counters]) -> None:
+    """
+    Also count the LLM calls made by the current task (and the tasks it starts) as
+    "llm.calls" in counters, e.g. to keep background work within a call budget.
+    """
+    _call_counters.set(counters)
 
 async def get_gemini_response(prompt: str, system_instruction: Optional[str] = None, retry_count: int = 2) -> str:
     """
@@ -46,13 +113,19 @@ async def get_gemini_response(prompt: str, system_instruction: Optional[str] = N
     
     while retry <= retry_count:
         try:
+            metrics.increment("llm.calls")
+            counters = _call_counters.get()
+            if counters is not None:
+                counters.increment("llm.calls")
+            
             # Run the blocking Gemini call in a thread pool
             loop = asyncio.get_event_loop()
             response_text = await loop.run_in_executor(
                 _THREAD_POOL,
-                _sync_gemini_call,
+                get_llm_backend().generate,
                 prompt,
-                system_instruction
+                system_instruction,
+                retry
             )
             return response_text
             
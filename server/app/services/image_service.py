@@ -0,0 +1,172 @@
+import logging
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from app.services.activities_service import add_activity_images
+from app.services.accommodations_service import add_dining_images
+from app.utils.image_cache import (
+    IMAGE_CACHE_MAX_ENTRIES, IMAGE_CACHE_NEGATIVE_TTL, IMAGE_CACHE_PATH, activity_image_key, cuisine_image_key,
+    get_cached_image
+)
+from app.utils.persistent_cache import PersistentCache, MISSING
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of image placeholders kept in memory
+MAX_IMAGE_JOBS = 10000
+
+# Placeholder id -> {"status": "pending" | "resolved" | "not_found", "url": str}
+_IMAGE_JOBS: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+# Placeholder id -> image cache key and issue time, shared with the other workers through
+# the image cache database, so any worker can answer for an id another one issued
+image_ids = PersistentCache(IMAGE_CACHE_PATH, "image_ids", max_entries=IMAGE_CACHE_MAX_ENTRIES)
+
+# A placeholder still unresolved in the image cache after this long is reported not found
+IMAGE_RESOLUTION_TIMEOUT_SECONDS = 300
+
+# Keep references to background tasks so they are not garbage collected mid-flight
+_BACKGROUND_TASKS = set()
+
+def make_image_id(cache_key: str) -> str:
+    """Stable placeholder id derived from the image cache key"""
+    return hashlib.sha1(cache_key.encode("utf-8")).hexdigest()[:16]
+
+def issue_image_id(cache_key: str) -> str:
+    """Placeholder id for an image cache key, recorded so every worker can look it up"""
+    image_id = make_image_id(cache_key)
+    if image_id not in _IMAGE_JOBS:
+        image_ids.set(image_id, {"key": cache_key, "issued_at": time.time()}, IMAGE_CACHE_NEGATIVE_TTL)
+    return image_id
+
+def _set_job(image_id: str, status: str, url: str = "") -> None:
+    _IMAGE_JOBS[image_id] = {"status": status, "url": url}
+    _IMAGE_JOBS.move_to_end(image_id)
+    while len(_IMAGE_JOBS) > MAX_IMAGE_JOBS:
+        _IMAGE_JOBS.popitem(last=False)
+
+def _run_in_background(coroutine) -> None:
+    task = asyncio.create_task(coroutine)
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+
+def get_image_status(image_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the resolution state of an image placeholder.
+
+    Args:
+        image_id: Placeholder id returned with the itinerary
+
+    Returns:
+        Dictionary with id, status and url, or None if the id is unknown
+    """
+    job = _IMAGE_JOBS.get(image_id)
+    if job is not None:
+        return {"id": image_id, **job}
+
+    # Issued by another worker: answer from the shared image cache
+    issued = image_ids.get(image_id)
+    if issued is MISSING:
+        return None
+    url = get_cached_image(issued["key"])
+    if url is None:
+        pending = time.time() - issued["issued_at"] < IMAGE_RESOLUTION_TIMEOUT_SECONDS
+        return {"id": image_id, "status": "pending" if pending else "not_found", "url": ""}
+    return {"id": image_id, "status": "resolved" if url else "not_found", "url": url}
+
+def defer_activity_images(activities: Dict[str, List[Dict]], destination: str) -> None:
+    """
+    Give every activity without images a stable image placeholder id and resolve
+    the images in the background. Images already in the image cache are filled in
+    right away.
+
+    Args:
+        activities: Activities grouped by category (updated in place)
+        destination: Destination name used when an activity has no location name
+    """
+    pending = {}
+    for category_activities in activities.values():
+        for activity in category_activities:
+            if activity.get("images"):
+                continue
+
+            cache_key = activity_image_key(activity["title"], activity.get("location", {}).get("name", destination))
+            image_id = issue_image_id(cache_key)
+            activity["image_id"] = image_id
+
+            cached_url = get_cached_image(cache_key)
+            if cached_url is not None:
+                _set_job(image_id, "resolved" if cached_url else "not_found", cached_url)
+                if cached_url:
+                    activity["images"] = [cached_url]
+                continue
+
+            # Activities sharing a placeholder only need to be resolved once
+            if image_id not in pending:
+                _set_job(image_id, "pending")
+                pending[image_id] = {**activity, "images": []}
+
+    if not pending:
+        return
+
+    async def resolve():
+        try:
+            # Work on copies so the already returned itinerary is never mutated
+            await add_activity_images({"deferred": list(pending.values())}, destination)
+            for image_id, activity in pending.items():
+                url = activity["images"][0] if activity.get("images") else ""
+                _set_job(image_id, "resolved" if url else "not_found", url)
+        except Exception as e:
+            logger.error(f"Background activity image resolution failed: {str(e)}")
+            for image_id in pending:
+                _set_job(image_id, "not_found")
+
+    _run_in_background(resolve())
+    logger.info(f"Deferred image resolution for {len(pending)} activities")
+
+def defer_dining_images(restaurants: List[Dict]) -> None:
+    """
+    Give every restaurant a stable food image placeholder id and resolve the
+    images from Pexels in the background.
+
+    Args:
+        restaurants: Restaurant dictionaries (updated in place)
+    """
+    pending = {}
+    for restaurant in restaurants:
+        signature_dish = restaurant.get("signature_dishes", [""])[0] if restaurant.get("signature_dishes") else ""
+        cuisine = restaurant.get("cuisine", "")
+        cache_key = cuisine_image_key(cuisine, signature_dish)
+        image_id = issue_image_id(cache_key)
+        restaurant["image_id"] = image_id
+        restaurant.setdefault("images", [])
+
+        cached_url = get_cached_image(cache_key)
+        if cached_url is not None:
+            _set_job(image_id, "resolved" if cached_url else "not_found", cached_url)
+            if cached_url:
+                restaurant["images"] = [cached_url]
+        elif image_id not in pending:
+            _set_job(image_id, "pending")
+            pending[image_id] = {**restaurant, "images": []}
+
+    if not pending:
+        return
+
+    async def resolve():
+        try:
+            # Work on copies so the already returned itinerary is never mutated
+            await add_dining_images(list(pending.values()))
+            for image_id, restaurant in pending.items():
+                url = restaurant["images"][0] if restaurant.get("images") else ""
+                _set_job(image_id, "resolved" if url else "not_found", url)
+        except Exception as e:
+            logger.error(f"Background food image resolution failed: {str(e)}")
+            for image_id in pending:
+                _set_job(image_id, "not_found")
+
+    _run_in_background(resolve())
+    logger.info(f"Deferred image resolution for {len(pending)} restaurant images")
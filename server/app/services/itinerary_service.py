@@ -1,28 +1,76 @@
 import logging
 import asyncio
 import json
+import os
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 import concurrent.futures
+import copy
+import functools
+import re
 from urllib.parse import quote
 
+import numpy as np
+
 import urllib
 from app.models.request import ItineraryRequest
 from app.models.response import ItineraryResponse
 from app.services.gemini_service import get_gemini_response, get_gemini_structured_response
 from app.services.meta_service import get_meta_info
-from app.services.transport_service import get_transport_options
-from app.services.activities_service import get_activities
-from app.services.accommodations_service import get_accommodations_and_dining
-from app.services.weather_service import get_weather_forecast
-from app.utils.helpers import calculate_date_range
+from app.services.transport_service import get_transport_options, estimate_trip_journey, apply_travel_estimates
+from app.services.activities_service import get_activities, is_duplicate_activity
+from app.services.accommodations_service import get_accommodations_and_dining, plan_hotel_stays
+from app.services.weather_service import get_weather_forecast, attach_hourly_weather, is_circuit_route
+from app.services.image_service import defer_activity_images, defer_dining_images
+from app.services.pack_store import pack_coordinates, pack_essential_info
+from app.utils.helpers import calculate_date_range, haversine_distance, haversine_matrix
+from app.utils.image_cache import normalize_cache_text
+from app.utils.knowledge_cache import (
+    CITY_PAIR_META_TTL, ESSENTIAL_INFO_SOFT_TTL, ESSENTIAL_INFO_TTL, cache_knowledge, city_pair_key,
+    get_knowledge, get_or_generate, place_key
+)
 from app.utils.schema_helpers import conform_to_schema
+from app.utils.spatial import (
+    VenueIndex, build_request_index, get_destination_index, remember_destination_venues,
+    venue_coordinates, venue_name
+)
+from app.utils.travel_time import journey_minutes, travel_minutes
+from app.utils.route_optimizer import order_stops
 
 logger = logging.getLogger(__name__)
 
 # Thread pool for running blocking operations
 _THREAD_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=10)
 
+# Shortest travel time shown between two stops, in minutes
+MIN_TRAVEL_MINUTES = 5
+
+# Activities tied to a time of day (a sunset point, a night market) keep to their part of
+# the day when the route is reordered; parts of the day start at these hours
+TIME_OF_DAY_PATTERN = re.compile(
+    r"\b(?:sunrise|sunset|dawn|dusk|morning|evening|night|nightlife|stargazing|aarti)\b", re.IGNORECASE
+)
+PART_OF_DAY_HOURS = (12, 17)
+
+# Re-fitting a cached itinerary to a similar request needs both trips' places this close
+SIMILAR_MAX_DISTANCE_KM = float(os.environ.get("SIMILAR_MAX_DISTANCE_KM", "30"))
+
+# Returned when a place cannot be located (the center of India)
+COORDINATES_FALLBACK = {"lat": 20.5937, "lng": 78.9629}
+
+ESSENTIAL_INFO_FALLBACK = {
+    "documents": [
+        "Photo ID",
+        "Hotel booking confirmation",
+        "Travel insurance"
+    ],
+    "emergency_contacts": [
+        {"type": "Police", "number": "100"},
+        {"type": "Ambulance", "number": "102"},
+        {"type": "Tourist Helpline", "number": "1363"}
+    ]
+}
+
 async def generate_component_with_fallback(component_func, request, fallback_data, component_name):
     """
     Generate component data with fallback in case of failure.
@@ -119,6 +167,20 @@ async def generate_metadata(request: ItineraryRequest) -> Dict:
         }
     }
 
+async def get_essential_info(request: ItineraryRequest, destination_info: Dict, refresh: bool = False) -> Dict:
+    """Essential info for the city pair, from its destination pack or stale-while-revalidate from the knowledge cache"""
+    packed = pack_essential_info(request.location.destination, request.location.baseCity)
+    if packed is not None:
+        return packed
+    return await get_or_generate(
+        city_pair_key("essential_info", request),
+        lambda: generate_essential_info(request, destination_info),
+        ESSENTIAL_INFO_TTL,
+        ESSENTIAL_INFO_SOFT_TTL,
+        cacheable=lambda info: isinstance(info, dict) and bool(info.get("emergency_contacts")) and info != ESSENTIAL_INFO_FALLBACK,
+        refresh=refresh
+    )
+
 async def generate_essential_info(request: ItineraryRequest, destination_info: Dict) -> Dict:
     """Generate essential info section"""
     prompt = f"""
@@ -150,18 +212,21 @@ async def generate_essential_info(request: ItineraryRequest, destination_info: D
         return essential_info
     except Exception:
         # Fallback info
-        return {
-            "documents": [
-                "Photo ID",
-                "Hotel booking confirmation",
-                "Travel insurance"
-            ],
-            "emergency_contacts": [
-                {"type": "Police", "number": "100"},
-                {"type": "Ambulance", "number": "102"},
-                {"type": "Tourist Helpline", "number": "1363"}
-            ]
-        }
+        return copy.deepcopy(ESSENTIAL_INFO_FALLBACK)
+
+def get_day_weather(weather: Dict, date_str: str) -> Dict:
+    """Summary of one day's forecast shown on the day itinerary"""
+    for forecast in weather.get("forecast", []):
+        if forecast.get("date") == date_str:
+            return {
+                "temperature": {
+                    "min": forecast["temperature"]["min"],
+                    "max": forecast["temperature"]["max"]
+                },
+                "conditions": forecast["conditions"],
+                "advisory": forecast["advisory"]
+            }
+    return {"temperature": {"min": 15, "max": 25}, "conditions": "No data available", "advisory": "Check local conditions"}
 
 async def generate_day_with_assigned_venues(day_number, date_str, request, weather, assigned_venues):
     """
@@ -174,18 +239,7 @@ async def generate_day_with_assigned_venues(day_number, date_str, request, weath
     activities = assigned_venues["activities"]
     
     # Get weather data for this specific day
-    day_weather = {"temperature": {"min": 15, "max": 25}, "conditions": "No data available", "advisory": "Check local conditions"}
-    for forecast in weather.get("forecast", []):
-        if forecast.get("date") == date_str:
-            day_weather = {
-                "temperature": {
-                    "min": forecast["temperature"]["min"],
-                    "max": forecast["temperature"]["max"]
-                },
-                "conditions": forecast["conditions"],
-                "advisory": forecast["advisory"]
-            }
-            break
+    day_weather = get_day_weather(weather, date_str)
     
     # EXTREMELY SIMPLIFIED PROMPT - focus only on generating basic time blocks
     prompt = f"""
@@ -314,6 +368,7 @@ async def generate_day_with_assigned_venues(day_number, date_str, request, weath
                             "range": price_range
                         },
                         "images": venue_data.get("images", []),
+                        "image_id": venue_data.get("image_id"),
                         "link": venue_data.get("link") or venue_data.get("reservation_link"),
                         "priority": 2,
                         "highlights": ["Local cuisine", "Authentic flavors", "Dining experience"]
@@ -340,6 +395,7 @@ async def generate_day_with_assigned_venues(day_number, date_str, request, weath
                         "duration": time_block["duration_minutes"],
                         "cost": cost,
                         "images": venue_data.get("images", []),
+                        "image_id": venue_data.get("image_id"),
                         "link": venue_data.get("link") or venue_data.get("booking_link"),
                         "priority": venue_data.get("priority", 2),
                         "highlights": venue_data.get("highlights") or ["Cultural experience", "Local attraction", "Must-see destination"]
@@ -486,6 +542,7 @@ def create_fallback_day(day_number, date_str, restaurants, activities, weather,
                     "range": price_range
                 },
                 "images": breakfast.get("images", []),
+                "image_id": breakfast.get("image_id"),
                 "link": breakfast.get("link") or breakfast.get("reservation_link"),
                 "priority": 2,
                 "highlights": ["Morning meal", "Local cuisine", "Energizing start"]
@@ -539,6 +596,7 @@ def create_fallback_day(day_number, date_str, restaurants, activities, weather,
                 "duration": morning_activity.get("duration", 150),
                 "cost": cost,
                 "images": morning_activity.get("images", []),
+                "image_id": morning_activity.get("image_id"),
                 "link": morning_activity.get("link") or morning_activity.get("booking_link"),
                 "priority": morning_activity.get("priority", 2),
                 "highlights": morning_activity.get("highlights") or ["Local attraction", "Cultural experience", "Must-see spot"]
@@ -591,6 +649,7 @@ def create_fallback_day(day_number, date_str, restaurants, activities, weather,
                     "range": price_range
                 },
                 "images": lunch.get("images", []),
+                "image_id": lunch.get("image_id"),
                 "link": lunch.get("link") or lunch.get("reservation_link"),
                 "priority": 2,
                 "highlights": ["Midday meal", "Local flavors", "Dining experience"]
@@ -644,6 +703,7 @@ def create_fallback_day(day_number, date_str, restaurants, activities, weather,
                 "duration": afternoon_activity.get("duration", 120),
                 "cost": cost,
                 "images": afternoon_activity.get("images", []),
+                "image_id": afternoon_activity.get("image_id"),
                 "link": afternoon_activity.get("link") or afternoon_activity.get("booking_link"),
                 "priority": afternoon_activity.get("priority", 2),
                 "highlights": afternoon_activity.get("highlights") or ["Popular destination", "Memorable experience", "Local culture"]
@@ -698,6 +758,7 @@ def create_fallback_day(day_number, date_str, restaurants, activities, weather,
                     "range": price_range
                 },
                 "images": dinner.get("images", []),
+                "image_id": dinner.get("image_id"),
                 "link": dinner.get("link") or dinner.get("reservation_link"),
                 "priority": 2,
                 "highlights": ["Evening dining", "Local cuisine", "Relaxing atmosphere"]
@@ -719,9 +780,292 @@ def create_fallback_day(day_number, date_str, restaurants, activities, weather,
     }
 
 
-async def generate_complete_itinerary(request: ItineraryRequest) -> Dict[str, Any]:
+def fill_day_gaps(day_venue_assignments: Dict[int, Dict[str, List[Dict]]], request_index: VenueIndex,
+                  destination_index: VenueIndex, activities_per_day: int, restaurants_per_day: int) -> int:
+    """
+    Top up days that received fewer venues than planned with venues near the day's
+    other stops, first from this trip's unused venues, then from venues earlier trips
+    to the same destination produced. No extra LLM call is needed.
+    
+    Args:
+        day_venue_assignments: Day number -> {"restaurants": [...], "activities": [...]} (updated in place)
+        request_index: Spatial index over this request's venues
+        destination_index: Spatial index over venues seen for the destination
+        activities_per_day: Target number of activities per day
+        restaurants_per_day: Target number of restaurants per day
+        
+    Returns:
+        Number of venues added
+    """
+    used_names = {
+        venue_name(venue)
+        for assigned in day_venue_assignments.values()
+        for venues in assigned.values()
+        for venue in venues
+    }
+    # Fillers come from other generations, so the same place may be indexed under another
+    # name; those are recognized as duplicates of the trip's activities and skipped
+    assigned_activities = [
+        activity
+        for assigned in day_venue_assignments.values()
+        for activity in assigned["activities"]
+    ]
+    fallback_center = request_index.centroid() or destination_index.centroid()
+    if fallback_center is None:
+        return 0
+    
+    added = 0
+    for assigned in day_venue_assignments.values():
+        points = [
+            venue_coordinates(venue)
+            for venues in assigned.values()
+            for venue in venues
+            if venue_coordinates(venue)
+        ]
+        center = (
+            (sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points))
+            if points else fallback_center
+        )
+        
+        for key, kind, target in (("activities", "activity", activities_per_day), ("restaurants", "restaurant", restaurants_per_day)):
+            missing = target - len(assigned[key])
+            if missing <= 0:
+                continue
+            
+            for index in (request_index, destination_index):
+                # Look a little further than needed so skipped duplicates can be replaced
+                candidates = index.nearest(center[0], center[1], missing * 2, kind=kind, exclude=used_names)
+                for _, venue in candidates:
+                    if missing <= 0:
+                        break
+                    if kind == "activity":
+                        if is_duplicate_activity(venue, assigned_activities):
+                            continue
+                        assigned_activities.append(venue)
+                    # Copy so days (and later trips) never share a mutable venue
+                    assigned[key].append(copy.deepcopy(venue))
+                    used_names.add(venue_name(venue))
+                    missing -= 1
+                    added += 1
+                if missing <= 0:
+                    break
+    
+    if added:
+        logger.info(f"Filled {added} venue gaps from nearby venues")
+    return added
+
+def estimate_day_travel(day_itineraries: List[Dict[str, Any]], elevation_m: float = 0.0) -> int:
+    """
+    Set each time block's travel duration from the distance to the previous stop of the day.
+    
+    Distances between all stops of the trip come from one vectorized haversine matrix and
+    are turned into minutes for each block's travel mode. Blocks without coordinates, and
+    blocks following the outbound or return transport, keep their durations. Blocks whose
+    travel no longer fits the gap before them are moved later (see fit_blocks_to_travel).
+    
+    Args:
+        day_itineraries: Day itineraries with time blocks (updated in place)
+        elevation_m: Elevation of the destination in meters, for the terrain factor
+        
+    Returns:
+        Number of travel durations set
+    """
+    points = []
+    point_indexes = {}
+    legs = []
+    for day in day_itineraries:
+        previous = None
+        for block in day.get("time_blocks", []):
+            activity = block.get("activity") or {}
+            if activity.get("type") == "transport":
+                previous = None
+                continue
+            coordinates = venue_coordinates(activity)
+            travel = block.get("travel")
+            if coordinates and previous and isinstance(travel, dict):
+                for point in (previous, coordinates):
+                    if point not in point_indexes:
+                        point_indexes[point] = len(points)
+                        points.append(point)
+                legs.append((travel, point_indexes[previous], point_indexes[coordinates]))
+            previous = coordinates
+    
+    if not legs:
+        return 0
+    
+    distances = haversine_matrix([p[0] for p in points], [p[1] for p in points])
+    origins, targets = zip(*((start, end) for _, start, end in legs))
+    minutes = travel_minutes(
+        distances[list(origins), list(targets)],
+        [travel.get("mode") for travel, _, _ in legs],
+        elevation_m
+    )
+    for (travel, _, _), value in zip(legs, minutes):
+        travel["duration_minutes"] = max(MIN_TRAVEL_MINUTES, int(round(value)))
+    
+    shifted = sum(fit_blocks_to_travel(day) for day in day_itineraries)
+    if shifted:
+        logger.info(f"Moved {shifted} time blocks later to fit the estimated travel")
+    return len(legs)
+
+def _clock_minutes(clock: str) -> int:
+    hours, minutes = clock[:5].split(":")
+    return int(hours) * 60 + int(minutes)
+
+def _clock(minutes: int) -> str:
+    return f"{(minutes // 60) % 24:02d}:{minutes % 60:02d}"
+
+def fit_blocks_to_travel(day: Dict[str, Any]) -> int:
+    """
+    Move a day's blocks later where the travel to them doesn't fit in the gap before them.
+    
+    Each block keeps its length and starts no earlier than its planned time; later blocks
+    are pushed along only as far as their own gaps can't absorb. Transport blocks keep
+    their times.
+    
+    Args:
+        day: Day itinerary with time blocks (updated in place)
+        
+    Returns:
+        Number of blocks moved
+    """
+    moved = 0
+    previous_end = None
+    for block in day.get("time_blocks", []):
+        activity = block.get("activity") or {}
+        try:
+            start = _clock_minutes(block["start_time"])
+            end = _clock_minutes(block["end_time"])
+        except (KeyError, ValueError, AttributeError):
+            previous_end = None
+            continue
+        if activity.get("type") == "transport":
+            previous_end = None
+            continue
+        
+        if end < start:
+            end += 24 * 60
+        travel = block.get("travel")
+        travel_time = (travel.get("duration_minutes") or 0) if isinstance(travel, dict) else 0
+        earliest = previous_end + travel_time if previous_end is not None else start
+        if earliest > start:
+            block["start_time"] = _clock(earliest)
+            block["end_time"] = _clock(earliest + end - start)
+            end += earliest - start
+            moved += 1
+        previous_end = end
+    return moved
+
+def _part_of_day(clock: str) -> int:
+    hour = _clock_minutes(clock) // 60
+    return sum(hour >= boundary for boundary in PART_OF_DAY_HOURS)
+
+def allowed_slots(blocks: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Which of a day's slots each activity may move to.
+    
+    An activity fits a slot at least as long as its planned duration, and an activity
+    tied to a time of day (see TIME_OF_DAY_PATTERN) only fits slots starting in the same
+    part of the day as its planned one.
+    
+    Args:
+        blocks: The day's time blocks
+        
+    Returns:
+        Square boolean matrix; [k, s] is True if the activity of block s fits the slot of block k
+    """
+    count = len(blocks)
+    allowed = np.eye(count, dtype=bool)
+    slots = []
+    for block in blocks:
+        try:
+            start = _clock_minutes(block["start_time"])
+            length = block.get("duration_minutes") or (_clock_minutes(block["end_time"]) - start) % (24 * 60)
+            slots.append((length, _part_of_day(block["start_time"])))
+        except (KeyError, ValueError, AttributeError):
+            slots.append(None)
+    
+    for source, block in enumerate(blocks):
+        if slots[source] is None:
+            continue
+        activity = block.get("activity") or {}
+        duration = activity.get("duration")
+        needed = duration if isinstance(duration, (int, float)) else slots[source][0]
+        text = f"{activity.get('title', '')} {activity.get('description', '')}"
+        part = slots[source][1] if TIME_OF_DAY_PATTERN.search(text) else None
+        for target, slot in enumerate(slots):
+            if slot is not None and slot[0] >= needed and (part is None or slot[1] == part):
+                allowed[target, source] = True
+    return allowed
+
+async def optimize_day_routes(day_itineraries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Reorder each day's activities to minimize travel between stops.
+    
+    Meals and transport keep their time slots; activities with coordinates may move between
+    the activity slots of their day that fit them (see allowed_slots), taking their duration
+    and travel details along. Distances between all stops of the trip come from one haversine
+    matrix, and the days are ordered concurrently.
+    
+    Args:
+        day_itineraries: Day itineraries with time blocks (updated in place)
+        
+    Returns:
+        Route summary with the total distance_km and km_saved, and the same per day
+    """
+    points = []
+    point_indexes = {}
+    day_stops = []
+    for day in day_itineraries:
+        stops = []
+        movable = []
+        for block in day.get("time_blocks", []):
+            activity = block.get("activity") or {}
+            coordinates = venue_coordinates(activity) if activity.get("type") != "transport" else None
+            if coordinates and coordinates not in point_indexes:
+                point_indexes[coordinates] = len(points)
+                points.append(coordinates)
+            stops.append(point_indexes[coordinates] if coordinates else None)
+            movable.append(bool(coordinates) and activity.get("type") != "dining")
+        day_stops.append((stops, movable, allowed_slots(day.get("time_blocks", []))))
+    
+    distances = haversine_matrix([p[0] for p in points], [p[1] for p in points])
+    
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*[
+        loop.run_in_executor(_THREAD_POOL, order_stops, distances, stops, movable, allowed)
+        for stops, movable, allowed in day_stops
+    ])
+    
+    summary = {"distance_km": 0.0, "km_saved": 0.0, "days": []}
+    for day, (order, original_length, optimized_length) in zip(day_itineraries, results):
+        blocks = day.get("time_blocks", [])
+        # Venues move between slots; the slots keep their times
+        venues = [(block.get("activity"), block.get("travel")) for block in blocks]
+        for slot, (block, position) in enumerate(zip(blocks, order)):
+            if position == slot:
+                continue
+            block["activity"], block["travel"] = venues[position]
+        
+        summary["days"].append({
+            "day_number": day.get("day_number"),
+            "distance_km": round(optimized_length, 1),
+            "km_saved": round(original_length - optimized_length, 1)
+        })
+        summary["distance_km"] += optimized_length
+        summary["km_saved"] += original_length - optimized_length
+    
+    summary["distance_km"] = round(summary["distance_km"], 1)
+    summary["km_saved"] = round(summary["km_saved"], 1)
+    logger.info(f"Route ordering saved {summary['km_saved']} km over {len(day_itineraries)} days")
+    return summary
+
+async def generate_complete_itinerary(request: ItineraryRequest, defer_images: bool = False) -> Dict[str, Any]:
     """
     Generate a complete trip itinerary using pre-allocation approach for speed without redundancy.
+    
+    With defer_images, activity and restaurant images are left out of the critical path:
+    they carry a stable image_id and resolve in the background, served by the image endpoints.
     """
     logger.info(f"Starting itinerary generation for {request.location.destination}")
     
@@ -777,24 +1121,80 @@ async def generate_complete_itinerary(request: ItineraryRequest) -> Dict[str, An
     metadata_task = asyncio.create_task(generate_metadata(request))
     
     # STEP 1: Start ALL component calls in parallel
+    meta_task = asyncio.create_task(
+        generate_component_with_fallback(get_meta_info, request, meta_fallback, "meta information")
+    )
+    
+    # When the cached meta information already shows the trip stays at the destination,
+    # its forecast is fetched alongside the meta information instead of after it. Otherwise
+    # the forecast waits for the key coordinates, so circuit routes never fetch a
+    # destination forecast only to discard it
+    cached_meta = get_knowledge(city_pair_key("meta", request))
+    destination_weather_task = None
+    if cached_meta is not None and not is_circuit_route(request, cached_meta.get("key_coordinates")):
+        destination_weather_task = asyncio.create_task(
+            generate_component_with_fallback(get_weather_forecast, request, weather_fallback, "destination weather forecast")
+        )
+    
+    async def get_route_weather_forecast(request):
+        if destination_weather_task is not None:
+            return await destination_weather_task
+        meta = await meta_task
+        return await get_weather_forecast(request, meta.get("key_coordinates"))
+    
     tasks = [
-        generate_component_with_fallback(get_meta_info, request, meta_fallback, "meta information"),
+        meta_task,
         generate_component_with_fallback(get_transport_options, request, transport_fallback, "transport options"),
-        generate_component_with_fallback(get_activities, request, activities_fallback, "activities"),
-        generate_component_with_fallback(get_accommodations_and_dining, request, accommodations_fallback, "accommodations and dining"),
-        generate_component_with_fallback(get_weather_forecast, request, weather_fallback, "weather forecast")
+        generate_component_with_fallback(
+            functools.partial(get_activities, include_images=not defer_images),
+            request, activities_fallback, "activities"
+        ),
+        generate_component_with_fallback(
+            functools.partial(get_accommodations_and_dining, include_images=not defer_images),
+            request, accommodations_fallback, "accommodations and dining"
+        ),
+        generate_component_with_fallback(get_route_weather_forecast, request, weather_fallback, "weather forecast")
     ]
     
+    # Coordinates for the outbound and return journeys, shared by both transport blocks
+    base_coords_task = asyncio.create_task(get_coordinates_from_gemini(request.location.baseCity))
+    destination_coords_task = asyncio.create_task(get_coordinates_from_gemini(request.location.destination))
+    
     # Wait for all component tasks to complete concurrently 
     meta_info, transport_options, activities, accommodations_and_dining, weather = await asyncio.gather(*tasks)
     logger.info(f"All component data collected for {request.location.destination}")
     
+    # Venues are shared with later trips to the destination as generated, before this
+    # request's currency, price formats and image placeholders are applied to them
+    shared_index = build_request_index(*copy.deepcopy((
+        [activity for items in activities.values() if isinstance(items, list) for activity in items if "title" in activity],
+        [dining for dining in accommodations_and_dining.get("dining", []) if "name" in dining],
+        accommodations_and_dining.get("accommodations", [])
+    )))
+    
+    # Estimate the journey locally and correct underestimated transport durations
+    base_coords, destination_coords = await asyncio.gather(base_coords_task, destination_coords_task)
+    journey = estimate_trip_journey(
+        meta_info, request.location.baseCity, request.location.destination, base_coords, destination_coords
+    )
+    apply_travel_estimates(transport_options, journey)
+    is_mountain = bool(journey and journey["mountain"])
+    is_long_haul = bool(journey and journey["long_haul"])
+    
+    if defer_images:
+        # Hand image lookups to the image service so they resolve after the response is sent
+        defer_activity_images(
+            {category: items for category, items in activities.items() if isinstance(items, list)},
+            request.location.destination
+        )
+        defer_dining_images(accommodations_and_dining.get("dining", []))
+    
     # Get metadata (should be done by now)
     metadata = await metadata_task
     logger.info("Generated metadata")
     
     # Start essential info generation in parallel
-    essential_info_task = asyncio.create_task(generate_essential_info(request, meta_info))
+    essential_info_task = asyncio.create_task(get_essential_info(request, meta_info))
     
     # STEP 2: PRE-ALLOCATION - Distribute venues across days to avoid redundancy
     
@@ -885,6 +1285,16 @@ async def generate_complete_itinerary(request: ItineraryRequest) -> Dict[str, An
             "activities": [a["data"] for a in available_activities if a["assigned_day"] == day_number]
         }
     
+    # Spatial index over this trip's venues, remembered per destination for later trips
+    request_index = build_request_index(
+        [a["data"] for a in available_activities],
+        [r["data"] for r in available_restaurants],
+        accommodations_and_dining.get("accommodations", [])
+    )
+    destination_index = get_destination_index(request.location.destination)
+    fill_day_gaps(day_venue_assignments, request_index, destination_index, activities_per_day, restaurants_per_day)
+    remember_destination_venues(request.location.destination, shared_index)
+    
     # Generate all days concurrently using the pre-allocated venues
     day_itineraries = []
     for i, date_str in enumerate(date_range):
@@ -897,9 +1307,6 @@ async def generate_complete_itinerary(request: ItineraryRequest) -> Dict[str, An
         # Add initial transport to first day
         # Replace the if condition with this
         if day_number == 1:
-            src_coords_task = asyncio.create_task(get_coordinates_from_gemini(request.location.baseCity))
-            dst_coords_task = asyncio.create_task(get_coordinates_from_gemini(request.location.destination))
-
             # Get main transport if available, otherwise create a placeholder
             main_transport = {}
             if isinstance(transport_options.get("main_transport"), list) and transport_options.get("main_transport"):
@@ -907,27 +1314,12 @@ async def generate_complete_itinerary(request: ItineraryRequest) -> Dict[str, An
             
             logger.info("Adding initial transport to day 1")
             
-            # Determine realistic duration based on location context
-            duration_mins = main_transport.get("duration", 120)  # Default 2 hours if not specified
-            
-            # Make duration more realistic based on destination type
-            destination_lower = request.location.destination.lower()
-            base_city_lower = request.location.baseCity.lower()
-            
-            # Check for mountain/remote locations
-            is_mountain = any(term in destination_lower for term in ["mountain", "himalayas", "alps", "spiti", "ladakh", "kaza", "manali", "shimla", "uttarakhand", "kashmir"])
-            is_remote = any(term in destination_lower for term in ["remote", "village", "island", "jungle", "forest", "national park"])
-            
-            # If no explicit duration and mountain/remote location, set realistic duration
-            if not main_transport.get("duration") and (is_mountain or is_remote):
-                if is_mountain:
-                    duration_mins = 480  # 8 hours for mountain travel
-                elif is_remote:
-                    duration_mins = 300  # 5 hours for remote locations
-            
             # Format travel mode and times properly
             travel_mode = main_transport.get("mode", "transport").lower()
             
+            # Use the transport duration, else the local estimate for the mode (2 hours if unknown)
+            duration_mins = main_transport.get("duration") or journey_minutes(journey, travel_mode) or 120
+            
             # Default start time (early morning)
             departure_time = main_transport.get("departure_time", "06:00")
             if not isinstance(departure_time, str) or len(departure_time) < 5:
@@ -984,8 +1376,8 @@ async def generate_complete_itinerary(request: ItineraryRequest) -> Dict[str, An
                 description = f"{mode_display} journey from {request.location.baseCity} to {request.location.destination}"
                 if is_mountain:
                     description += ". This scenic mountain route offers beautiful views but takes longer due to winding roads and elevation changes."
-                elif is_remote:
-                    description += ". This journey to a remote location may involve multiple stops or transfers."
+                elif is_long_haul:
+                    description += ". This long journey may involve multiple stops or transfers."
             
             # Create warning message based on mode
             warning_message = "Allow extra time for check-in and security procedures."
@@ -1005,9 +1397,6 @@ async def generate_complete_itinerary(request: ItineraryRequest) -> Dict[str, An
             elif "train" in travel_mode:
                 highlights.append("Comfortable rail journey")
             
-            src_coords = await src_coords_task
-            dst_coords = await dst_coords_task
-            
             # Create the time block with realistic values
             transport_time_block = {
                 "type": "fixed",
@@ -1020,7 +1409,7 @@ async def generate_complete_itinerary(request: ItineraryRequest) -> Dict[str, An
                     "description": description,
                     "location": {
                         "name": f"From {request.location.baseCity}",
-                        "coordinates": src_coords,
+                        "coordinates": base_coords,
                         "google_maps_link": f"https://www.google.com/maps/dir/{urllib.parse.quote(request.location.baseCity)}/{urllib.parse.quote(request.location.destination)}"
                     },
                     "duration": duration_mins,
@@ -1061,10 +1450,6 @@ async def generate_complete_itinerary(request: ItineraryRequest) -> Dict[str, An
     if day_itineraries:  # Make sure we have at least one day
         last_day = day_itineraries[-1]
         
-        # Get coordinates for both locations
-        src_coords_task = asyncio.create_task(get_coordinates_from_gemini(request.location.destination))
-        dst_coords_task = asyncio.create_task(get_coordinates_from_gemini(request.location.baseCity))
-        
         # Get main transport if available, otherwise create a placeholder
         main_transport = {}
         if isinstance(transport_options.get("main_transport"), list) and transport_options.get("main_transport"):
@@ -1072,27 +1457,12 @@ async def generate_complete_itinerary(request: ItineraryRequest) -> Dict[str, An
         
         logger.info("Adding return transport to the last day")
         
-        # Determine realistic duration based on location context
-        duration_mins = main_transport.get("duration", 120)  # Default 2 hours if not specified
-        
-        # Make duration more realistic based on destination type
-        destination_lower = request.location.destination.lower()
-        base_city_lower = request.location.baseCity.lower()
-        
-        # Check for mountain/remote locations
-        is_mountain = any(term in destination_lower for term in ["mountain", "himalayas", "alps", "spiti", "ladakh", "kaza", "manali", "shimla", "uttarakhand", "kashmir"])
-        is_remote = any(term in destination_lower for term in ["remote", "village", "island", "jungle", "forest", "national park"])
-        
-        # If no explicit duration and mountain/remote location, set realistic duration
-        if not main_transport.get("duration") and (is_mountain or is_remote):
-            if is_mountain:
-                duration_mins = 480  # 8 hours for mountain travel
-            elif is_remote:
-                duration_mins = 300  # 5 hours for remote locations
-        
         # Format travel mode and times properly
         travel_mode = main_transport.get("mode", "transport").lower()
         
+        # Use the transport duration, else the local estimate for the mode (2 hours if unknown)
+        duration_mins = main_transport.get("duration") or journey_minutes(journey, travel_mode) or 120
+        
         # Calculate an appropriate departure time that ensures arrival at a reasonable hour
         # Maximum acceptable arrival time (e.g., 21:00 or 9 PM)
         max_arrival_time_hours = 21
@@ -1150,8 +1520,8 @@ async def generate_complete_itinerary(request: ItineraryRequest) -> Dict[str, An
         description = f"Return {mode_display.lower()} from {request.location.destination} to {request.location.baseCity}"
         if is_mountain:
             description += ". This return journey through mountain terrain takes you back to your starting point."
-        elif is_remote:
-            description += ". The return journey from this remote location may involve multiple connections."
+        elif is_long_haul:
+            description += ". This long return journey may involve multiple connections."
         
         # Create warning message based on mode
         warning_message = "Allow sufficient time for check-in procedures and travel to the departure point."
@@ -1171,9 +1541,6 @@ async def generate_complete_itinerary(request: ItineraryRequest) -> Dict[str, An
         elif "train" in travel_mode:
             highlights.append("Relaxing rail journey home")
         
-        src_coords = await src_coords_task
-        dst_coords = await dst_coords_task
-        
         # Check if we already have activities on the last day
         existing_activities = [block for block in last_day["time_blocks"] if block["activity"]["type"] not in ["transport"]]
         
@@ -1213,7 +1580,7 @@ async def generate_complete_itinerary(request: ItineraryRequest) -> Dict[str, An
                 "description": description,
                 "location": {
                     "name": f"From {request.location.destination}",
-                    "coordinates": src_coords,
+                    "coordinates": destination_coords,
                     "google_maps_link": f"https://www.google.com/maps/dir/{urllib.parse.quote(request.location.destination)}/{urllib.parse.quote(request.location.baseCity)}"
                 },
                 "duration": duration_mins,
@@ -1241,6 +1608,25 @@ async def generate_complete_itinerary(request: ItineraryRequest) -> Dict[str, An
         last_day["time_blocks"].append(return_transport_block)
         logger.info(f"Added return transport to the last day (departure: {departure_time}, arrival: {arrival_time})")
     
+    # Order each day's activities to cut travel between stops, all days at once
+    route_summary = await optimize_day_routes(day_itineraries)
+    
+    # Travel times between consecutive stops, from one distance matrix over the whole trip
+    destination_elevation = journey["destination_elevation_m"] if journey else 0.0
+    estimate_day_travel(day_itineraries, destination_elevation)
+    
+    # Pick the hotel(s) closest to each day's stops and attach the daily transfers
+    accommodation_plan = plan_hotel_stays(
+        day_itineraries, accommodations_and_dining.get("accommodations", []), destination_elevation
+    )
+    
+    # Attach hourly conditions to every time block from the cached hourly forecast;
+    # they are optional, so a bad hourly series never fails the itinerary
+    try:
+        await attach_hourly_weather(day_itineraries, weather)
+    except Exception as e:
+        logger.warning(f"Could not attach hourly weather: {str(e)}")
+    
     # Get essential info (should be done by now)
     essential_info = await essential_info_task
     logger.info("Generated essential information")
@@ -1312,8 +1698,15 @@ async def generate_complete_itinerary(request: ItineraryRequest) -> Dict[str, An
         }]
     
     # Fix accommodations data
+    # List hotels in the order of the accommodation plan's ranking
+    hotel_rank = {
+        hotel["name"]: rank for rank, hotel in enumerate((accommodation_plan or {}).get("ranking", []))
+    }
     accommodations = []
-    for accommodation in accommodations_and_dining.get("accommodations", []):
+    for accommodation in sorted(
+        accommodations_and_dining.get("accommodations", []),
+        key=lambda hotel: hotel_rank.get(hotel.get("name"), len(hotel_rank))
+    ):
         # Fix price_range format
         if "price_range" in accommodation:
             price_range = accommodation["price_range"]
@@ -1393,14 +1786,83 @@ async def generate_complete_itinerary(request: ItineraryRequest) -> Dict[str, An
             "transportation": transportation_options
         },
         "essential_info": essential_info,
-        "journey_path": meta_info.get("journey_path", {})
+        "journey_path": meta_info.get("journey_path", {}),
+        "route_summary": route_summary,
+        "accommodation_plan": accommodation_plan
     }
     
     logger.info(f"Successfully generated complete itinerary with {len(day_itineraries)} days")
     return complete_itinerary
 
-async def get_coordinates_from_gemini(location_name: str) -> dict:
-    """Get coordinates for a location using Gemini."""
+async def _same_place(place: str, other: str) -> bool:
+    """Whether two place names are the same place, or at most SIMILAR_MAX_DISTANCE_KM apart"""
+    if normalize_cache_text(place) == normalize_cache_text(other):
+        return True
+    first, second = await asyncio.gather(get_coordinates_from_gemini(place), get_coordinates_from_gemini(other))
+    if COORDINATES_FALLBACK in (first, second):
+        return False
+    return haversine_distance(first["lat"], first["lng"], second["lat"], second["lng"]) <= SIMILAR_MAX_DISTANCE_KM
+
+async def refit_itinerary(itinerary: Dict[str, Any], source: Dict[str, Any],
+                          request: ItineraryRequest) -> Optional[Dict[str, Any]]:
+    """
+    Adapt an itinerary generated for a near-duplicate request to this request.
+    
+    Venues, routes, hotels, transport and essential info are reused as they are; the
+    days move to the new dates with a fresh forecast, and the metadata (party, budget,
+    preferences) is rebuilt for the new request.
+    
+    Args:
+        itinerary: Cached itinerary (updated in place)
+        source: Canonical form of the request it was generated for
+        request: The itinerary request object
+        
+    Returns:
+        The re-fitted itinerary, or None when the trips are not in the same places
+    """
+    if not (await _same_place(source["destination"], request.location.destination)
+            and await _same_place(source["base_city"], request.location.baseCity)):
+        return None
+    
+    days = itinerary.get("itinerary", [])
+    date_range = calculate_date_range(request.dates.startDate, request.dates.endDate)
+    if len(days) != len(date_range):
+        return None
+    
+    try:
+        weather = await get_weather_forecast(request)
+    except Exception as e:
+        logger.warning(f"Could not refresh the forecast for a re-fitted itinerary: {str(e)}")
+        weather = {}
+    
+    for day, date_str in zip(days, date_range):
+        old_weather = day.get("weather") or {}
+        day["date"] = date_str
+        day["weather"] = get_day_weather(weather, date_str)
+        for block in day.get("time_blocks", []):
+            # Hourly conditions are attached again below for the new dates
+            block.pop("weather", None)
+            for warning in block.get("warnings", []):
+                if warning.get("type") == "weather":
+                    warning["message"] = f"{day['weather']['conditions']} may affect your experience"
+                elif old_weather.get("advisory") and warning.get("message") == old_weather["advisory"]:
+                    warning["message"] = day["weather"]["advisory"]
+    await attach_hourly_weather(days, weather)
+    
+    itinerary["metadata"] = await generate_metadata(request)
+    return itinerary
+
+async def get_coordinates_from_gemini(location_name: str, refresh: bool = False) -> dict:
+    """Get coordinates for a location using Gemini, cached per place (refresh bypasses the cache)."""
+    packed = pack_coordinates(location_name)
+    if packed is not None:
+        return {"lat": packed[0], "lng": packed[1]}
+    
+    cache_key = place_key("coordinates", location_name)
+    cached = None if refresh else get_knowledge(cache_key)
+    if cached is not None:
+        return cached
+    
     prompt = f"""
     Provide the latitude and longitude coordinates for {location_name}.
     Return only a JSON object with this exact format:
@@ -1422,11 +1884,12 @@ async def get_coordinates_from_gemini(location_name: str) -> dict:
             "lng" in coordinates and
             isinstance(coordinates["lat"], (int, float)) and
             isinstance(coordinates["lng"], (int, float))):
+            cache_knowledge(cache_key, coordinates, CITY_PAIR_META_TTL)
             return coordinates
         else:
             # Fallback to center of India if invalid response
             logger.warning(f"Invalid coordinates response for {location_name}: {coordinates}")
-            return {'lat': 20.5937, 'lng': 78.9629}
+            return dict(COORDINATES_FALLBACK)
     except Exception as e:
         logger.error(f"Error getting coordinates for {location_name}: {str(e)}")
-        return {'lat': 20.5937, 'lng': 78.9629}
\ No newline at end of file
+        return dict(COORDINATES_FALLBACK)
\ No newline at end of file
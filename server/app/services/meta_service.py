@@ -4,21 +4,30 @@ import json
 
 from app.models.request import ItineraryRequest
 from app.services.gemini_service import get_gemini_structured_response
+from app.utils.knowledge_cache import CITY_PAIR_META_TTL, cache_knowledge, city_pair_key, get_knowledge
 
 logger = logging.getLogger(__name__)
 
-async def get_meta_info(request: ItineraryRequest) -> Dict[str, Any]:
+async def get_meta_info(request: ItineraryRequest, refresh: bool = False) -> Dict[str, Any]:
     """
     Generate metadata information for the trip, including altitudes, distances, etc.
     
     Args:
         request: The itinerary request object
+        refresh: Regenerate the metadata even if it is cached
         
     Returns:
         Dictionary containing metadata for the trip
     """
     logger.info(f"Generating meta information for {request.location.destination}")
     
+    # Journey geography only depends on the city pair (and season), so it is shared across trips
+    cache_key = city_pair_key("meta", request)
+    cached = None if refresh else get_knowledge(cache_key)
+    if cached is not None:
+        logger.info(f"Using cached meta information for {request.location.baseCity} to {request.location.destination}")
+        return cached
+    
     # Create a prompt for Gemini to generate meta information
     prompt = f"""
     Generate detailed meta information for a trip from {request.location.baseCity} to {request.location.destination}.
@@ -71,6 +80,8 @@ async def get_meta_info(request: ItineraryRequest) -> Dict[str, Any]:
     try:
         meta_info = await get_gemini_structured_response(prompt, system_instruction)
         logger.info(f"Generated meta information for {request.location.destination}")
+        if isinstance(meta_info, dict) and meta_info.get("key_coordinates"):
+            cache_knowledge(cache_key, meta_info, CITY_PAIR_META_TTL)
         return meta_info
     except Exception as e:
         logger.error(f"Error generating meta information: {str(e)}")
@@ -0,0 +1,98 @@
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.destination_pack import MANIFEST_FILE, DestinationPack
+from app.utils.image_cache import normalize_cache_text
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Directory of prebuilt destination packs (see python -m pack_builder)
+DESTINATION_PACKS_PATH = os.environ.get("DESTINATION_PACKS_PATH", "destination_packs")
+
+# Packs by normalized destination name and alias; None until the directory is scanned
+_packs: Optional[Dict[str, DestinationPack]] = None
+# Pack holding the coordinates of each packed place (destinations and base cities), by normalized name
+_place_packs: Dict[str, DestinationPack] = {}
+
+def load_pack_index() -> int:
+    """
+    Scan DESTINATION_PACKS_PATH for packs. Only manifests are read; pack data is
+    memory-mapped on first use.
+
+    Returns:
+        Number of packs found
+    """
+    global _packs, _place_packs
+    packs = {}
+    place_packs = {}
+    root = Path(DESTINATION_PACKS_PATH)
+    for manifest in sorted(root.glob(f"*/{MANIFEST_FILE}")) if root.is_dir() else []:
+        try:
+            pack = DestinationPack(str(manifest.parent))
+        except Exception as e:
+            logger.warning(f"Skipping destination pack {manifest.parent}: {str(e)}")
+            continue
+        for name in pack.names:
+            packs[name] = pack
+        for place in pack.places:
+            place_packs.setdefault(place, pack)
+    _packs = packs
+    _place_packs = place_packs
+    count = len({id(pack) for pack in packs.values()})
+    if count:
+        logger.info(f"Found {count} destination packs in {DESTINATION_PACKS_PATH}")
+    return count
+
+def get_pack(destination: str) -> Optional[DestinationPack]:
+    """Pack for a destination, if one was built"""
+    if _packs is None:
+        load_pack_index()
+    return _packs.get(normalize_cache_text(destination))
+
+def _record(kind: str, found: bool) -> None:
+    metrics.increment(f"packs.{kind}.{'hits' if found else 'misses'}")
+
+def pack_venues(kind: str, destination: str) -> List[Dict[str, Any]]:
+    """Packed venues of one kind ("activities", "dining" or "accommodations") for a destination"""
+    pack = get_pack(destination)
+    if pack is None:
+        return []
+    venues = pack.venues(kind)
+    _record(kind, bool(venues))
+    return venues
+
+def pack_coordinates(place: str) -> Optional[Tuple[float, float]]:
+    """
+    Packed (lat, lng) of a place: a packed destination, or a base city one of the
+    packs was built for.
+    """
+    if _packs is None:
+        load_pack_index()
+    pack = get_pack(place)
+    coordinates = pack.coordinates(place) if pack else None
+    if coordinates is None and normalize_cache_text(place) in _place_packs:
+        coordinates = _place_packs[normalize_cache_text(place)].coordinates(place)
+    if _packs:
+        _record("coordinates", coordinates is not None)
+    return coordinates
+
+def pack_essential_info(destination: str, base_city: str) -> Optional[Dict[str, Any]]:
+    """Packed essential info for trips from base_city to destination"""
+    pack = get_pack(destination)
+    if pack is None:
+        return None
+    info = pack.essential_info(base_city)
+    _record("essential_info", info is not None)
+    return info
+
+def pack_climate_normals(destination: str, month: int) -> Optional[Dict[str, float]]:
+    """Packed climate normals of a destination for a calendar month"""
+    pack = get_pack(destination)
+    if pack is None:
+        return None
+    normals = pack.climate_normals(month)
+    _record("climate", normals is not None)
+    return normals
@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import os
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, List, NamedTuple, Optional, Tuple
+
+from app.models.request import ItineraryRequest
+from app.services.accommodations_service import generate_accommodations, generate_dining
+from app.services.activities_service import generate_activities, pooled_activities
+from app.services.gemini_service import track_llm_calls
+from app.services.itinerary_service import get_coordinates_from_gemini, get_essential_info
+from app.services.meta_service import get_meta_info
+from app.services.pack_store import get_pack
+from app.services.transport_service import get_transport_options
+from app.services.weather_service import get_destination_forecast
+from app.services.venue_store import add_to_pool, pool_key, sample_request
+from app.utils.destination_pack import VENUE_KINDS
+from app.utils.image_cache import normalize_cache_text
+from app.utils.knowledge_cache import city_pair_key, fresh_for, place_key
+from app.utils.metrics import Counters, metrics
+from app.utils.popularity import PopularityTracker
+
+logger = logging.getLogger(__name__)
+
+PREWARM_ENABLED = os.environ.get("PREWARM_ENABLED", "true").lower() == "true"
+# Number of destinations and of city pairs kept warm
+PREWARM_TOP_K = int(os.environ.get("PREWARM_TOP_K", "20"))
+# Decayed request count an entry needs before it is worth warming (1.5: requested at least
+# twice lately)
+PREWARM_MIN_REQUESTS = float(os.environ.get("PREWARM_MIN_REQUESTS", "1.5"))
+PREWARM_HALF_LIFE_HOURS = float(os.environ.get("PREWARM_HALF_LIFE_HOURS", "72"))
+PREWARM_INTERVAL_SECONDS = int(os.environ.get("PREWARM_INTERVAL_SECONDS", "900"))
+# Local hours during which warming runs, as "start-end" (end excluded, may wrap past midnight)
+PREWARM_OFF_PEAK_HOURS = os.environ.get("PREWARM_OFF_PEAK_HOURS", "1-6")
+# LLM calls warming may spend per day
+PREWARM_DAILY_LLM_BUDGET = int(os.environ.get("PREWARM_DAILY_LLM_BUDGET", "200"))
+# Entries going stale within this window are regenerated, so the hot set stays fresh until the
+# next off-peak window
+PREWARM_HORIZON_SECONDS = int(os.environ.get("PREWARM_HORIZON_SECONDS", str(24 * 3600)))
+
+destination_popularity = PopularityTracker(
+    PREWARM_TOP_K * 4, half_life_seconds=PREWARM_HALF_LIFE_HOURS * 3600
+)
+city_pair_popularity = PopularityTracker(
+    PREWARM_TOP_K * 4, half_life_seconds=PREWARM_HALF_LIFE_HOURS * 3600
+)
+
+# LLM calls spent on warming, per day
+_budget_day: Optional[date] = None
+_budget_calls = Counters()
+
+_scheduler_task: Optional[asyncio.Task] = None
+
+class WarmStep(NamedTuple):
+    """One cache entry to keep warm"""
+    kind: str
+    key: str
+    # Regenerate when the entry goes stale within this many seconds
+    horizon: float
+    # Expected LLM calls, checked against the remaining budget before running
+    llm_calls: int
+    run: Callable[[], Awaitable[Any]]
+
+def record_request(request: ItineraryRequest) -> None:
+    """Count an itinerary request towards the popularity of its destination and city pair"""
+    destination = normalize_cache_text(request.location.destination)
+    base_city = normalize_cache_text(request.location.baseCity)
+    if not destination:
+        return
+    # Only the place names are kept: entries are warmed with a neutral sample request, so
+    # no single traveler's dates or party shape what is warmed for everyone
+    payload = {"destination": request.location.destination, "baseCity": request.location.baseCity}
+    destination_popularity.record(destination, payload)
+    if base_city:
+        city_pair_popularity.record(f"{base_city}|{destination}", payload)
+
+def parse_off_peak_hours(value: str) -> Tuple[int, int]:
+    """Parse "start-end" local hours, e.g. "1-6", "22-4" or "0-24" (all day)"""
+    start, end = (int(part) for part in value.split("-", 1))
+    return start, end
+
+def is_off_peak(now: Optional[datetime] = None) -> bool:
+    start, end = parse_off_peak_hours(PREWARM_OFF_PEAK_HOURS)
+    hour = (now or datetime.now()).hour
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+def remaining_budget() -> int:
+    """LLM calls warming may still spend today"""
+    global _budget_day
+    today = date.today()
+    if _budget_day != today:
+        _budget_day = today
+        _budget_calls.reset()
+    return max(0, PREWARM_DAILY_LLM_BUDGET - int(_budget_calls.get("llm.calls")))
+
+def _packed(request: ItineraryRequest, kind: str, place: str) -> bool:
+    """Whether the destination pack already answers a step, so warming it would only spend LLM calls"""
+    pack = get_pack(request.location.destination)
+    if pack is None:
+        return False
+    if kind == "coordinates":
+        return pack.coordinates(place) is not None
+    if kind == "essential_info":
+        return pack.essential_info(request.location.baseCity) is not None
+    if kind in VENUE_KINDS:
+        return pack.manifest["venues"].get(kind, 0) > 0
+    return False
+
+def destination_steps(request: ItineraryRequest) -> List[WarmStep]:
+    """Geocoding, the daily forecast and venue pools for a destination not covered by its pack"""
+    destination = request.location.destination
+
+    async def warm_activities():
+        add_to_pool("activities", destination, pooled_activities(await generate_activities(request)))
+
+    async def warm_accommodations():
+        add_to_pool("accommodations", destination, await generate_accommodations(request))
+
+    async def warm_dining():
+        add_to_pool("dining", destination, await generate_dining(request))
+
+    steps = [
+        WarmStep("coordinates", place_key("coordinates", destination), PREWARM_HORIZON_SECONDS, 1,
+                 lambda: get_coordinates_from_gemini(destination, refresh=True)),
+        # The forecast only needs Open-Meteo; it is kept fresh until the next run, since
+        # it goes stale far sooner than the rest
+        WarmStep("weather", place_key("forecast", destination), PREWARM_INTERVAL_SECONDS, 0,
+                 lambda: get_destination_forecast(destination, refresh=True)),
+        WarmStep("activities", pool_key("activities", destination), PREWARM_HORIZON_SECONDS, 1, warm_activities),
+        # Hotels are enriched with a second call when the scraper misses details
+        WarmStep("accommodations", pool_key("accommodations", destination), PREWARM_HORIZON_SECONDS, 2,
+                 warm_accommodations),
+        WarmStep("dining", pool_key("dining", destination), PREWARM_HORIZON_SECONDS, 1, warm_dining)
+    ]
+    return [step for step in steps if not _packed(request, step.kind, destination)]
+
+def city_pair_steps(request: ItineraryRequest) -> List[WarmStep]:
+    """Geocoding, journey metadata, transport and essential info for a city pair not covered by packs"""
+    async def warm_essential_info():
+        await get_essential_info(request, await get_meta_info(request), refresh=True)
+
+    steps = [
+        WarmStep("coordinates", place_key("coordinates", request.location.baseCity), PREWARM_HORIZON_SECONDS, 1,
+                 lambda: get_coordinates_from_gemini(request.location.baseCity, refresh=True)),
+        WarmStep("meta", city_pair_key("meta", request), PREWARM_HORIZON_SECONDS, 1,
+                 lambda: get_meta_info(request, refresh=True)),
+        WarmStep("transport", city_pair_key("transport", request, with_travelers=True), PREWARM_HORIZON_SECONDS, 1,
+                 lambda: get_transport_options(request, refresh=True)),
+        WarmStep("essential_info", city_pair_key("essential_info", request), PREWARM_HORIZON_SECONDS, 1,
+                 warm_essential_info)
+    ]
+    return [step for step in steps if not _packed(request, step.kind, request.location.baseCity)]
+
+def hot_steps() -> List[WarmStep]:
+    """Warm steps for the hot set, most popular entries first"""
+    ranked: List[Tuple[float, List[WarmStep]]] = []
+    for tracker, steps_for in ((destination_popularity, destination_steps), (city_pair_popularity, city_pair_steps)):
+        for _, count, payload in tracker.top(PREWARM_TOP_K, PREWARM_MIN_REQUESTS):
+            ranked.append((count, steps_for(sample_request(payload["destination"], payload["baseCity"]))))
+    ranked.sort(key=lambda entry: entry[0], reverse=True)
+
+    steps = []
+    seen = set()
+    for _, entry_steps in ranked:
+        for step in entry_steps:
+            if step.key not in seen:
+                seen.add(step.key)
+                steps.append(step)
+    return steps
+
+async def warm_hot_set() -> int:
+    """
+    Regenerate the hot set's cache entries that are missing or about to go stale,
+    within the remaining daily LLM budget.
+
+    Returns:
+        Number of entries warmed
+    """
+    track_llm_calls(_budget_calls)
+    warmed = 0
+    for step in hot_steps():
+        if fresh_for(step.key) > step.horizon:
+            continue
+        if remaining_budget() < step.llm_calls:
+            metrics.increment("prewarm.over_budget")
+            logger.info("Pre-warming stopped: daily LLM budget spent")
+            break
+        try:
+            await step.run()
+            warmed += 1
+            metrics.increment(f"prewarm.{step.kind}")
+        except Exception as e:
+            logger.warning(f"Pre-warming failed for {step.key}: {str(e)}")
+    metrics.increment("prewarm.runs")
+    if warmed:
+        logger.info(f"Pre-warmed {warmed} cache entries ({remaining_budget()} LLM calls left today)")
+    return warmed
+
+async def run_scheduler() -> None:
+    """Warm the hot set every PREWARM_INTERVAL_SECONDS during off-peak hours"""
+    while True:
+        await asyncio.sleep(PREWARM_INTERVAL_SECONDS)
+        if not is_off_peak():
+            continue
+        try:
+            await warm_hot_set()
+        except Exception as e:
+            logger.error(f"Pre-warming run failed: {str(e)}")
+
+def start_prewarming() -> None:
+    """Start the pre-warming scheduler (once per process)"""
+    global _scheduler_task
+    if PREWARM_ENABLED and _scheduler_task is None:
+        _scheduler_task = asyncio.create_task(run_scheduler())
+        logger.info(f"Pre-warming the top {PREWARM_TOP_K} destinations and city pairs during hours {PREWARM_OFF_PEAK_HOURS}")
+
+async def stop_prewarming() -> None:
+    global _scheduler_task
+    if _scheduler_task is not None:
+        _scheduler_task.cancel()
+        try:
+            await _scheduler_task
+        except asyncio.CancelledError:
+            pass
+        _scheduler_task = None
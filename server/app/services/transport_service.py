@@ -1,5 +1,5 @@
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import json
 from datetime import datetime, timedelta
 import math
@@ -8,21 +8,33 @@ import urllib
 
 from app.models.request import ItineraryRequest
 from app.services.gemini_service import get_gemini_structured_response
+from app.utils.helpers import matches_place
+from app.utils.knowledge_cache import CITY_PAIR_TRANSPORT_TTL, cache_knowledge, city_pair_key, get_knowledge
+from app.utils.travel_time import estimate_journey, journey_minutes
 
 logger = logging.getLogger(__name__)
 
-async def get_transport_options(request: ItineraryRequest) -> Dict[str, Any]:
+async def get_transport_options(request: ItineraryRequest, refresh: bool = False) -> Dict[str, Any]:
     """
     Generate transport options for the trip.
     
     Args:
         request: The itinerary request object
+        refresh: Regenerate the options even if they are cached
         
     Returns:
         Dictionary containing transport options
     """
     logger.info(f"Generating transport options for {request.location.baseCity} to {request.location.destination}")
     
+    # Routes and operators depend on the city pair, month and party, not on the user, unless
+    # the request adds its own context
+    cache_key = None if request.additionalContext else city_pair_key("transport", request, with_travelers=True)
+    cached = get_knowledge(cache_key) if cache_key and not refresh else None
+    if cached is not None:
+        logger.info(f"Using cached transport options for {request.location.baseCity} to {request.location.destination}")
+        return cached
+    
     # Calculate trip duration in days
     start_date = datetime.strptime(request.dates.startDate, "%Y-%m-%d")
     end_date = datetime.strptime(request.dates.endDate, "%Y-%m-%d")
@@ -135,30 +147,6 @@ async def get_transport_options(request: ItineraryRequest) -> Dict[str, Any]:
         transport_options = await get_gemini_structured_response(prompt, system_instruction)
         logger.info(f"Generated transport options for {request.location.destination}")
         
-        # Add basic validation/fallback for unrealistic travel times
-        if isinstance(transport_options.get("main_transport"), list):
-            for option in transport_options["main_transport"]:
-                # If duration is unrealistically short for the context, adjust it
-                if "duration" in option and option["duration"] < 60 and "flight" not in option.get("mode", "").lower():
-                    # Assume at least 1 hour for any non-flight transport
-                    option["duration"] = max(60, option["duration"])
-                
-                # Specifically check for very remote destinations or mountain locations
-                destination_lower = request.location.destination.lower()
-                if any(term in destination_lower for term in ["mountain", "himalayas", "alps", "remote", "kaza", "spiti"]):
-                    if "duration" in option and option["duration"] < 300 and "flight" not in option.get("mode", "").lower():
-                        # For mountain/remote locations, ensure road transport is at least 5 hours
-                        option["duration"] = max(300, option["duration"])
-                
-                # Update arrival time based on adjusted duration if needed
-                if "departure_time" in option and "duration" in option:
-                    try:
-                        departure = datetime.strptime(option["departure_time"], "%H:%M")
-                        arrival = departure + timedelta(minutes=option["duration"])
-                        option["arrival_time"] = arrival.strftime("%H:%M")
-                    except (ValueError, TypeError):
-                        # If time format issues, just leave as is
-                        pass
         # Add fallback Google Maps links for any transport option missing links
         if isinstance(transport_options, dict):
             # Process main_transport links
@@ -223,7 +211,10 @@ async def get_transport_options(request: ItineraryRequest) -> Dict[str, Any]:
                                 elif "car" in mode or "drive" in mode or "taxi" in mode:
                                     mode_param = "&travelmode=driving"
                             option["link"] = f"https://www.google.com/maps/dir/{from_location}/{to_location}{mode_param}"
-                return transport_options
+        
+        if cache_key and isinstance(transport_options, dict) and transport_options.get("main_transport"):
+            cache_knowledge(cache_key, transport_options, CITY_PAIR_TRANSPORT_TTL)
+        return transport_options
     except Exception as e:
         logger.error(f"Error generating transport options: {str(e)}")
         # Return a minimal structure in case of error
@@ -232,4 +223,97 @@ async def get_transport_options(request: ItineraryRequest) -> Dict[str, Any]:
             "local_transport": [],
             "transfers": [],
             "route_transport": []
-        }
\ No newline at end of file
+        }
+
+def _number(value) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+def _key_coordinate(key_coordinates, place: str) -> Optional[Dict[str, Any]]:
+    """Key coordinate (from the meta service) with usable lat/lng that refers to the place"""
+    for point in key_coordinates or []:
+        if not isinstance(point, dict) or not matches_place(point.get("name", ""), place):
+            continue
+        lat, lng = _number(point.get("lat")), _number(point.get("lng"))
+        if lat is not None and lng is not None and not (lat == 0 and lng == 0):
+            return point
+    return None
+
+def estimate_trip_journey(meta_info: Dict[str, Any], base_city: str, destination: str,
+                          base_coords: Dict[str, float] = None,
+                          destination_coords: Dict[str, float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Estimate the journey between the base city and the destination from the meta information.
+    
+    Coordinates come from the meta service's key coordinates, falling back to the given
+    coordinates; the terrain factor uses the highest point reported along the route.
+    
+    Args:
+        meta_info: Meta information from the meta service
+        base_city: Origin city from the request
+        destination: Destination name from the request
+        base_coords, destination_coords: Fallback {"lat", "lng"} dictionaries
+        
+    Returns:
+        Journey estimate (see estimate_journey) with destination_elevation_m added,
+        or None if either end has no coordinates
+    """
+    meta_info = meta_info if isinstance(meta_info, dict) else {}
+    key_coordinates = meta_info.get("key_coordinates")
+    
+    ends = []
+    for place, fallback in ((base_city, base_coords), (destination, destination_coords)):
+        point = _key_coordinate(key_coordinates, place) or fallback or {}
+        lat, lng = _number(point.get("lat")), _number(point.get("lng"))
+        if lat is None or lng is None:
+            return None
+        ends.append((lat, lng))
+    if ends[0] == ends[1]:
+        return None
+    
+    elevations = [_number((meta_info.get("altitude_info") or {}).get("highest_point"))]
+    elevations += [_number(point.get("altitude")) for point in key_coordinates or [] if isinstance(point, dict)]
+    journey_path = meta_info.get("journey_path") or {}
+    elevations += [
+        _number(point.get("elevation")) for point in journey_path.get("elevation_profile") or []
+        if isinstance(point, dict)
+    ]
+    elevations = [value for value in elevations if value is not None]
+    max_elevation = max(elevations, default=0.0)
+    
+    journey = estimate_journey(ends[0], ends[1], max_elevation)
+    destination_point = _key_coordinate(key_coordinates, destination) or {}
+    destination_elevation = _number(destination_point.get("altitude"))
+    journey["destination_elevation_m"] = destination_elevation if destination_elevation is not None else max_elevation
+    return journey
+
+def apply_travel_estimates(transport_options: Dict[str, Any], journey: Optional[Dict[str, Any]]) -> None:
+    """
+    Raise main transport durations the LLM underestimated to the local estimate for their mode.
+    
+    Longer LLM durations are kept, since they may include connections the estimate
+    cannot know about. Arrival times follow the adjusted durations.
+    
+    Args:
+        transport_options: Transport options from get_transport_options, updated in place
+        journey: Journey estimate from estimate_trip_journey
+    """
+    if not journey or not isinstance(transport_options, dict):
+        return
+    
+    for option in transport_options.get("main_transport") or []:
+        if not isinstance(option, dict):
+            continue
+        estimate = journey_minutes(journey, option.get("mode"))
+        duration = _number(option.get("duration"))
+        if duration is not None and duration >= estimate:
+            continue
+        
+        option["duration"] = estimate
+        if "departure_time" in option:
+            try:
+                departure = datetime.strptime(option["departure_time"], "%H:%M")
+                arrival = departure + timedelta(minutes=estimate)
+                option["arrival_time"] = arrival.strftime("%H:%M")
+            except (ValueError, TypeError):
+                # If time format issues, just leave as is
+                pass
@@ -0,0 +1,423 @@
+import logging
+import math
+import os
+import re
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Tuple
+
+from app.models.request import ItineraryRequest
+from app.services.pack_store import pack_venues
+from app.utils.image_cache import normalize_cache_text
+from app.utils.knowledge_cache import (
+    cache_knowledge, get_knowledge, get_knowledge_entry, place_key, refresh_in_background
+)
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Generated venues are pooled per destination and kind, and reused across requests for
+# this long after they were generated
+VENUE_POOL_TTL = int(os.environ.get("VENUE_POOL_TTL", str(30 * 24 * 3600)))
+# Pools holding venues older than this are still served but refreshed in the background
+VENUE_POOL_SOFT_TTL = int(os.environ.get("VENUE_POOL_SOFT_TTL", str(7 * 24 * 3600)))
+VENUE_POOL_MAX = int(os.environ.get("VENUE_POOL_MAX", "150"))
+
+ACTIVITY_CATEGORIES = ["must_see", "cultural", "outdoor", "local_experiences", "hidden_gems", "family_friendly"]
+# A category (or dining/hotel list) with fewer matching venues than this is topped up by the LLM
+MIN_ACTIVITIES_PER_CATEGORY = 3
+ACTIVITY_SLOTS_PER_DAY = 4
+MIN_RESTAURANTS = 6
+RESTAURANTS_PER_DAY = 2
+MIN_HOTELS = 4
+# Pooled names listed in a top-up prompt so the LLM suggests new places
+MAX_EXCLUDED_NAMES = 40
+# Days ahead of today the sample trip starts, and its length
+SAMPLE_TRIP_LEAD_DAYS = 30
+SAMPLE_TRIP_DAYS = 4
+# A pool with enough venues that are too few once a request's restrictions (diet, mobility,
+# children) are applied is topped up at most once per restrictions in this long, so
+# restrictions the LLM cannot satisfy do not trigger a top-up on every request
+VENUE_TOP_UP_COOLDOWN = int(os.environ.get("VENUE_TOP_UP_COOLDOWN", str(24 * 3600)))
+
+# Share of the per-person daily budget one activity or meal may take before it ranks lower,
+# and share of the per-night budget a hotel may take
+ACTIVITY_BUDGET_SHARE = 0.4
+MEAL_BUDGET_SHARE = 0.25
+HOTEL_BUDGET_SHARE = 0.5
+
+# Pools are shared by every request for a destination, so their prices are all generated in
+# one currency and converted to each request's currency when venues are selected
+POOL_CURRENCY = os.environ.get("VENUE_POOL_CURRENCY", "INR").upper()
+# Approximate units per US dollar; only used to rank and show pooled prices
+EXCHANGE_RATES = {
+    "USD": 1.0, "INR": 83.0, "EUR": 0.92, "GBP": 0.79, "AUD": 1.5, "CAD": 1.36, "SGD": 1.34,
+    "AED": 3.67, "JPY": 150.0, "CNY": 7.2, "THB": 35.0, "NPR": 133.0, "LKR": 300.0, "CHF": 0.88
+}
+PRICE_PATTERN = re.compile(r"\d[\d,]*(?:\.\d+)?")
+CURRENCY_MARKS = re.compile(r"[₹$€£¥]|\bRs\b\.?|\b(?:" + "|".join(EXCHANGE_RATES) + r")\b\s*", re.IGNORECASE)
+
+MOBILITY_UNFRIENDLY_TERMS = ("trek", "hike", "hiking", "climb", "rafting", "paraglid", "rappel", "steep")
+ADULTS_ONLY_TERMS = ("nightlife", "night club", "nightclub", "pub crawl", "casino", "bar hopping")
+NO_DIETARY_PREFERENCE = {"", "none", "no restrictions", "no preference", "anything", "any"}
+
+def venue_key(venue: Dict[str, Any]) -> str:
+    """Pool identity of a venue: its normalized title or name"""
+    return normalize_cache_text(venue.get("title") or venue.get("name"))
+
+def pool_key(kind: str, destination: str) -> str:
+    """Knowledge cache key of a destination's venue pool"""
+    return place_key(f"venues.{kind}", destination)
+
+def pool_request(request: ItineraryRequest) -> ItineraryRequest:
+    """
+    The request pool venues are generated from: the trip without its budget or free-text
+    context, which belong to one traveler and would shape venues served to everyone.
+    Prices are then asked for in POOL_CURRENCY.
+    """
+    return request.model_copy(update={"budget": None, "additionalContext": None})
+
+def sample_request(destination: str, base_city: str) -> ItineraryRequest:
+    """
+    Neutral trip request for a city pair, used where no traveler's request should shape
+    shared knowledge: generating destination packs and warming caches.
+    """
+    start = date.today() + timedelta(days=SAMPLE_TRIP_LEAD_DAYS)
+    return ItineraryRequest(
+        location={"destination": destination, "baseCity": base_city},
+        dates={"startDate": start.isoformat(), "endDate": (start + timedelta(days=SAMPLE_TRIP_DAYS - 1)).isoformat()},
+        travelers={"count": 2, "adults": 2},
+        tripStyle=["sightseeing", "culture", "food"],
+        preferences={"pace": "moderate"}
+    )
+
+def load_pool(kind: str, destination: str,
+              refresh: Optional[Callable[[], Awaitable[List[Dict[str, Any]]]]] = None) -> List[Dict[str, Any]]:
+    """
+    Pooled venues of one kind ("activities", "dining" or "accommodations") for a destination.
+
+    Without a cached pool, the destination pack's venues (if any) are the pool. Venues
+    generated more than VENUE_POOL_TTL ago are left out.
+
+    Args:
+        kind: Pool kind
+        destination: Destination name
+        refresh: Coroutine function generating venues; once the pool's oldest venues are
+            past VENUE_POOL_SOFT_TTL it is served as is, and these venues replace the
+            stale ones in the background
+
+    Returns:
+        The pooled venues, possibly stale, or an empty list
+    """
+    key = pool_key(kind, destination)
+    pool, stale = get_knowledge_entry(key)
+    if pool is None:
+        return pack_venues(kind, destination)
+    if stale and refresh:
+        async def refresh_pool():
+            stale_before = time.time() - VENUE_POOL_SOFT_TTL
+            venues = await refresh()
+            if venues:
+                add_to_pool(kind, destination, venues, replace_before=stale_before)
+
+        if refresh_in_background(key, refresh_pool):
+            logger.info(f"Refreshing the stale {kind} pool for {destination} in the background")
+    expired_before = time.time() - VENUE_POOL_TTL
+    return [venue for venue in pool or [] if venue.get("pooled_at", time.time()) >= expired_before]
+
+def add_to_pool(kind: str, destination: str, venues: List[Dict[str, Any]],
+                replace_before: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Merge newly generated venues into a destination's pool.
+
+    Each venue is stamped with the time it was pooled ("pooled_at"). Venues already pooled
+    under the same name are replaced by the new version, expired venues are dropped, and
+    the oldest venues go once the pool grows past VENUE_POOL_MAX. The pool goes stale when
+    its oldest venue does. Venues are generated from pool_request, so their prices are
+    tagged as POOL_CURRENCY.
+
+    Args:
+        kind: Pool kind
+        destination: Destination name
+        venues: Generated venues
+        replace_before: Also drop venues pooled before this time, so a refresh replaces
+            the stale venues instead of adding to them
+
+    Returns:
+        The updated pool
+    """
+    now = time.time()
+    cutoff = max(now - VENUE_POOL_TTL, replace_before or 0)
+    fresh = {
+        venue_key(venue): {**venue, "price_currency": POOL_CURRENCY, "pooled_at": now}
+        for venue in venues if venue_key(venue)
+    }
+    # Pack venues seeding a new pool age from the time they are pooled
+    pool = [
+        {**venue, "pooled_at": venue.get("pooled_at", now)} for venue in load_pool(kind, destination)
+        if venue_key(venue) not in fresh
+    ]
+    pool = [venue for venue in pool if venue["pooled_at"] >= cutoff]
+    pool.sort(key=lambda venue: venue["pooled_at"])
+    pool.extend(fresh.values())
+    pool = pool[-VENUE_POOL_MAX:]
+
+    oldest = pool[0]["pooled_at"] if pool else now
+    cache_knowledge(pool_key(kind, destination), pool, VENUE_POOL_TTL, max(0.0, oldest + VENUE_POOL_SOFT_TTL - now))
+    logger.info(f"Pooled {len(fresh)} {kind} for {destination} ({len(pool)} in pool)")
+    return pool
+
+def excluded_names(pool: List[Dict[str, Any]]) -> List[str]:
+    """Most recent pooled names, to keep top-up prompts from repeating them"""
+    names = [venue.get("title") or venue.get("name") for venue in pool]
+    return [name for name in names if name][-MAX_EXCLUDED_NAMES:]
+
+def parse_price(text) -> Optional[float]:
+    """Midpoint of the first price range in a string like "₹500-1,000 per person", if any"""
+    if isinstance(text, dict):
+        text = text.get("range")
+    if not isinstance(text, str):
+        return None
+    numbers = [float(value.replace(",", "")) for value in PRICE_PATTERN.findall(text)[:2]]
+    return sum(numbers) / len(numbers) if numbers else None
+
+def request_currency(request: ItineraryRequest) -> str:
+    """Currency prices are shown in for a request (POOL_CURRENCY without a budget)"""
+    return (request.budget.currency if request.budget and request.budget.currency else POOL_CURRENCY).upper()
+
+def _convert_price_text(text: str, rate: float) -> str:
+    """Price text with every amount multiplied by rate and currency symbols removed"""
+    def convert(match):
+        value = float(match.group().replace(",", "")) * rate
+        return f"{round(value, -1) if value >= 100 else round(value):,.0f}"
+    return " ".join(PRICE_PATTERN.sub(convert, CURRENCY_MARKS.sub("", text)).split())
+
+def localize_prices(venue: Dict[str, Any], currency: str) -> Dict[str, Any]:
+    """
+    Copy of a pooled venue for a request, with its prices converted to currency.
+
+    The venue's "price_currency" tells which currency its prices are in (POOL_CURRENCY
+    when missing). Venues are returned unconverted when either currency has no exchange
+    rate. The pool's "pooled_at" stamp is left out.
+    """
+    venue = {field: value for field, value in venue.items() if field != "pooled_at"}
+    source = venue.get("price_currency") or POOL_CURRENCY
+    if source == currency or source not in EXCHANGE_RATES or currency not in EXCHANGE_RATES:
+        return {**venue, "price_currency": source}
+    rate = EXCHANGE_RATES[currency] / EXCHANGE_RATES[source]
+    localized = {**venue, "price_currency": currency}
+    if isinstance(venue.get("price_range"), str) and PRICE_PATTERN.search(venue["price_range"]):
+        localized["price_range"] = f"{currency} {_convert_price_text(venue['price_range'], rate)}"
+    cost = venue.get("cost")
+    if isinstance(cost, dict):
+        localized["cost"] = {**cost, "currency": currency}
+        if isinstance(cost.get("range"), str) and PRICE_PATTERN.search(cost["range"]):
+            localized["cost"]["range"] = _convert_price_text(cost["range"], rate)
+    return localized
+
+def _local_price(venue: Dict[str, Any], field: str, currency: str) -> Optional[float]:
+    """Price of a localized venue, if it is in currency"""
+    return parse_price(venue.get(field)) if venue.get("price_currency") == currency else None
+
+def trip_days(request: ItineraryRequest) -> int:
+    start = datetime.strptime(request.dates.startDate, "%Y-%m-%d")
+    end = datetime.strptime(request.dates.endDate, "%Y-%m-%d")
+    return max(1, (end - start).days + 1)
+
+def daily_budget_per_person(request: ItineraryRequest) -> Optional[float]:
+    """Budget ceiling spread over travelers and days, or None without a budget"""
+    if not request.budget or not request.budget.ceiling:
+        return None
+    return request.budget.ceiling / max(1, request.travelers.count) / trip_days(request)
+
+def _venue_text(venue: Dict[str, Any]) -> str:
+    parts = [venue.get(field) for field in ("title", "name", "type", "description", "cuisine")]
+    parts += venue.get("dietary_options") or []
+    return " ".join(part for part in parts if isinstance(part, str)).lower()
+
+def _diet_tokens(text: str) -> str:
+    """
+    Normalized text with "non" joined to the word it negates, padded with spaces so
+    whole tokens can be matched: "Non-Vegetarian" becomes " nonvegetarian ".
+    """
+    joined = re.sub(r"\bnon (?=\w)", "non", normalize_cache_text(text))
+    return f" {joined} "
+
+def _preference_terms(values: Optional[List[str]]) -> List[str]:
+    return [normalize_cache_text(value) for value in values or [] if normalize_cache_text(value)]
+
+def _match_count(text: str, terms: List[str]) -> int:
+    return sum(1 for term in terms if term in text)
+
+def _over_budget(price: Optional[float], allowance: Optional[float]) -> bool:
+    return price is not None and allowance is not None and price > allowance
+
+def _has_children(request: ItineraryRequest) -> bool:
+    return request.travelers.children > 0 or request.travelers.infants > 0
+
+def _needs_mobility_help(request: ItineraryRequest) -> bool:
+    accessibility = request.preferences.accessibility
+    return bool(accessibility and accessibility.mobilityNeeds)
+
+def activity_score(activity: Dict[str, Any], category: str, request: ItineraryRequest,
+                   allowance: Optional[float]) -> Optional[float]:
+    """Relevance of a pooled activity for a request, or None if it does not suit the travelers"""
+    text = _venue_text(activity)
+    if _needs_mobility_help(request) and any(term in text for term in MOBILITY_UNFRIENDLY_TERMS):
+        return None
+    if _has_children(request) and any(term in text for term in ADULTS_ONLY_TERMS):
+        return None
+
+    priority = activity.get("priority")
+    score = 6.0 - priority if isinstance(priority, (int, float)) else 3.0
+    score += 2 * _match_count(text, _preference_terms(request.tripStyle))
+    score += _match_count(text, _preference_terms(request.preferences.interests))
+    score += _match_count(text, _preference_terms(request.preferences.travelStyle))
+    if category == "family_friendly" and _has_children(request):
+        score += 3
+    if _over_budget(_local_price(activity, "cost", request_currency(request)), allowance):
+        score -= 3
+    return score
+
+def _request_diets(request: ItineraryRequest) -> List[str]:
+    return [diet for diet in _preference_terms(request.preferences.dietaryPreferences) if diet not in NO_DIETARY_PREFERENCE]
+
+def request_restrictions(kind: str, request: ItineraryRequest) -> str:
+    """Restrictions of a request that filter venues out of a pool, as a key ("" when none)"""
+    if kind == "activities":
+        restrictions = [
+            name for name, applies in (("mobility", _needs_mobility_help(request)), ("children", _has_children(request)))
+            if applies
+        ]
+    elif kind == "dining":
+        restrictions = sorted(_request_diets(request))
+    else:
+        restrictions = []
+    return ",".join(restrictions)
+
+def _top_up_key(kind: str, request: ItineraryRequest) -> str:
+    """Knowledge cache key marking a recent top-up of a pool for the request's restrictions"""
+    return f"{place_key(f'venues.{kind}.top_up', request.location.destination)}|{request_restrictions(kind, request)}"
+
+def _may_top_up_restricted(kind: str, request: ItineraryRequest) -> bool:
+    """Whether a shortfall caused only by the request's restrictions may be topped up"""
+    return bool(request_restrictions(kind, request)) and get_knowledge(_top_up_key(kind, request)) is None
+
+def select_activities(pool: List[Dict[str, Any]], request: ItineraryRequest) -> Tuple[Dict[str, List[Dict]], List[str]]:
+    """
+    Pick the best pooled activities for a request in each category, with their costs
+    in the request's currency.
+
+    Args:
+        pool: Pooled activities, each with its "category"
+        request: The itinerary request object
+
+    A category is thin when too few activities are pooled in it, or when too few suit the
+    travelers and no top-up was made for their restrictions within VENUE_TOP_UP_COOLDOWN.
+
+    Returns:
+        Tuple of (activities by category, thin categories)
+    """
+    target = max(MIN_ACTIVITIES_PER_CATEGORY, math.ceil(trip_days(request) * ACTIVITY_SLOTS_PER_DAY / len(ACTIVITY_CATEGORIES)))
+    budget = daily_budget_per_person(request)
+    allowance = budget * ACTIVITY_BUDGET_SHARE if budget else None
+    currency = request_currency(request)
+    may_top_up_restricted = _may_top_up_restricted("activities", request)
+
+    candidates = {category: [] for category in ACTIVITY_CATEGORIES}
+    pooled = {category: 0 for category in ACTIVITY_CATEGORIES}
+    for activity in pool:
+        category = activity.get("category")
+        if category not in candidates:
+            continue
+        pooled[category] += 1
+        activity = localize_prices(activity, currency)
+        score = activity_score(activity, category, request, allowance)
+        if score is not None:
+            candidates[category].append((score, activity))
+
+    selected = {}
+    thin = []
+    for category, scored in candidates.items():
+        scored.sort(key=lambda item: item[0], reverse=True)
+        selected[category] = [
+            {field: value for field, value in activity.items() if field != "category"}
+            for _, activity in scored[:target]
+        ]
+        if pooled[category] < target or (len(scored) < target and may_top_up_restricted):
+            thin.append(category)
+    return selected, thin
+
+def _meets_diet(restaurant: Dict[str, Any], diets: List[str]) -> bool:
+    """Whether a restaurant mentions every diet as whole words ("vegetarian" is not "non-vegetarian")"""
+    text = _diet_tokens(_venue_text(restaurant))
+    return all(_diet_tokens(diet) in text for diet in diets)
+
+def select_dining(pool: List[Dict[str, Any]], request: ItineraryRequest) -> Tuple[List[Dict], bool]:
+    """
+    Pick the best pooled restaurants for a request.
+
+    Restaurants must offer every dietary preference of the request; the rest are ranked
+    by trip style and how well their prices, converted to the request's currency, fit
+    the budget. The pool is thin when too few restaurants are pooled, or when too few
+    offer the diets and no top-up was made for them within VENUE_TOP_UP_COOLDOWN.
+
+    Returns:
+        Tuple of (restaurants, whether the pool is thin)
+    """
+    target = max(MIN_RESTAURANTS, trip_days(request) * RESTAURANTS_PER_DAY)
+    diets = _request_diets(request)
+    budget = daily_budget_per_person(request)
+    allowance = budget * MEAL_BUDGET_SHARE if budget else None
+    styles = _preference_terms(request.tripStyle)
+    currency = request_currency(request)
+
+    scored = []
+    for restaurant in pool:
+        if not _meets_diet(restaurant, diets):
+            continue
+        restaurant = localize_prices(restaurant, currency)
+        score = _match_count(_venue_text(restaurant), styles)
+        if _over_budget(_local_price(restaurant, "price_range", currency), allowance):
+            score -= 3
+        scored.append((score, restaurant))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    thin = len(pool) < target or (len(scored) < target and _may_top_up_restricted("dining", request))
+    return [restaurant for _, restaurant in scored[:target]], thin
+
+def select_accommodations(pool: List[Dict[str, Any]], request: ItineraryRequest) -> Tuple[List[Dict], bool]:
+    """
+    Pick the best pooled hotels for a request, ranked by trip style, budget fit and rating,
+    with their prices in the request's currency.
+
+    Returns:
+        Tuple of (hotels, whether too few hotels are pooled)
+    """
+    nights = max(1, trip_days(request) - 1)
+    allowance = request.budget.ceiling / nights * HOTEL_BUDGET_SHARE if request.budget and request.budget.ceiling else None
+    styles = _preference_terms(request.tripStyle)
+    currency = request_currency(request)
+
+    scored = []
+    for hotel in pool:
+        hotel = localize_prices(hotel, currency)
+        score = _match_count(_venue_text(hotel), styles)
+        if _over_budget(_local_price(hotel, "price_range", currency), allowance):
+            score -= 3
+        rating = hotel.get("rating")
+        if isinstance(rating, (int, float)):
+            score += rating / 5
+        scored.append((score, hotel))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [hotel for _, hotel in scored[:MIN_HOTELS + 2]], len(scored) < MIN_HOTELS
+
+def record_pool_use(kind: str, request: ItineraryRequest, topped_up: bool) -> None:
+    """
+    Count requests served per pool kind and how many needed an LLM top-up, and start
+    the top-up cooldown of the request's restrictions.
+    """
+    metrics.increment(f"venues.{kind}.requests")
+    if topped_up:
+        metrics.increment(f"venues.{kind}.top_ups")
+        if request_restrictions(kind, request):
+            cache_knowledge(_top_up_key(kind, request), True, VENUE_TOP_UP_COOLDOWN)
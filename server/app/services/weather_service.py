@@ -1,7 +1,12 @@
 import logging
-from typing import Dict, Any, List
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 import json
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
+import asyncio
+import math
+import os
+import time
 import openmeteo_requests # type: ignore
 import requests_cache # type: ignore
 from retry_requests import retry # type: ignore
@@ -10,6 +15,11 @@ from geopy.geocoders import Nominatim # type: ignore
 
 from app.models.request import ItineraryRequest
 from app.services.gemini_service import get_gemini_structured_response
+from app.services.pack_store import pack_climate_normals, pack_coordinates
+from app.utils.helpers import calculate_date_range, matches_place
+from app.utils.knowledge_cache import (
+    WEATHER_FORECAST_DAYS, WEATHER_SOFT_TTL, WEATHER_TTL, get_or_generate, place_key, trip_key
+)
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +28,121 @@ cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
 retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
 openmeteo = openmeteo_requests.Client(session=retry_session)
 
+OPEN_METEO_FORECAST_URL = os.environ.get("OPEN_METEO_API_URL", "https://api.open-meteo.com/v1/forecast")
+OPEN_METEO_ARCHIVE_URL = os.environ.get("OPEN_METEO_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/archive")
+
+# Daily variables requested from Open-Meteo (order matters for parsing)
+DAILY_VARIABLES = [
+    "temperature_2m_max",
+    "temperature_2m_min",
+    "precipitation_probability_max",
+    "precipitation_sum",
+    "wind_speed_10m_max",
+    "wind_direction_10m_dominant",
+    "weather_code"
+]
+
+# Hourly variables requested from Open-Meteo (order matters for parsing)
+HOURLY_VARIABLES = [
+    "temperature_2m",
+    "precipitation_probability",
+    "precipitation",
+    "wind_speed_10m",
+    "weather_code"
+]
+
+# Daily variables averaged into monthly climate normals (order matters for parsing)
+CLIMATE_VARIABLES = [
+    "temperature_2m_max",
+    "temperature_2m_min",
+    "precipitation_sum",
+    "wind_speed_10m_max"
+]
+# Years of history behind the climate normals, and the precipitation that makes a day wet
+CLIMATE_NORMAL_YEARS = 10
+WET_DAY_PRECIPITATION_MM = 1.0
+
+# Hourly forecasts are cached per location for the same hour the HTTP cache uses
+HOURLY_CACHE_TTL_SECONDS = 3600
+# Locations whose hourly forecast is kept in memory
+HOURLY_CACHE_MAX_ENTRIES = int(os.environ.get("HOURLY_CACHE_MAX_ENTRIES", "256"))
+
+WEATHER_CODES = {
+    0: "Clear sky",
+    1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
+    45: "Fog", 48: "Depositing rime fog",
+    51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
+    61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain",
+    71: "Slight snow", 73: "Moderate snow", 75: "Heavy snow",
+    80: "Slight rain showers", 81: "Moderate rain showers", 82: "Violent rain showers",
+    95: "Thunderstorm", 96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail"
+}
+
+def get_wind_direction(degrees):
+    """Convert a wind direction in degrees to a compass point"""
+    directions = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
+    index = round(degrees / 45) % 8
+    return directions[index]
+
+def describe_precipitation(amount_mm):
+    """Convert a precipitation sum in mm to a descriptive amount"""
+    if amount_mm < 1:
+        return "None"
+    elif amount_mm < 5:
+        return "Light"
+    elif amount_mm < 15:
+        return "Moderate"
+    return "Heavy"
+
+def parse_daily_forecast(daily, utc_offset_seconds=0, limit=None):
+    """
+    Convert an Open-Meteo daily response block into our forecast format.
+    
+    Args:
+        daily: Daily variables block of an Open-Meteo response
+        utc_offset_seconds: UTC offset of the location (timezone=auto)
+        limit: Optional maximum number of days to return
+        
+    Returns:
+        List of daily forecast dictionaries
+    """
+    max_temps = daily.Variables(0).ValuesAsNumpy().tolist()
+    min_temps = daily.Variables(1).ValuesAsNumpy().tolist()
+    precip_prob = daily.Variables(2).ValuesAsNumpy().tolist()
+    precip_sum = daily.Variables(3).ValuesAsNumpy().tolist()
+    wind_speed = daily.Variables(4).ValuesAsNumpy().tolist()
+    wind_dir_deg = daily.Variables(5).ValuesAsNumpy().tolist()
+    weather_code_vals = daily.Variables(6).ValuesAsNumpy().tolist()
+    
+    day_count = len(max_temps) if limit is None else min(limit, len(max_temps))
+    
+    weather_data = []
+    for i in range(day_count):
+        # Timestamps are local midnight expressed in UTC, shift by the offset to get the local date
+        timestamp = daily.Time() + i * daily.Interval() + utc_offset_seconds
+        date_str = datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%d")
+        
+        weather_data.append({
+            "date": date_str,
+            "temperature": {
+                "min": round(min_temps[i], 1),
+                "max": round(max_temps[i], 1)
+            },
+            "conditions": WEATHER_CODES.get(int(weather_code_vals[i]), "Unknown"),
+            "precipitation": {
+                "probability": round(precip_prob[i]),
+                "amount": describe_precipitation(precip_sum[i])
+            },
+            "wind": {
+                "speed": round(wind_speed[i], 1),
+                "unit": "km/h",
+                "direction": get_wind_direction(wind_dir_deg[i])
+            },
+            "advisory": ""  # Will be filled in by Gemini
+        })
+    
+    return weather_data
+
 async def get_coordinates_with_gemini(location_name):
     """
     Get latitude and longitude for a location using Gemini.
@@ -82,6 +207,11 @@ async def get_coordinates(location_name):
         if location_name in location_overrides:
             logger.info(f"Using override coordinates for {location_name}")
             return location_overrides[location_name]
+        
+        # Then the destination packs
+        packed = pack_coordinates(location_name)
+        if packed:
+            return packed
             
         # Try standard geocoding first
         geolocator = Nominatim(user_agent="travel_itinerary_app")
@@ -105,118 +235,426 @@ async def get_coordinates(location_name):
         logger.info(f"Trying Gemini for coordinates after geocoding exception")
         return await get_coordinates_with_gemini(location_name)
 
-async def get_open_meteo_forecast(latitude, longitude, start_date):
+async def get_destination_forecast(destination: str, refresh: bool = False) -> Optional[Dict[str, Any]]:
     """
-    Fetch weather forecast from Open-Meteo API.
+    Daily forecast for a destination from today over the next WEATHER_FORECAST_DAYS days.
+    
+    The forecast only depends on the place and the date, so it is cached per destination
+    (stale-while-revalidate) and shared by every trip to it, whatever its dates; trips
+    take their days out of it.
     
     Args:
-        latitude: Latitude of the location
-        longitude: Longitude of the location
-        start_date: Start date for the forecast
+        destination: Destination name
+        refresh: Fetch a new forecast even if one is cached
         
     Returns:
-        Dictionary with daily forecast data
+        Dictionary with the forecast's "coordinates" ([lat, lng]) and daily "days", or None
+        if the destination cannot be located or Open-Meteo has no forecast
     """
-    try:
-        # Format dates for Open-Meteo API (YYYY-MM-DD)
-        end_date = (datetime.strptime(start_date, "%Y-%m-%d") + timedelta(days=5)).strftime("%Y-%m-%d")
+    async def generate():
+        coordinates = await get_coordinates(destination)
+        if not coordinates:
+            return None
+        latitude, longitude = coordinates
+        start = date.today()
+        end = start + timedelta(days=WEATHER_FORECAST_DAYS - 1)
+        forecasts = await get_open_meteo_forecast_batch([(latitude, longitude)], start.isoformat(), end.isoformat())
+        if not forecasts or not forecasts[0]:
+            return None
+        logger.info(f"Retrieved a {len(forecasts[0])}-day Open-Meteo forecast for {destination}")
+        return {"coordinates": [latitude, longitude], "days": forecasts[0]}
+    
+    return await get_or_generate(
+        place_key("forecast", destination),
+        generate,
+        WEATHER_TTL,
+        WEATHER_SOFT_TTL,
+        cacheable=bool,
+        refresh=refresh
+    )
+
+class HourlyForecast:
+    """
+    Hourly forecast for one location, stored as NumPy arrays indexed by the hour
+    since local midnight of the first forecast date.
+    
+    Prefix sums are kept for the averaged variables so a time-window lookup is a
+    couple of index operations, independent of how many days the forecast covers.
+    """
+    
+    def __init__(self, start_date: str, temperature, precipitation_probability, precipitation, wind_speed, weather_code):
+        self.start_date = datetime.strptime(start_date, "%Y-%m-%d")
+        self.temperature = np.asarray(temperature, dtype=np.float32)
+        self.precipitation_probability = np.asarray(precipitation_probability, dtype=np.float32)
+        self.precipitation = np.asarray(precipitation, dtype=np.float32)
+        self.wind_speed = np.asarray(wind_speed, dtype=np.float32)
+        self.weather_code = np.asarray(weather_code, dtype=np.float32)
+        self.fetched_at = time.time()
+        
+        self._temperature_sums = _prefix_sums(self.temperature)
+        self._precipitation_sums = _prefix_sums(self.precipitation)
+        self._wind_sums = _prefix_sums(self.wind_speed)
+    
+    @property
+    def hours(self) -> int:
+        return len(self.temperature)
+    
+    def covers(self, start_date: str, end_date: str) -> bool:
+        """Check whether the forecast covers every hour of the given date range"""
+        first = (datetime.strptime(start_date, "%Y-%m-%d") - self.start_date).days * 24
+        last = ((datetime.strptime(end_date, "%Y-%m-%d") - self.start_date).days + 1) * 24
+        return first >= 0 and last <= self.hours
+    
+    def window(self, date_str: str, start_time: str, end_time: str) -> Optional[Dict[str, Any]]:
+        """
+        Summarize the conditions between start_time and end_time on date_str.
+        
+        Args:
+            date_str: Date in YYYY-MM-DD format
+            start_time: Window start in HH:MM format
+            end_time: Window end in HH:MM format (may roll over past midnight)
+            
+        Returns:
+            Dictionary with the window's conditions, or None if outside the forecast
+        """
+        try:
+            day_offset = (datetime.strptime(date_str, "%Y-%m-%d") - self.start_date).days
+            start_hour, start_minute = (int(part) for part in start_time[:5].split(":"))
+            end_hour, end_minute = (int(part) for part in end_time[:5].split(":"))
+        except (ValueError, TypeError):
+            return None
+        
+        start_minutes = start_hour * 60 + start_minute
+        end_minutes = end_hour * 60 + end_minute
+        if end_minutes <= start_minutes:
+            end_minutes += 24 * 60  # Block runs past midnight
+        
+        start_index = day_offset * 24 + start_minutes // 60
+        end_index = min(day_offset * 24 + math.ceil(end_minutes / 60), self.hours)
+        if start_index < 0 or start_index >= end_index:
+            return None
+        
+        # Open-Meteo returns nulls (NaN here) for hours it has no data for; a window
+        # without any temperature is skipped, other missing variables are left out
+        temperature_hours, temperature_total = _window_sum(self._temperature_sums, start_index, end_index)
+        if not temperature_hours:
+            return None
+        temperatures = self.temperature[start_index:end_index]
+        precipitation_hours, precipitation_total = _window_sum(self._precipitation_sums, start_index, end_index)
+        wind_hours, wind_total = _window_sum(self._wind_sums, start_index, end_index)
+        
+        # Higher WMO codes are the more severe conditions, so report the worst one in the window
+        worst_code = _nanmax(self.weather_code[start_index:end_index])
+        precipitation_probability = _nanmax(self.precipitation_probability[start_index:end_index])
         
-        # Set up API parameters
+        return {
+            "temperature": {
+                "min": round(float(np.nanmin(temperatures)), 1),
+                "max": round(float(np.nanmax(temperatures)), 1),
+                "avg": round(temperature_total / temperature_hours, 1)
+            },
+            "conditions": WEATHER_CODES.get(int(worst_code), "Unknown") if worst_code is not None else "Unknown",
+            "precipitation_probability": round(precipitation_probability) if precipitation_probability is not None else None,
+            "precipitation_mm": round(precipitation_total, 1) if precipitation_hours else None,
+            "wind_speed": round(wind_total / wind_hours, 1) if wind_hours else None
+        }
+
+def _prefix_sums(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Prefix sums of the non-missing values and prefix counts of them"""
+    present = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(present, values, 0.0), dtype=np.float64)))
+    counts = np.concatenate(([0], np.cumsum(present)))
+    return sums, counts
+
+def _window_sum(prefix: Tuple[np.ndarray, np.ndarray], start_index: int, end_index: int) -> Tuple[int, float]:
+    """Number of non-missing hours in a window and their total"""
+    sums, counts = prefix
+    return int(counts[end_index] - counts[start_index]), float(sums[end_index] - sums[start_index])
+
+def _nanmax(values: np.ndarray) -> Optional[float]:
+    """Largest non-missing value, or None when every value is missing"""
+    present = values[~np.isnan(values)]
+    return float(present.max()) if len(present) else None
+
+# Hourly forecast cache keyed by rounded (lat, lng), least recently used first
+_HOURLY_CACHE: "OrderedDict[Tuple[float, float], HourlyForecast]" = OrderedDict()
+
+def _hourly_cache_key(latitude, longitude) -> Tuple[float, float]:
+    return (round(float(latitude), 2), round(float(longitude), 2))
+
+def parse_hourly_forecast(hourly, utc_offset_seconds=0) -> HourlyForecast:
+    """
+    Convert an Open-Meteo hourly response block into an HourlyForecast.
+    
+    Args:
+        hourly: Hourly variables block of an Open-Meteo response
+        utc_offset_seconds: UTC offset of the location (timezone=auto)
+        
+    Returns:
+        HourlyForecast for the location
+    """
+    start_date = datetime.fromtimestamp(hourly.Time() + utc_offset_seconds, tz=timezone.utc).strftime("%Y-%m-%d")
+    return HourlyForecast(
+        start_date,
+        temperature=hourly.Variables(0).ValuesAsNumpy(),
+        precipitation_probability=hourly.Variables(1).ValuesAsNumpy(),
+        precipitation=hourly.Variables(2).ValuesAsNumpy(),
+        wind_speed=hourly.Variables(3).ValuesAsNumpy(),
+        weather_code=hourly.Variables(4).ValuesAsNumpy()
+    )
+
+def cache_hourly_forecast(key: Tuple[float, float], forecast: HourlyForecast) -> None:
+    """Store an hourly forecast, dropping expired ones and then the least recently used"""
+    _HOURLY_CACHE[key] = forecast
+    _HOURLY_CACHE.move_to_end(key)
+    now = time.time()
+    for stale in [k for k, cached in _HOURLY_CACHE.items() if now - cached.fetched_at > HOURLY_CACHE_TTL_SECONDS]:
+        del _HOURLY_CACHE[stale]
+    while len(_HOURLY_CACHE) > HOURLY_CACHE_MAX_ENTRIES:
+        _HOURLY_CACHE.popitem(last=False)
+
+def get_cached_hourly_forecast(latitude, longitude, start_date, end_date) -> Optional[HourlyForecast]:
+    """Return a cached hourly forecast covering the date range, if there is a fresh one"""
+    key = _hourly_cache_key(latitude, longitude)
+    forecast = _HOURLY_CACHE.get(key)
+    if not forecast:
+        return None
+    if time.time() - forecast.fetched_at > HOURLY_CACHE_TTL_SECONDS:
+        del _HOURLY_CACHE[key]
+        return None
+    _HOURLY_CACHE.move_to_end(key)
+    return forecast if forecast.covers(start_date, end_date) else None
+
+async def get_hourly_forecasts(locations, start_date, end_date) -> Dict[Tuple[float, float], HourlyForecast]:
+    """
+    Get hourly forecasts for several locations, fetching only the uncached ones
+    with a single Open-Meteo request.
+    
+    Args:
+        locations: List of (latitude, longitude) tuples
+        start_date: First date in YYYY-MM-DD format
+        end_date: Last date in YYYY-MM-DD format
+        
+    Returns:
+        Dictionary mapping rounded (lat, lng) keys to HourlyForecast objects
+    """
+    results = {}
+    missing = []
+    for latitude, longitude in locations:
+        key = _hourly_cache_key(latitude, longitude)
+        if key in results or key in missing:
+            continue
+        cached = get_cached_hourly_forecast(latitude, longitude, start_date, end_date)
+        if cached:
+            results[key] = cached
+        else:
+            missing.append(key)
+    
+    if not missing:
+        return results
+    
+    try:
         params = {
-            "latitude": latitude,
-            "longitude": longitude,
-            "daily": [
-                "temperature_2m_max", 
-                "temperature_2m_min",
-                "precipitation_probability_max",
-                "precipitation_sum", 
-                "wind_speed_10m_max",
-                "wind_direction_10m_dominant",
-                "weather_code"
-            ],
+            "latitude": ",".join(str(lat) for lat, _ in missing),
+            "longitude": ",".join(str(lng) for _, lng in missing),
+            "hourly": HOURLY_VARIABLES,
             "timezone": "auto",
             "start_date": start_date,
             "end_date": end_date
         }
         
-        # Make API call
-        responses = openmeteo.weather_api("https://api.open-meteo.com/v1/forecast", params=params)
-        response = responses[0]
-        
-        daily = response.Daily()
-        
-        # Process weather data
-        weather_data = []
-        weather_codes = {
-            0: "Clear sky",
-            1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
-            45: "Fog", 48: "Depositing rime fog",
-            51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
-            61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain",
-            71: "Slight snow", 73: "Moderate snow", 75: "Heavy snow",
-            80: "Slight rain showers", 81: "Moderate rain showers", 82: "Violent rain showers",
-            95: "Thunderstorm", 96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail"
-        }
+        loop = asyncio.get_running_loop()
+        responses = await loop.run_in_executor(
+            None,
+            lambda: openmeteo.weather_api(OPEN_METEO_FORECAST_URL, params=params)
+        )
         
-        # Wind direction conversion
-        def get_wind_direction(degrees):
-            directions = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
-            index = round(degrees / 45) % 8
-            return directions[index]
-        
-        # Convert API response to our format
-        dates = daily.Variables(0).ValuesAsNumpy().tolist()
-        max_temps = daily.Variables(0).ValuesAsNumpy().tolist()
-        min_temps = daily.Variables(1).ValuesAsNumpy().tolist()
-        precip_prob = daily.Variables(2).ValuesAsNumpy().tolist()
-        precip_sum = daily.Variables(3).ValuesAsNumpy().tolist()
-        wind_speed = daily.Variables(4).ValuesAsNumpy().tolist()
-        wind_dir_deg = daily.Variables(5).ValuesAsNumpy().tolist()
-        weather_code_vals = daily.Variables(6).ValuesAsNumpy().tolist()
-        
-        for i in range(len(dates)):
-            if i >= 5:  # Limit to 5 days
-                break
-                
-            date_str = datetime.fromtimestamp(dates[i]).strftime("%Y-%m-%d")
-            weather_code = int(weather_code_vals[i])
-            condition = weather_codes.get(weather_code, "Unknown")
-            
-            precip_amount = "None"
-            if precip_sum[i] < 1:
-                precip_amount = "None"
-            elif precip_sum[i] < 5:
-                precip_amount = "Light"
-            elif precip_sum[i] < 15:
-                precip_amount = "Moderate"
-            else:
-                precip_amount = "Heavy"
-                
-            weather_data.append({
-                "date": date_str,
-                "temperature": {
-                    "min": round(min_temps[i], 1),
-                    "max": round(max_temps[i], 1)
-                },
-                "conditions": condition,
-                "precipitation": {
-                    "probability": round(precip_prob[i]),
-                    "amount": precip_amount 
-                },
-                "wind": {
-                    "speed": round(wind_speed[i], 1),
-                    "unit": "km/h",
-                    "direction": get_wind_direction(wind_dir_deg[i])
-                },
-                "advisory": ""  # Will be filled in by Gemini
-            })
+        for key, response in zip(missing, responses):
+            forecast = parse_hourly_forecast(response.Hourly(), response.UtcOffsetSeconds())
+            cache_hourly_forecast(key, forecast)
+            results[key] = forecast
+        
+        logger.info(f"Retrieved hourly forecasts for {len(missing)} locations in one request")
+    except Exception as e:
+        logger.error(f"Error fetching hourly Open-Meteo forecast: {str(e)}")
+    
+    return results
+
+async def attach_hourly_weather(day_itineraries: List[Dict[str, Any]], weather: Dict[str, Any]) -> None:
+    """
+    Attach the conditions for each time block's window to the block, using the
+    hourly forecast for the location of that day.
+    
+    Args:
+        day_itineraries: Generated day itineraries (updated in place)
+        weather: Weather forecast returned by get_weather_forecast
+    """
+    day_coordinates = {}
+    for forecast in weather.get("forecast", []):
+        coordinates = forecast.get("coordinates")
+        if isinstance(coordinates, dict) and "lat" in coordinates and "lng" in coordinates:
+            day_coordinates[forecast.get("date")] = (coordinates["lat"], coordinates["lng"])
+    
+    dates = [day["date"] for day in day_itineraries if day.get("date") in day_coordinates]
+    if not dates:
+        return
+    
+    hourly_forecasts = await get_hourly_forecasts(
+        [day_coordinates[date_str] for date_str in dates], min(dates), max(dates)
+    )
+    
+    for day in day_itineraries:
+        coordinates = day_coordinates.get(day.get("date"))
+        if not coordinates:
+            continue
+        hourly = hourly_forecasts.get(_hourly_cache_key(*coordinates))
+        if not hourly:
+            continue
+        
+        for block in day.get("time_blocks", []):
+            block_weather = hourly.window(day["date"], block.get("start_time", ""), block.get("end_time", ""))
+            if block_weather:
+                block["weather"] = block_weather
+
+async def get_open_meteo_forecast_batch(locations, start_date, end_date):
+    """
+    Fetch daily forecasts for several locations with a single Open-Meteo request.
+    Open-Meteo accepts comma-separated latitude/longitude lists and answers with
+    one response per location, in the same order. The hourly series returned with
+    it is stored in the hourly forecast cache for time-block lookups.
+    
+    Args:
+        locations: List of (latitude, longitude) tuples
+        start_date: First forecast date in YYYY-MM-DD format
+        end_date: Last forecast date in YYYY-MM-DD format
         
-        logger.info(f"Successfully retrieved Open-Meteo forecast data with {len(weather_data)} days")
-        return weather_data
+    Returns:
+        List of daily forecast lists (one per location) or None on failure
+    """
+    if not locations:
+        return []
+    
+    try:
+        params = {
+            "latitude": ",".join(str(lat) for lat, _ in locations),
+            "longitude": ",".join(str(lng) for _, lng in locations),
+            "daily": DAILY_VARIABLES,
+            "hourly": HOURLY_VARIABLES,
+            "timezone": "auto",
+            "start_date": start_date,
+            "end_date": end_date
+        }
+        
+        # The Open-Meteo client is blocking, so keep it off the event loop
+        loop = asyncio.get_running_loop()
+        responses = await loop.run_in_executor(
+            None,
+            lambda: openmeteo.weather_api(OPEN_METEO_FORECAST_URL, params=params)
+        )
+        
+        forecasts = []
+        for (latitude, longitude), response in zip(locations, responses):
+            forecasts.append(parse_daily_forecast(response.Daily(), response.UtcOffsetSeconds()))
+            # The hourly series comes back in the same response, keep it for time-block lookups
+            cache_hourly_forecast(
+                _hourly_cache_key(latitude, longitude),
+                parse_hourly_forecast(response.Hourly(), response.UtcOffsetSeconds())
+            )
+        
+        logger.info(f"Retrieved Open-Meteo forecasts for {len(forecasts)} locations in one request")
+        return forecasts
     except Exception as e:
-        logger.error(f"Error fetching Open-Meteo forecast: {str(e)}")
+        logger.error(f"Error fetching batched Open-Meteo forecast: {str(e)}")
         return None
 
+def plan_daily_locations(date_range, key_coordinates, destination, base_city):
+    """
+    Work out where the traveler is on each day of the trip from the journey's key coordinates.
+    
+    Hub trips (the destination is the final stop of the route) keep every day at the
+    destination. Circuit trips (e.g. Spiti or Ladakh, where the destination is a region)
+    spread the days over the stops in route order.
+    
+    Args:
+        date_range: List of trip dates in YYYY-MM-DD format
+        key_coordinates: Key coordinates from the meta service
+        destination: Destination name from the request
+        base_city: Origin city from the request
+        
+    Returns:
+        List of stop dictionaries (name, lat, lng) aligned with date_range, or an empty list
+        if the key coordinates are not usable
+    """
+    stops = []
+    for point in key_coordinates or []:
+        if not isinstance(point, dict):
+            continue
+        lat = point.get("lat")
+        lng = point.get("lng")
+        if not isinstance(lat, (int, float)) or not isinstance(lng, (int, float)):
+            continue
+        if lat == 0 and lng == 0:
+            continue
+        # The traveler leaves the base city on day one, so it never hosts a day
+        if matches_place(point.get("name", ""), base_city):
+            continue
+        stops.append({"name": point.get("name", destination), "lat": lat, "lng": lng})
+    
+    if not stops or not date_range:
+        return []
+    
+    if matches_place(stops[-1]["name"], destination):
+        return [stops[-1]] * len(date_range)
+    
+    day_count = len(date_range)
+    return [stops[i * len(stops) // day_count] for i in range(day_count)]
+
+def is_circuit_route(request: ItineraryRequest, key_coordinates: List[Dict[str, Any]] = None) -> bool:
+    """Whether the journey's key coordinates spread the trip's days over more than one location"""
+    date_range = calculate_date_range(request.dates.startDate, request.dates.endDate)
+    day_locations = plan_daily_locations(
+        date_range, key_coordinates, request.location.destination, request.location.baseCity
+    )
+    return len({(stop["lat"], stop["lng"]) for stop in day_locations}) > 1
+
+async def get_route_forecast(date_range, day_locations):
+    """
+    Build a per-day forecast where each day uses the weather at that day's location.
+    
+    Args:
+        date_range: List of trip dates in YYYY-MM-DD format
+        day_locations: Stop dictionaries aligned with date_range
+        
+    Returns:
+        List of daily forecast dictionaries (with a location field) or None on failure
+    """
+    # Deduplicate stops so each location is fetched only once
+    unique_locations = []
+    location_index = {}
+    for stop in day_locations:
+        key = (round(stop["lat"], 4), round(stop["lng"], 4))
+        if key not in location_index:
+            location_index[key] = len(unique_locations)
+            unique_locations.append(key)
+    
+    forecasts = await get_open_meteo_forecast_batch(unique_locations, date_range[0], date_range[-1])
+    if not forecasts:
+        return None
+    
+    route_forecast = []
+    for date_str, stop in zip(date_range, day_locations):
+        key = (round(stop["lat"], 4), round(stop["lng"], 4))
+        for day in forecasts[location_index[key]]:
+            if day["date"] == date_str:
+                route_forecast.append({
+                    **day,
+                    "location": stop["name"],
+                    "coordinates": {"lat": stop["lat"], "lng": stop["lng"]}
+                })
+                break
+    
+    return route_forecast or None
+
 async def enhance_forecast_with_gemini(weather_data, destination):
     """
     Enhance the weather forecast with Gemini-generated advisories.
@@ -233,7 +671,7 @@ async def enhance_forecast_with_gemini(weather_data, destination):
         weather_json = json.dumps(weather_data, indent=2)
         
         prompt = f"""
-        Here is the actual weather forecast for {destination} for the next 5 days:
+        Here is the actual weather forecast for {destination} for the trip days:
         
         {weather_json}
         
@@ -288,12 +726,51 @@ async def enhance_forecast_with_gemini(weather_data, destination):
             "general_advisory": "Be prepared for variable weather conditions."
         }
 
-async def get_weather_forecast(request: ItineraryRequest) -> Dict[str, Any]:
+def _is_real_forecast(forecast: Dict[str, Any]) -> bool:
+    """Whether a forecast comes from Open-Meteo data rather than the Gemini-only fallback"""
+    days = forecast.get("forecast") if isinstance(forecast, dict) else None
+    return bool(days) and all(isinstance(day, dict) and day.get("coordinates") for day in days)
+
+async def get_weather_forecast(request: ItineraryRequest, key_coordinates: List[Dict[str, Any]] = None,
+                               refresh: bool = False) -> Dict[str, Any]:
     """
-    Generate a 5-day weather forecast for the destination using real data and AI enhancement.
+    Weather forecast for the trip, served stale-while-revalidate from the knowledge cache.
+    
+    Only forecasts built from real Open-Meteo data are cached; past WEATHER_SOFT_TTL a
+    cached forecast is served while a fresh one is fetched in the background. Circuit
+    routes are cached apart from the destination forecast, so a forecast fetched before
+    the route was known never stands in for the route's.
     
     Args:
         request: The itinerary request object
+        key_coordinates: Optional key coordinates along the route from the meta service
+        refresh: Fetch a new forecast even if one is cached
+        
+    Returns:
+        Dictionary containing weather forecast
+    """
+    kind = "route_weather" if is_circuit_route(request, key_coordinates) else "weather"
+    return await get_or_generate(
+        trip_key(kind, request),
+        lambda: generate_weather_forecast(request, key_coordinates),
+        WEATHER_TTL,
+        WEATHER_SOFT_TTL,
+        cacheable=_is_real_forecast,
+        refresh=refresh
+    )
+
+async def generate_weather_forecast(request: ItineraryRequest, key_coordinates: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Generate a weather forecast for the trip using real data and AI enhancement.
+    
+    When the journey's key coordinates place the traveler in different locations on
+    different days, every day gets the forecast for where the traveler actually is,
+    fetched with a single batched Open-Meteo request. Otherwise a 5-day forecast for
+    the destination is used.
+    
+    Args:
+        request: The itinerary request object
+        key_coordinates: Optional key coordinates along the route from the meta service
         
     Returns:
         Dictionary containing weather forecast
@@ -301,15 +778,41 @@ async def get_weather_forecast(request: ItineraryRequest) -> Dict[str, Any]:
     logger.info(f"Generating weather forecast for {request.location.destination}")
     
     try:
-        # First get coordinates for the destination
-        coordinates = await get_coordinates(request.location.destination)
+        date_range = calculate_date_range(request.dates.startDate, request.dates.endDate)
+        day_locations = plan_daily_locations(
+            date_range, key_coordinates, request.location.destination, request.location.baseCity
+        )
+        distinct_stops = {(stop["lat"], stop["lng"]) for stop in day_locations}
+        
+        if len(distinct_stops) > 1:
+            logger.info(f"Fetching route weather for {len(distinct_stops)} locations along the journey")
+            weather_data = await get_route_forecast(date_range, day_locations)
+            
+            if weather_data:
+                stop_names = []
+                for stop in day_locations:
+                    if stop["name"] not in stop_names:
+                        stop_names.append(stop["name"])
+                route_label = f"{request.location.destination} (route via {', '.join(stop_names)})"
+                enhanced_forecast = await enhance_forecast_with_gemini(weather_data, route_label)
+                logger.info(f"Generated route weather forecast for {request.location.destination}")
+                return enhanced_forecast
+            
+            logger.warning("Route weather unavailable, using destination forecast instead")
         
-        if coordinates:
-            # Get real weather data from Open-Meteo
-            latitude, longitude = coordinates
+        # Otherwise the trip's days (at most 5) of the destination's shared forecast
+        destination_forecast = await get_destination_forecast(request.location.destination)
+        
+        if destination_forecast:
+            latitude, longitude = destination_forecast["coordinates"]
             logger.info(f"Using coordinates ({latitude}, {longitude}) for {request.location.destination}")
             
-            weather_data = await get_open_meteo_forecast(latitude, longitude, request.dates.startDate)
+            # Record the forecast location so hourly conditions can be looked up per time block
+            weather_data = [
+                {**day, "coordinates": {"lat": latitude, "lng": longitude}}
+                for day in destination_forecast["days"]
+                if day["date"] >= request.dates.startDate
+            ][:5]
             
             if weather_data:
                 # Enhance forecast with Gemini advisories
@@ -317,12 +820,118 @@ async def get_weather_forecast(request: ItineraryRequest) -> Dict[str, Any]:
                 logger.info(f"Generated enhanced weather forecast for {request.location.destination}")
                 return enhanced_forecast
         
-        # Fallback to Gemini-only forecast if Open-Meteo fails
-        logger.warning(f"Falling back to Gemini-only forecast for {request.location.destination}")
-        return await get_gemini_forecast(request)
+        # Fallback to climate normals from the destination pack, then to a Gemini-only forecast
+        logger.warning(f"Falling back to climate normals or a Gemini-only forecast for {request.location.destination}")
+        return get_climate_forecast(request) or await get_gemini_forecast(request)
     except Exception as e:
         logger.error(f"Error generating weather forecast: {str(e)}")
-        return await get_gemini_forecast(request)  # Fallback to Gemini-only forecast
+        return get_climate_forecast(request) or await get_gemini_forecast(request)
+
+def get_climate_forecast(request: ItineraryRequest) -> Optional[Dict[str, Any]]:
+    """
+    Build a 5-day outlook from the destination pack's monthly climate normals, for
+    dates Open-Meteo has no forecast for.
+    
+    Args:
+        request: The itinerary request object
+        
+    Returns:
+        Dictionary shaped like a forecast, or None without packed normals
+    """
+    start_date = datetime.strptime(request.dates.startDate, "%Y-%m-%d")
+    
+    forecast = []
+    for i in range(5):
+        day = start_date + timedelta(days=i)
+        normals = pack_climate_normals(request.location.destination, day.month)
+        if normals is None:
+            return None
+        
+        wet_probability = normals["wet_day_probability"]
+        if wet_probability >= 60:
+            conditions = WEATHER_CODES[61]
+        elif wet_probability >= 30:
+            conditions = WEATHER_CODES[2]
+        else:
+            conditions = WEATHER_CODES[1]
+        
+        forecast.append({
+            "date": day.strftime("%Y-%m-%d"),
+            "temperature": {
+                "min": round(normals["temperature_min"], 1),
+                "max": round(normals["temperature_max"], 1)
+            },
+            "conditions": conditions,
+            "precipitation": {
+                "probability": round(wet_probability),
+                "amount": describe_precipitation(normals["precipitation_mm"])
+            },
+            "wind": {
+                "speed": round(normals["wind_speed_max"], 1),
+                "unit": "km/h",
+                "direction": "Variable"
+            },
+            "advisory": ""
+        })
+    
+    logger.info(f"Built a climate outlook for {request.location.destination} from its destination pack")
+    return {
+        "forecast": forecast,
+        "general_advisory": (
+            f"These dates are beyond the forecast range; figures are typical {start_date.strftime('%B')} "
+            f"conditions in {request.location.destination}. Check the forecast closer to departure."
+        )
+    }
+
+async def get_climate_normals(latitude: float, longitude: float, years: int = CLIMATE_NORMAL_YEARS) -> Optional[np.ndarray]:
+    """
+    Monthly climate normals for a location from the Open-Meteo historical archive.
+    
+    Args:
+        latitude: Latitude of the location
+        longitude: Longitude of the location
+        years: Number of past calendar years to average over
+        
+    Returns:
+        Array shaped (12, 5) with, per month, the mean daily maximum and minimum
+        temperature, mean daily precipitation in mm, percentage of wet days and mean
+        daily maximum wind speed (NaN for months without data), or None on failure
+    """
+    end = date(date.today().year - 1, 12, 31)
+    start = date(end.year - years + 1, 1, 1)
+    params = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "daily": CLIMATE_VARIABLES,
+        "timezone": "auto",
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat()
+    }
+    
+    try:
+        loop = asyncio.get_running_loop()
+        responses = await loop.run_in_executor(
+            None,
+            lambda: openmeteo.weather_api(OPEN_METEO_ARCHIVE_URL, params=params)
+        )
+        daily = responses[0].Daily()
+        max_temps, min_temps, precipitation, wind_speed = (
+            daily.Variables(i).ValuesAsNumpy().astype(np.float64) for i in range(len(CLIMATE_VARIABLES))
+        )
+    except Exception as e:
+        logger.error(f"Error fetching Open-Meteo climate history: {str(e)}")
+        return None
+    
+    months = (np.datetime64(start.isoformat()) + np.arange(len(max_temps))).astype("datetime64[M]").astype(int) % 12
+    wet_days = np.where(np.isnan(precipitation), np.nan, precipitation >= WET_DAY_PRECIPITATION_MM)
+    columns = [max_temps, min_temps, precipitation, wet_days * 100, wind_speed]
+    
+    normals = np.full((12, len(columns)), np.nan)
+    for month in range(12):
+        in_month = months == month
+        if in_month.any():
+            normals[month] = [np.nanmean(column[in_month]) for column in columns]
+    return normals
 
 async def get_gemini_forecast(request: ItineraryRequest) -> Dict[str, Any]:
     """
@@ -0,0 +1,202 @@
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.image_cache import normalize_cache_text
+
+PACK_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+# Venue kinds, in the order their rows are stored
+VENUE_KINDS = ("activities", "accommodations", "dining")
+# Columns of the monthly climate normals table (one row per calendar month)
+CLIMATE_COLUMNS = ("temperature_max", "temperature_min", "precipitation_mm", "wet_day_probability", "wind_speed_max")
+
+class StringTable:
+    """UTF-8 strings stored back to back, addressed by index through an offsets column"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._strings: List[bytes] = []
+
+    def add(self, text: str) -> int:
+        if text not in self._ids:
+            self._ids[text] = len(self._strings)
+            self._strings.append(text.encode("utf-8"))
+        return self._ids[text]
+
+    def write(self, directory: Path) -> None:
+        offsets = np.zeros(len(self._strings) + 1, dtype=np.uint64)
+        offsets[1:] = np.cumsum([len(data) for data in self._strings], dtype=np.uint64)
+        np.save(directory / "string_offsets.npy", offsets)
+        with open(directory / "strings.bin", "wb") as f:
+            for data in self._strings:
+                f.write(data)
+
+def write_pack(directory: str, destination: str, venues: Dict[str, List[Dict[str, Any]]],
+               places: Dict[str, Tuple[float, float]], essential_info: Dict[str, Dict[str, Any]],
+               climate: Optional[np.ndarray] = None, aliases: Optional[List[str]] = None) -> Path:
+    """
+    Write a destination pack, replacing any previous pack in the same directory.
+
+    Every table is a separate .npy column so the server can memory-map it; text and
+    JSON records live in one shared string table.
+
+    Args:
+        directory: Pack directory
+        destination: Destination name
+        venues: Venues by kind (see VENUE_KINDS)
+        places: Coordinates (lat, lng) by place name, including the destination itself
+        essential_info: Essential info by base city
+        climate: Monthly climate normals, shaped (12, len(CLIMATE_COLUMNS))
+        aliases: Other names the destination is requested by
+
+    Returns:
+        Path of the written pack
+    """
+    target = Path(directory)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f".{target.name}.", dir=target.parent))
+    staging.chmod(0o755)
+    strings = StringTable()
+
+    kinds, records = [], []
+    for code, kind in enumerate(VENUE_KINDS):
+        for venue in venues.get(kind, []):
+            kinds.append(code)
+            records.append(strings.add(json.dumps(venue, ensure_ascii=False)))
+    np.save(staging / "venue_kind.npy", np.asarray(kinds, dtype=np.uint8))
+    np.save(staging / "venue_record.npy", np.asarray(records, dtype=np.uint32))
+
+    names = [strings.add(normalize_cache_text(name)) for name in places]
+    coordinates = np.asarray(list(places.values()), dtype=np.float64).reshape(-1, 2)
+    np.save(staging / "place_name.npy", np.asarray(names, dtype=np.uint32))
+    np.save(staging / "place_coordinates.npy", coordinates)
+
+    np.save(staging / "essential_base.npy", np.asarray(
+        [strings.add(normalize_cache_text(base_city)) for base_city in essential_info], dtype=np.uint32
+    ))
+    np.save(staging / "essential_record.npy", np.asarray(
+        [strings.add(json.dumps(info, ensure_ascii=False)) for info in essential_info.values()], dtype=np.uint32
+    ))
+
+    if climate is not None:
+        np.save(staging / "climate.npy", np.asarray(climate, dtype=np.float32).reshape(12, len(CLIMATE_COLUMNS)))
+    strings.write(staging)
+
+    manifest = {
+        "version": PACK_FORMAT_VERSION,
+        "destination": destination,
+        "aliases": aliases or [],
+        "built_at": int(time.time()),
+        "venues": {kind: len(venues.get(kind, [])) for kind in VENUE_KINDS},
+        "base_cities": list(essential_info),
+        "places": list(places),
+        "climate": climate is not None
+    }
+    with open(staging / MANIFEST_FILE, "w") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    if target.exists():
+        shutil.rmtree(target)
+    os.replace(staging, target)
+    return target
+
+class DestinationPack:
+    """
+    Read-only view of a destination pack.
+
+    Only the manifest is read up front; columns and the string table are memory-mapped
+    the first time they are needed, so an unused pack costs no resident memory.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        with open(self.directory / MANIFEST_FILE) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("version") != PACK_FORMAT_VERSION:
+            raise ValueError(f"Unsupported pack version {self.manifest.get('version')} in {directory}")
+        self.destination = self.manifest["destination"]
+        self._columns: Dict[str, Optional[np.ndarray]] = {}
+        self._strings: Optional[mmap.mmap] = None
+        # Row of each string in a name column, decoded on the column's first lookup
+        self._rows: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def names(self) -> List[str]:
+        """Normalized destination name and aliases"""
+        return [normalize_cache_text(name) for name in [self.destination] + self.manifest.get("aliases", [])]
+
+    @property
+    def places(self) -> List[str]:
+        """Normalized names of the packed places (packs built before places were listed name their base cities)"""
+        places = self.manifest.get("places", [self.destination] + self.manifest.get("base_cities", []))
+        return [normalize_cache_text(place) for place in places]
+
+    def _column(self, name: str) -> Optional[np.ndarray]:
+        if name not in self._columns:
+            path = self.directory / f"{name}.npy"
+            self._columns[name] = np.load(path, mmap_mode="r") if path.exists() else None
+        return self._columns[name]
+
+    def string(self, index: int) -> str:
+        offsets = self._column("string_offsets")
+        if self._strings is None:
+            with open(self.directory / "strings.bin", "rb") as f:
+                # An empty file cannot be mapped; it only happens for a pack without strings
+                self._strings = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if offsets[-1] else b""
+        return self._strings[int(offsets[index]):int(offsets[index + 1])].decode("utf-8")
+
+    def _find(self, column: str, text: str) -> Optional[int]:
+        """Row whose string id in column points to text, if any"""
+        if column not in self._rows:
+            ids = self._column(column)
+            rows = {}
+            for row, index in enumerate(ids if ids is not None else []):
+                rows.setdefault(self.string(index), row)
+            self._rows[column] = rows
+        return self._rows[column].get(normalize_cache_text(text))
+
+    def venues(self, kind: str) -> List[Dict[str, Any]]:
+        """Packed venues of one kind"""
+        kinds = self._column("venue_kind")
+        if kinds is None or kind not in VENUE_KINDS:
+            return []
+        code = VENUE_KINDS.index(kind)
+        start, end = np.searchsorted(kinds, [code, code + 1])
+        records = self._column("venue_record")[start:end]
+        return [json.loads(self.string(index)) for index in records]
+
+    def coordinates(self, place: str) -> Optional[Tuple[float, float]]:
+        """(lat, lng) of a packed place; the destination's aliases resolve to the destination"""
+        if normalize_cache_text(place) in self.names:
+            place = self.destination
+        row = self._find("place_name", place)
+        if row is None:
+            return None
+        lat, lng = self._column("place_coordinates")[row]
+        return float(lat), float(lng)
+
+    def essential_info(self, base_city: str) -> Optional[Dict[str, Any]]:
+        """Essential info for trips from base_city"""
+        row = self._find("essential_base", base_city)
+        if row is None:
+            return None
+        return json.loads(self.string(self._column("essential_record")[row]))
+
+    def climate_normals(self, month: int) -> Optional[Dict[str, float]]:
+        """Climate normals for a calendar month (1-12), by CLIMATE_COLUMNS name"""
+        climate = self._column("climate")
+        if climate is None:
+            return None
+        row = climate[month - 1]
+        if np.isnan(row).all():
+            return None
+        return {name: float(value) for name, value in zip(CLIMATE_COLUMNS, row)}
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Tuple
+import numpy as np
 
 def calculate_date_range(start_date: str, end_date: str) -> List[str]:
     """
@@ -93,4 +94,58 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     c = 2 * asin(sqrt(a))
     r = 6371  # Radius of earth in kilometers
     
-    return c * r
\ No newline at end of file
+    return c * r
+
+def haversine_distances(lat: float, lon: float, lats, lons) -> np.ndarray:
+    """
+    Vectorized great circle distance from one point to many points.
+    
+    Args:
+        lat, lon: Coordinates of the origin point
+        lats, lons: Array-likes with the coordinates of the other points
+        
+    Returns:
+        NumPy array of distances in kilometers
+    """
+    lat1 = np.radians(lat)
+    lon1 = np.radians(lon)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    lon2 = np.radians(np.asarray(lons, dtype=np.float64))
+    
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def haversine_matrix(lats, lons, other_lats=None, other_lons=None) -> np.ndarray:
+    """
+    Vectorized great circle distances between every pair of points.
+    
+    Args:
+        lats, lons: Array-likes with the coordinates of the points
+        other_lats, other_lons: Optional second set of points; defaults to the first set
+        
+    Returns:
+        NumPy array of distances in kilometers, one row per point and one column
+        per point of the second set
+    """
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    other_lat = lat if other_lats is None else np.radians(np.asarray(other_lats, dtype=np.float64))
+    other_lon = lon if other_lons is None else np.radians(np.asarray(other_lons, dtype=np.float64))
+    
+    dlat = lat[:, None] - other_lat[None, :]
+    dlon = lon[:, None] - other_lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(other_lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * 6371 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def matches_place(place_name: str, query: str) -> bool:
+    """Check whether a place name (e.g. a key coordinate) refers to the queried place"""
+    if not place_name or not query:
+        return False
+    
+    place = place_name.lower()
+    primary = query.split(",")[0].strip().lower()
+    place_primary = place.split(",")[0].strip()
+    # An empty segment (e.g. ", Himachal") is a substring of every query
+    if not primary or not place_primary:
+        return False
+    return primary in place or place_primary in primary
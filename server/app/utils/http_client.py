@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional, Set, Tuple
+
+import aiohttp # type: ignore
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Connection pool settings shared by every outbound client
+HTTP_POOL_LIMIT = int(os.environ.get("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.environ.get("HTTP_POOL_LIMIT_PER_HOST", "20"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.environ.get("HTTP_KEEPALIVE_TIMEOUT", "60"))
+HTTP_DNS_CACHE_TTL = int(os.environ.get("HTTP_DNS_CACHE_TTL", "300"))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_TOTAL_TIMEOUT = float(os.environ.get("HTTP_TOTAL_TIMEOUT", "30"))
+
+_connector: Optional[aiohttp.TCPConnector] = None
+# Event loop the connector was created on; sessions and connectors only work on that loop
+_connector_loop: Optional[asyncio.AbstractEventLoop] = None
+_sessions: Dict[str, aiohttp.ClientSession] = {}
+# Whether the pool was opened by open_http_sessions (the application lifespan)
+_pool_opened = False
+# Pools left behind by closed event loops, being closed on the current one
+_closing: Set[asyncio.Task] = set()
+# Default headers and timeout of each registered client, by name
+_clients: Dict[str, Tuple[Optional[Dict[str, str]], Optional[float]]] = {}
+
+def _trace_config(name: str) -> aiohttp.TraceConfig:
+    """Count requests, new connections and reused keep-alive connections per client"""
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_request_end(session, context, params):
+        metrics.increment(f"http.{name}.requests")
+
+    async def on_request_exception(session, context, params):
+        metrics.increment(f"http.{name}.errors")
+
+    async def on_connection_create_end(session, context, params):
+        metrics.increment(f"http.{name}.connections_created")
+
+    async def on_connection_reuseconn(session, context, params):
+        metrics.increment(f"http.{name}.connections_reused")
+
+    async def on_dns_cache_hit(session, context, params):
+        metrics.increment(f"http.{name}.dns_cache_hits")
+
+    async def on_dns_cache_miss(session, context, params):
+        metrics.increment(f"http.{name}.dns_cache_misses")
+
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+    trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+    return trace_config
+
+async def _close_pool(connector: aiohttp.TCPConnector, sessions: List[aiohttp.ClientSession]) -> None:
+    for session in sessions:
+        await session.close()
+    await connector.close()
+
+def _get_connector() -> aiohttp.TCPConnector:
+    global _connector, _connector_loop
+    loop = asyncio.get_running_loop()
+    if _connector is not None and not _connector.closed and _connector_loop is not loop:
+        # A connector is bound to the event loop it was created on. A lazily opened pool
+        # whose loop has closed lost its connections with it, so it is closed here;
+        # a pool on a loop that is still open has to be closed by its owner first
+        if _pool_opened or not _connector_loop.is_closed():
+            raise RuntimeError("The shared HTTP client pool is open on another event loop")
+        task = loop.create_task(_close_pool(_connector, list(_sessions.values())))
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
+    if _connector is None or _connector.closed or _connector_loop is not loop:
+        _sessions.clear()
+        _connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL
+        )
+        _connector_loop = loop
+    return _connector
+
+def register_http_client(name: str, headers: Optional[Dict[str, str]] = None,
+                         timeout: Optional[float] = None) -> None:
+    """
+    Declare an outbound client so open_http_sessions creates its session at startup.
+
+    Args:
+        name: Client name used for metrics (e.g. "wikimedia", "pexels")
+        headers: Default headers sent with every request
+        timeout: Total request timeout in seconds (defaults to HTTP_TOTAL_TIMEOUT)
+    """
+    _clients[name] = (headers, timeout)
+
+def get_http_session(name: str) -> aiohttp.ClientSession:
+    """
+    Get the shared HTTP session for a registered outbound client.
+
+    All sessions share one connection pool, so keep-alive connections and cached DNS
+    lookups are reused across requests. Sessions live for the lifetime of the
+    application and must not be closed by callers. They are opened by the application
+    lifespan; outside of it (e.g. the pack builder) a session is opened on first use.
+
+    Args:
+        name: Name the client was registered under with register_http_client
+
+    Returns:
+        aiohttp.ClientSession for the client
+        
+    Raises:
+        RuntimeError: If the pool is open on another event loop that is still in use
+    """
+    connector = _get_connector()
+    session = _sessions.get(name)
+    if session is None or session.closed:
+        headers, timeout = _clients[name]
+        session = aiohttp.ClientSession(
+            connector=connector,
+            connector_owner=False,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=timeout or HTTP_TOTAL_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            trace_configs=[_trace_config(name)]
+        )
+        _sessions[name] = session
+    return session
+
+def open_http_sessions() -> None:
+    """Create the connection pool and a session for every registered client (needs a running loop)"""
+    global _pool_opened
+    for name in _clients:
+        get_http_session(name)
+    _pool_opened = True
+    logger.info(f"Opened shared HTTP client pool for {', '.join(_clients)}")
+
+async def close_http_sessions() -> None:
+    """Close every shared session and the connection pool"""
+    global _connector, _connector_loop, _pool_opened
+    for session in _sessions.values():
+        await session.close()
+    _sessions.clear()
+    if _connector is not None:
+        await _connector.close()
+        _connector = None
+        _connector_loop = None
+    _pool_opened = False
+    logger.info("Closed shared HTTP client pool")
+
+def get_http_metrics() -> Dict[str, float]:
+    """Connection reuse ratio per client, computed from the metrics counters"""
+    clients = sorted({key.split(".")[1] for key in metrics.snapshot() if key.startswith("http.")})
+    result = {}
+    for name in clients:
+        reused = metrics.get(f"http.{name}.connections_reused")
+        total = reused + metrics.get(f"http.{name}.connections_created")
+        result[f"http.{name}.connection_reuse_ratio"] = reused / total if total else 0.0
+    return result
@@ -0,0 +1,42 @@
+import os
+import re
+from typing import Optional
+
+from app.utils.persistent_cache import PersistentCache, MISSING
+
+IMAGE_CACHE_PATH = os.environ.get("IMAGE_CACHE_PATH", ".image_cache.sqlite")
+IMAGE_CACHE_MAX_ENTRIES = int(os.environ.get("IMAGE_CACHE_MAX_ENTRIES", "20000"))
+# Found images are kept for a month, misses are retried after a day
+IMAGE_CACHE_TTL = int(os.environ.get("IMAGE_CACHE_TTL", str(30 * 24 * 3600)))
+IMAGE_CACHE_NEGATIVE_TTL = int(os.environ.get("IMAGE_CACHE_NEGATIVE_TTL", str(24 * 3600)))
+
+image_cache = PersistentCache(IMAGE_CACHE_PATH, "images", max_entries=IMAGE_CACHE_MAX_ENTRIES)
+
+def normalize_cache_text(text: Optional[str]) -> str:
+    """Lowercase, strip punctuation and collapse whitespace so near-identical names share a key"""
+    if not text:
+        return ""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+def activity_image_key(title: str, location: str) -> str:
+    """Cache key for an activity image"""
+    return f"activity|{normalize_cache_text(title)}|{normalize_cache_text(location)}"
+
+def cuisine_image_key(cuisine: str, dish: Optional[str] = None) -> str:
+    """Cache key for a food image"""
+    return f"cuisine|{normalize_cache_text(cuisine)}|{normalize_cache_text(dish)}"
+
+def get_cached_image(key: str):
+    """
+    Look up an image URL.
+
+    Returns:
+        The URL, an empty string for a cached "no image found", or None on a miss
+    """
+    value = image_cache.get(key)
+    return None if value is MISSING else value
+
+def cache_image(key: str, url: str) -> None:
+    """Store an image URL, or an empty string to record that no image was found"""
+    image_cache.set(key, url or "", IMAGE_CACHE_TTL if url else IMAGE_CACHE_NEGATIVE_TTL)
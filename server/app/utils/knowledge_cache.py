@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import os
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from app.models.request import ItineraryRequest
+from app.utils.image_cache import normalize_cache_text
+from app.utils.metrics import metrics
+from app.utils.persistent_cache import PersistentCache, MISSING
+
+logger = logging.getLogger(__name__)
+
+KNOWLEDGE_CACHE_PATH = os.environ.get("KNOWLEDGE_CACHE_PATH", ".knowledge_cache.sqlite")
+KNOWLEDGE_CACHE_MAX_ENTRIES = int(os.environ.get("KNOWLEDGE_CACHE_MAX_ENTRIES", "5000"))
+# Journey geography barely changes; transport offers and schedules do
+CITY_PAIR_META_TTL = int(os.environ.get("CITY_PAIR_META_TTL", str(90 * 24 * 3600)))
+CITY_PAIR_TRANSPORT_TTL = int(os.environ.get("CITY_PAIR_TRANSPORT_TTL", str(14 * 24 * 3600)))
+# Stale-while-revalidate: past the soft TTL an entry is still served, but refreshed in the
+# background; past the hard TTL it is gone and the caller waits for a new one
+ESSENTIAL_INFO_SOFT_TTL = int(os.environ.get("ESSENTIAL_INFO_SOFT_TTL", str(7 * 24 * 3600)))
+ESSENTIAL_INFO_TTL = int(os.environ.get("ESSENTIAL_INFO_TTL", str(30 * 24 * 3600)))
+WEATHER_SOFT_TTL = int(os.environ.get("WEATHER_SOFT_TTL", str(3600)))
+WEATHER_TTL = int(os.environ.get("WEATHER_TTL", str(6 * 3600)))
+# Open-Meteo forecasts reach this many days ahead
+WEATHER_FORECAST_DAYS = 16
+
+# Generated knowledge that does not depend on the individual user, shared across requests
+knowledge_cache = PersistentCache(KNOWLEDGE_CACHE_PATH, "knowledge", max_entries=KNOWLEDGE_CACHE_MAX_ENTRIES)
+
+# One lock per key being generated or refreshed, dropped once nobody holds it
+_key_locks = weakref.WeakValueDictionary()
+# Background refreshes in flight, referenced so they are not garbage collected
+_refresh_tasks = set()
+# Keys with a background refresh in flight, marked before its task first runs
+_refreshing_keys = set()
+
+def traveler_shape(request: ItineraryRequest) -> str:
+    """Coarse party description (size bucket, with or without children) for cache keys"""
+    count = request.travelers.count
+    if count <= 1:
+        size = "solo"
+    elif count == 2:
+        size = "couple"
+    elif count <= 5:
+        size = "group"
+    else:
+        size = "large"
+    family = request.travelers.children > 0 or request.travelers.infants > 0
+    return f"{size}-family" if family else size
+
+def city_pair_key(kind: str, request: ItineraryRequest, with_travelers: bool = False) -> str:
+    """
+    Canonical cache key for knowledge about the journey from the base city to the destination.
+
+    Args:
+        kind: What is cached (e.g. "meta", "transport")
+        request: The itinerary request object
+        with_travelers: Include the traveler shape, for answers that depend on the party
+
+    Returns:
+        Key made of the normalized city pair and the travel month
+    """
+    month = request.dates.startDate[:7]
+    key = f"{kind}|{normalize_cache_text(request.location.baseCity)}|{normalize_cache_text(request.location.destination)}|{month}"
+    return f"{key}|{traveler_shape(request)}" if with_travelers else key
+
+def trip_key(kind: str, request: ItineraryRequest) -> str:
+    """Canonical cache key for knowledge about the city pair on the exact trip dates"""
+    return (
+        f"{kind}|{normalize_cache_text(request.location.baseCity)}|{normalize_cache_text(request.location.destination)}"
+        f"|{request.dates.startDate}|{request.dates.endDate}"
+    )
+
+def place_key(kind: str, place: str) -> str:
+    """Canonical cache key for knowledge about a single place"""
+    return f"{kind}|{normalize_cache_text(place)}"
+
+def _kind(key: str) -> str:
+    return key.split("|", 1)[0]
+
+def get_knowledge_entry(key: str) -> Tuple[Optional[Any], bool]:
+    """
+    Look up cached knowledge.
+
+    Returns:
+        Tuple of (value or None on a miss, whether the value is past its soft TTL)
+    """
+    entry = knowledge_cache.get(key)
+    if entry is MISSING or not isinstance(entry, dict) or "value" not in entry:
+        metrics.increment(f"knowledge.{_kind(key)}.misses")
+        return None, False
+    stale = entry.get("fresh_until", 0) < time.time()
+    metrics.increment(f"knowledge.{_kind(key)}.{'stale_hits' if stale else 'hits'}")
+    return entry["value"], stale
+
+def get_knowledge(key: str) -> Optional[Any]:
+    """Look up cached knowledge, stale or not, or None on a miss"""
+    return get_knowledge_entry(key)[0]
+
+def fresh_for(key: str) -> float:
+    """Seconds until a cached entry goes stale (0 if it is stale or missing), without counting a lookup"""
+    entry = knowledge_cache.get(key)
+    if entry is MISSING or not isinstance(entry, dict) or "value" not in entry:
+        return 0.0
+    return max(0.0, entry.get("fresh_until", 0) - time.time())
+
+def cache_knowledge(key: str, value: Any, ttl_seconds: float, soft_ttl_seconds: Optional[float] = None) -> None:
+    """
+    Store generated knowledge under a canonical key.
+
+    Args:
+        key: Canonical key
+        value: JSON-serializable value
+        ttl_seconds: Hard TTL, after which the entry is gone
+        soft_ttl_seconds: Soft TTL, after which the entry is served stale and refreshed
+            (defaults to the hard TTL)
+    """
+    soft_ttl = ttl_seconds if soft_ttl_seconds is None else min(soft_ttl_seconds, ttl_seconds)
+    knowledge_cache.set(key, {"value": value, "fresh_until": time.time() + soft_ttl}, ttl_seconds)
+
+def _key_lock(key: str) -> asyncio.Lock:
+    lock = _key_locks.get(key)
+    if lock is None:
+        lock = asyncio.Lock()
+        _key_locks[key] = lock
+    return lock
+
+def refresh_in_background(key: str, refresh: Callable[[], Awaitable[Any]]) -> bool:
+    """
+    Run a refresh for a key in the background, unless one is already running for it.
+
+    Args:
+        key: Canonical key the refresh updates
+        refresh: Coroutine function that regenerates and stores the knowledge
+
+    Returns:
+        True if a refresh was started
+    """
+    # The key is marked here rather than by the task, which only starts on a later loop
+    # iteration, so stale hits in the same iteration do not start a second refresh
+    if key in _refreshing_keys:
+        return False
+    _refreshing_keys.add(key)
+
+    async def run():
+        async with _key_lock(key):
+            try:
+                await refresh()
+                metrics.increment(f"knowledge.{_kind(key)}.refreshes")
+            except Exception as e:
+                logger.warning(f"Background refresh failed for {key}: {str(e)}")
+
+    def done(task):
+        _refresh_tasks.discard(task)
+        _refreshing_keys.discard(key)
+
+    task = asyncio.create_task(run())
+    _refresh_tasks.add(task)
+    task.add_done_callback(done)
+    return True
+
+async def get_or_generate(key: str, generate: Callable[[], Awaitable[Any]], ttl_seconds: float,
+                          soft_ttl_seconds: Optional[float] = None,
+                          cacheable: Optional[Callable[[Any], bool]] = None, refresh: bool = False) -> Any:
+    """
+    Serve knowledge from the cache with stale-while-revalidate semantics.
+
+    Fresh entries are returned as they are. Stale entries are returned immediately while
+    one background refresh per key regenerates them. On a miss the caller generates the
+    value under the key's lock, so concurrent misses share one generation.
+
+    Args:
+        key: Canonical key
+        generate: Coroutine function producing the value
+        ttl_seconds: Hard TTL
+        soft_ttl_seconds: Soft TTL (defaults to the hard TTL)
+        cacheable: Predicate deciding whether a generated value is worth caching
+        refresh: Regenerate the value even if a fresh one is cached
+
+    Returns:
+        The cached or generated value
+    """
+    async def generate_and_cache():
+        value = await generate()
+        if cacheable is None or cacheable(value):
+            cache_knowledge(key, value, ttl_seconds, soft_ttl_seconds)
+        return value
+
+    value, stale = (None, False) if refresh else get_knowledge_entry(key)
+    if value is not None:
+        if stale:
+            refresh_in_background(key, generate_and_cache)
+        return value
+
+    async with _key_lock(key):
+        # Another request may have generated it while this one waited for the lock
+        entry = knowledge_cache.get(key)
+        if not refresh and isinstance(entry, dict) and "value" in entry:
+            return entry["value"]
+        return await generate_and_cache()
@@ -0,0 +1,42 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Tuple
+
+class Counters:
+    """Thread-safe named counters exposed through the /metrics endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, float] = defaultdict(float)
+        self._ratios: Dict[str, Tuple[str, str]] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Add value to the named counter"""
+        with self._lock:
+            self._values[name] += value
+
+    def get(self, name: str) -> float:
+        """Current value of a counter (0 if it was never incremented)"""
+        with self._lock:
+            return self._values.get(name, 0)
+
+    def add_ratio(self, name: str, numerator: str, denominator: str) -> None:
+        """Report name as numerator / denominator in every snapshot"""
+        with self._lock:
+            self._ratios[name] = (numerator, denominator)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Copy of all counters and registered ratios, sorted by name"""
+        with self._lock:
+            values = dict(self._values)
+            for name, (numerator, denominator) in self._ratios.items():
+                total = self._values.get(denominator, 0)
+                values[name] = self._values.get(numerator, 0) / total if total else 0.0
+            return dict(sorted(values.items()))
+
+    def reset(self) -> None:
+        """Clear all counters"""
+        with self._lock:
+            self._values.clear()
+
+metrics = Counters()
@@ -0,0 +1,86 @@
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, FrozenSet
+
+# Words that vary between sources for the same property and carry no identity
+HOTEL_FILLER_WORDS = {
+    "the", "a", "an", "and", "by", "of", "at",
+    "hotel", "hotels", "resort", "resorts", "spa", "inn", "suites", "suite", "lodge"
+}
+
+# Tokens shared by more candidates than this are ignored when looking up candidates
+MAX_POSTING_LENGTH = 50
+
+def normalize_hotel_name(name: str) -> str:
+    """Lowercase, strip accents and punctuation, and drop filler words from a hotel name"""
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode("ascii")
+    words = re.sub(r"[^\w\s]", " ", text.lower()).split()
+    meaningful = [word for word in words if word not in HOTEL_FILLER_WORDS]
+    # A name made only of filler words ("The Hotel") keeps them rather than becoming empty
+    return " ".join(meaningful or words)
+
+def _tokens(normalized: str) -> FrozenSet[str]:
+    return frozenset(normalized.split())
+
+def match_names(left: List[str], right: List[str], threshold: float = 0.5) -> Dict[int, int]:
+    """
+    Match names from two sources one-to-one.
+
+    Names with the same normalized key are joined directly. The rest are compared by token
+    Jaccard similarity, looking only at candidates that share a token through an inverted
+    index, and assigned greedily from the most similar pair down.
+
+    Args:
+        left: Names from the first source
+        right: Names from the second source
+        threshold: Minimum similarity for a fuzzy match
+
+    Returns:
+        Dictionary mapping left index to matched right index
+    """
+    matches: Dict[int, int] = {}
+    left_keys = [normalize_hotel_name(name) for name in left]
+    right_keys = [normalize_hotel_name(name) for name in right]
+
+    exact = defaultdict(list)
+    for j, key in enumerate(right_keys):
+        if key:
+            exact[key].append(j)
+    used = set()
+    for i, key in enumerate(left_keys):
+        candidates = exact.get(key)
+        if candidates:
+            j = candidates.pop(0)
+            matches[i] = j
+            used.add(j)
+
+    right_tokens = {j: _tokens(key) for j, key in enumerate(right_keys) if j not in used and key}
+    postings = defaultdict(list)
+    for j, tokens in right_tokens.items():
+        for token in tokens:
+            postings[token].append(j)
+
+    pairs = []
+    for i, key in enumerate(left_keys):
+        if i in matches or not key:
+            continue
+        tokens = _tokens(key)
+        candidates = set()
+        for token in tokens:
+            posting = postings.get(token, ())
+            if len(posting) <= MAX_POSTING_LENGTH:
+                candidates.update(posting)
+        for j in candidates:
+            other = right_tokens[j]
+            similarity = len(tokens & other) / len(tokens | other)
+            if similarity >= threshold:
+                pairs.append((similarity, i, j))
+
+    pairs.sort(key=lambda pair: (-pair[0], pair[1], pair[2]))
+    for similarity, i, j in pairs:
+        if i not in matches and j not in used:
+            matches[i] = j
+            used.add(j)
+
+    return matches
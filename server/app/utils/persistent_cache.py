@@ -0,0 +1,177 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sentinel returned by PersistentCache.get on a miss, so cached empty values can be told apart
+MISSING = object()
+
+# Access times recorded by hits are written in batches of this many, or once this old
+ACCESS_FLUSH_BATCH = 200
+ACCESS_FLUSH_SECONDS = 30.0
+
+class PersistentCache:
+    """
+    Small SQLite-backed key/value cache with per-entry TTLs and size-based eviction.
+
+    Values are stored as JSON. When the number of entries grows past max_entries the
+    least recently used entries are evicted.
+
+    Hits only read: their access times are kept in memory and written in batches, and
+    the database runs in WAL mode without a sync per commit, so a lookup on the event
+    loop never waits for the disk.
+    """
+
+    def __init__(self, path: str, namespace: str, max_entries: int = 10000):
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes_since_eviction = 0
+        # Access times of hits not written yet, by key
+        self._pending_access: Dict[str, float] = {}
+        self._last_access_flush = time.time()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL lets readers and the writer work concurrently; NORMAL syncs at checkpoints
+        # instead of on every commit, which can only lose the last writes on a power cut
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "namespace TEXT NOT NULL, "
+            "key TEXT NOT NULL, "
+            "value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, "
+            "accessed_at REAL NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS cache_entries_accessed ON cache_entries (namespace, accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Any:
+        """
+        Look up a key.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or MISSING if the key is absent or expired
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)
+                ).fetchone()
+                if row is None:
+                    return MISSING
+                if row[1] < now:
+                    # Expired entries are removed by the next eviction
+                    return MISSING
+                self._pending_access[key] = now
+                if (len(self._pending_access) >= ACCESS_FLUSH_BATCH
+                        or now - self._last_access_flush >= ACCESS_FLUSH_SECONDS):
+                    self._flush_access_times()
+            return json.loads(row[0])
+        except Exception as e:
+            logger.warning(f"Cache read failed for {self.namespace}:{key}: {str(e)}")
+            return MISSING
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        """
+        Store a value.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            ttl_seconds: Time to live in seconds
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (self.namespace, key, json.dumps(value), now + ttl_seconds, now)
+                )
+                self._pending_access.pop(key, None)
+                self._conn.commit()
+
+                # Evict in batches rather than on every write
+                self._writes_since_eviction += 1
+                if self._writes_since_eviction >= max(1, self.max_entries // 100):
+                    self._evict()
+                    self._writes_since_eviction = 0
+        except Exception as e:
+            logger.warning(f"Cache write failed for {self.namespace}:{key}: {str(e)}")
+
+    def delete(self, key: str) -> None:
+        """Remove a key from the cache"""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+            self._pending_access.pop(key, None)
+            self._conn.commit()
+
+    def items(self) -> List[Tuple[str, Any]]:
+        """All unexpired (key, value) pairs, without touching their access times"""
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT key, value FROM cache_entries WHERE namespace = ? AND expires_at >= ?",
+                    (self.namespace, time.time())
+                ).fetchall()
+            return [(key, json.loads(value)) for key, value in rows]
+        except Exception as e:
+            logger.warning(f"Cache scan failed for {self.namespace}: {str(e)}")
+            return []
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+
+    def _flush_access_times(self) -> None:
+        """Write the access times recorded by hits (called with the lock held)"""
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                [(accessed_at, self.namespace, key) for key, accessed_at in self._pending_access.items()]
+            )
+            self._conn.commit()
+            self._pending_access.clear()
+        self._last_access_flush = time.time()
+
+    def _evict(self) -> None:
+        """Drop expired entries, then the least recently used ones beyond max_entries"""
+        # Recency has to be up to date before choosing what to evict
+        self._flush_access_times()
+        self._conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND expires_at < ?", (self.namespace, time.time())
+        )
+        count = self._conn.execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE rowid IN ("
+                "SELECT rowid FROM cache_entries WHERE namespace = ? ORDER BY accessed_at ASC LIMIT ?)",
+                (self.namespace, overflow)
+            )
+            logger.info(f"Evicted {overflow} entries from the {self.namespace} cache")
+        self._conn.commit()
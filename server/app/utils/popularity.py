@@ -0,0 +1,113 @@
+import hashlib
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Counts are stored scaled up by exp(decay_rate * (now - epoch)) so decaying them costs nothing;
+# past this scale they are folded back down to keep the floats in range
+RESCALE_THRESHOLD = 1e12
+
+class DecayedCountMinSketch:
+    """
+    Count-min sketch whose counts decay exponentially with a configurable half-life.
+
+    Estimates never undercount; with conservative updates the overcount stays small
+    for the few heavy keys that matter here.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4, half_life_seconds: float = 3 * 24 * 3600):
+        self.width = width
+        self.depth = depth
+        self._decay_rate = math.log(2) / half_life_seconds
+        self._counts = np.zeros((depth, width), dtype=np.float64)
+        self._rows = np.arange(depth)
+        self._epoch = time.time()
+        self._lock = threading.Lock()
+
+    def _columns(self, key: str) -> np.ndarray:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8 * self.depth).digest()
+        return (np.frombuffer(digest, dtype=np.uint64) % np.uint64(self.width)).astype(np.intp)
+
+    def _scale(self, now: float) -> float:
+        scale = math.exp(self._decay_rate * (now - self._epoch))
+        if scale > RESCALE_THRESHOLD:
+            self._counts /= scale
+            self._epoch = now
+            scale = 1.0
+        return scale
+
+    def add(self, key: str, count: float = 1.0, now: Optional[float] = None) -> float:
+        """
+        Count an occurrence of key.
+
+        Returns:
+            The decayed estimate for key after the update
+        """
+        columns = self._columns(key)
+        with self._lock:
+            scale = self._scale(now or time.time())
+            cells = self._counts[self._rows, columns]
+            # Conservative update: only raise the cells that are below the new estimate
+            estimate = cells.min() + count * scale
+            self._counts[self._rows, columns] = np.maximum(cells, estimate)
+            return float(estimate / scale)
+
+    def estimate(self, key: str, now: Optional[float] = None) -> float:
+        """Decayed number of occurrences of key, never below the true decayed count"""
+        columns = self._columns(key)
+        with self._lock:
+            scale = self._scale(now or time.time())
+            return float(self._counts[self._rows, columns].min() / scale)
+
+class PopularityTracker:
+    """
+    Top-K heavy hitters over a decayed count-min sketch.
+
+    The sketch counts every key; only the most popular candidates are kept by name,
+    each with the latest payload recorded for it (e.g. a representative request).
+    """
+
+    def __init__(self, capacity: int, width: int = 2048, depth: int = 4,
+                 half_life_seconds: float = 3 * 24 * 3600):
+        self.capacity = capacity
+        self.sketch = DecayedCountMinSketch(width, depth, half_life_seconds)
+        self._candidates: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, payload: Any = None, now: Optional[float] = None) -> float:
+        """
+        Count a request for key and remember its payload while key is a candidate.
+
+        Returns:
+            The decayed estimate for key
+        """
+        now = now or time.time()
+        estimate = self.sketch.add(key, now=now)
+        with self._lock:
+            self._candidates[key] = payload
+            if len(self._candidates) > self.capacity:
+                coldest = min(self._candidates, key=lambda candidate: self.sketch.estimate(candidate, now))
+                del self._candidates[coldest]
+        return estimate
+
+    def top(self, k: int, min_count: float = 0.0, now: Optional[float] = None) -> List[Tuple[str, float, Any]]:
+        """
+        Most popular keys right now.
+
+        Args:
+            k: Number of keys to return
+            min_count: Decayed count a key needs to be returned
+
+        Returns:
+            List of (key, decayed count, payload), most popular first
+        """
+        now = now or time.time()
+        with self._lock:
+            candidates = list(self._candidates.items())
+        ranked = [(key, self.sketch.estimate(key, now), payload) for key, payload in candidates]
+        ranked = [entry for entry in ranked if entry[1] >= min_count]
+        ranked.sort(key=lambda entry: entry[1], reverse=True)
+        return ranked[:k]
@@ -0,0 +1,215 @@
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Character n-gram lengths taken from every field
+NGRAM_SIZES = (3, 4)
+# Hashed feature columns per field; fields never share columns
+FIELD_DIMENSIONS = 512
+
+# Weight of each canonical request field in the similarity. The place name (text before
+# the first comma) decides most of it, so "Manali, India" and "Manali, Himachal" stay close.
+FIELD_WEIGHTS = {
+    "place": 4.0,
+    "region": 0.5,
+    "base_city": 1.0,
+    "trip_style": 1.0,
+    "interests": 1.0,
+    "travel_style": 0.5,
+    "pace": 0.5
+}
+FIELDS = tuple(FIELD_WEIGHTS)
+
+def request_fields(canonical: Dict[str, Any], destination: str) -> Dict[str, str]:
+    """
+    Texts compared between requests, by field.
+
+    Args:
+        canonical: Canonical request (see response_cache.canonical_request)
+        destination: Destination as requested; its first comma-separated part is the place
+
+    Returns:
+        Text by FIELDS name
+    """
+    place, _, region = destination.partition(",")
+    return {
+        "place": " ".join(place.casefold().split()),
+        "region": " ".join(region.casefold().replace(",", " ").split()),
+        "base_city": canonical.get("base_city") or "",
+        "trip_style": " ".join(canonical.get("trip_style") or []),
+        "interests": " ".join(canonical.get("interests") or []),
+        "travel_style": " ".join(canonical.get("travel_style") or []),
+        "pace": canonical.get("pace") or ""
+    }
+
+def char_ngrams(text: str) -> List[str]:
+    """Character n-grams of each word, padded so word starts and ends count"""
+    grams = []
+    for word in text.split():
+        padded = f" {word} "
+        for size in NGRAM_SIZES:
+            grams.extend(padded[i:i + size] for i in range(max(1, len(padded) - size + 1)))
+    return grams
+
+def term_frequencies(fields: Dict[str, str]) -> np.ndarray:
+    """
+    Sublinear term frequencies of a request's hashed n-grams, one block of
+    FIELD_DIMENSIONS columns per field.
+    """
+    counts = np.zeros(len(FIELDS) * FIELD_DIMENSIONS, dtype=np.float32)
+    for block, field in enumerate(FIELDS):
+        for gram in char_ngrams(fields.get(field, "")):
+            counts[block * FIELD_DIMENSIONS + zlib.crc32(gram.encode("utf-8")) % FIELD_DIMENSIONS] += 1
+    nonzero = counts > 0
+    counts[nonzero] = 1 + np.log(counts[nonzero])
+    return counts
+
+class SimilarityIndex:
+    """
+    Bounded in-memory TF-IDF index over canonical requests.
+
+    Rows live in preallocated arrays of a fixed capacity, so adding or removing a request
+    never copies the others; once full, the oldest request makes room. Each row keeps its
+    raw term frequencies and its embedding: every field L2-normalized on its own and
+    scaled by the square root of its weight, so the similarity of two requests is the
+    weighted mean of their per-field cosines, over the fields either of them has.
+
+    IDF is smoothed against the capacity rather than the current size, so indexing a
+    request only changes the weights of its own n-grams; only the rows sharing those
+    n-grams are re-embedded, on the next search. Expired rows are pruned on every add
+    and search.
+    """
+
+    def __init__(self, capacity: int = 500):
+        self.capacity = max(1, capacity)
+        columns = len(FIELDS) * FIELD_DIMENSIONS
+        self._frequencies = np.zeros((self.capacity, columns), dtype=np.float32)
+        self._vectors = np.zeros((self.capacity, len(FIELDS), FIELD_DIMENSIONS), dtype=np.float32)
+        self._present = np.zeros((self.capacity, len(FIELDS)), dtype=bool)
+        self._active = np.zeros(self.capacity, dtype=bool)
+        self._expires_at = np.full(self.capacity, np.inf)
+        # Insertion order of each row, oldest evicted first
+        self._added = np.zeros(self.capacity, dtype=np.int64)
+        self._insertions = 0
+        self._keys: List[Optional[str]] = [None] * self.capacity
+        self._payloads: List[Any] = [None] * self.capacity
+        self._rows: Dict[str, int] = {}
+        self._document_frequency = np.zeros(columns, dtype=np.float32)
+        # Columns whose document frequency changed since the rows using them were embedded
+        self._changed = np.zeros(columns, dtype=bool)
+        self._weights = np.sqrt(np.asarray([FIELD_WEIGHTS[field] for field in FIELDS], dtype=np.float32))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def add(self, key: str, fields: Dict[str, str], payload: Any = None,
+            expires_at: Optional[float] = None) -> None:
+        """
+        Index a request's fields under key, replacing an earlier entry with that key.
+
+        Args:
+            key: Entry key
+            fields: Fields of the request (see request_fields)
+            payload: Returned with the entry by search
+            expires_at: Unix time after which the entry is pruned (never when not given)
+        """
+        self.remove(key)
+        self.prune()
+        if len(self._rows) >= self.capacity:
+            oldest = np.where(self._active, self._added, np.iinfo(np.int64).max)
+            self._remove_row(int(np.argmin(oldest)))
+
+        row = int(np.flatnonzero(~self._active)[0])
+        frequencies = term_frequencies(fields)
+        self._frequencies[row] = frequencies
+        self._document_frequency += frequencies > 0
+        self._changed |= frequencies > 0
+        self._active[row] = True
+        self._expires_at[row] = np.inf if expires_at is None else expires_at
+        self._added[row] = self._insertions
+        self._insertions += 1
+        self._keys[row] = key
+        self._payloads[row] = payload
+        self._rows[key] = row
+
+    def remove(self, key: str) -> None:
+        row = self._rows.get(key)
+        if row is not None:
+            self._remove_row(row)
+
+    def _remove_row(self, row: int) -> None:
+        used = self._frequencies[row] > 0
+        self._document_frequency -= used
+        self._changed |= used
+        self._frequencies[row] = 0
+        self._vectors[row] = 0
+        self._present[row] = False
+        self._active[row] = False
+        self._expires_at[row] = np.inf
+        del self._rows[self._keys[row]]
+        self._keys[row] = None
+        self._payloads[row] = None
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Drop expired entries, returning how many were dropped"""
+        expired = np.flatnonzero(self._active & (self._expires_at < (now or time.time())))
+        for row in expired:
+            self._remove_row(int(row))
+        return len(expired)
+
+    def _idf(self) -> np.ndarray:
+        # Smoothed IDF, so n-grams most requests share (common regions, "moderate" pace) count for less
+        return np.log((1 + self.capacity) / (1 + self._document_frequency)) + 1
+
+    def _embed(self, frequencies: np.ndarray, idf: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """TF-IDF vectors with each field block normalized and weighted, and which fields are present"""
+        vectors = (frequencies * idf).reshape(-1, len(FIELDS), FIELD_DIMENSIONS)
+        norms = np.linalg.norm(vectors, axis=2, keepdims=True)
+        present = norms[..., 0] > 0
+        vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+        return vectors * self._weights[None, :, None], present
+
+    def _refresh(self, idf: np.ndarray) -> None:
+        """Re-embed the rows using n-grams whose document frequency changed"""
+        if not self._changed.any():
+            return
+        stale = np.flatnonzero(self._active & (self._frequencies[:, self._changed] > 0).any(axis=1))
+        if len(stale):
+            self._vectors[stale], self._present[stale] = self._embed(self._frequencies[stale], idf)
+        self._changed[:] = False
+
+    def search(self, fields: Dict[str, str], limit: int = 5, threshold: float = 0.0) -> List[Tuple[str, float, Any]]:
+        """
+        Most similar indexed requests.
+
+        Args:
+            fields: Fields of the request to match
+            limit: Most results returned
+            threshold: Lowest similarity returned, from 0 to 1
+
+        Returns:
+            List of (key, similarity, payload), most similar first
+        """
+        self.prune()
+        if not self._rows:
+            return []
+        idf = self._idf()
+        self._refresh(idf)
+        query, query_present = self._embed(term_frequencies(fields)[None, :], idf)
+
+        rows = np.flatnonzero(self._active)
+        products = np.einsum("fd,nfd->n", query[0], self._vectors[rows])
+        # A field only one side has counts as a mismatch rather than being ignored
+        either = (self._present[rows] | query_present) * (self._weights ** 2)[None, :]
+        similarities = products / np.maximum(either.sum(axis=1), 1e-9)
+
+        order = np.argsort(-similarities)[:limit]
+        return [
+            (self._keys[rows[position]], float(similarities[position]), self._payloads[rows[position]])
+            for position in order if similarities[position] >= threshold
+        ]
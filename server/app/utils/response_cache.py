@@ -0,0 +1,317 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.models.request import ItineraryRequest
+from app.utils.image_cache import normalize_cache_text
+from app.utils.knowledge_cache import WEATHER_FORECAST_DAYS, WEATHER_TTL
+from app.utils.metrics import metrics
+from app.utils.persistent_cache import PersistentCache, MISSING
+from app.utils.request_vectors import SimilarityIndex, request_fields
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_PATH = os.environ.get("RESPONSE_CACHE_PATH", ".response_cache.sqlite")
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "500"))
+# Itineraries for trips beyond the forecast range are kept this long, never past the trip start
+RESPONSE_CACHE_MAX_TTL = int(os.environ.get("RESPONSE_CACHE_MAX_TTL", str(3 * 24 * 3600)))
+# Bumped whenever the canonical form or the itinerary format changes
+FINGERPRINT_VERSION = 1
+# Cache name reported in the Cache-Status header (RFC 9211)
+CACHE_STATUS_NAME = "itinerary-api"
+
+# Near-duplicate requests: a cached itinerary for a request at least this similar (0-1) is
+# re-fitted to the new dates and party instead of generating one
+SIMILAR_REQUESTS_ENABLED = os.environ.get("SIMILAR_REQUESTS_ENABLED", "true").lower() == "true"
+SIMILAR_REQUEST_THRESHOLD = float(os.environ.get("SIMILAR_REQUEST_THRESHOLD", "0.85"))
+# How far a re-fitted trip may move in time, and how much the party and budget may change
+SIMILAR_MAX_DATE_SHIFT_DAYS = int(os.environ.get("SIMILAR_MAX_DATE_SHIFT_DAYS", "7"))
+SIMILAR_MAX_TRAVELER_DIFFERENCE = int(os.environ.get("SIMILAR_MAX_TRAVELER_DIFFERENCE", "2"))
+SIMILAR_MAX_BUDGET_RATIO = float(os.environ.get("SIMILAR_MAX_BUDGET_RATIO", "1.25"))
+
+response_cache = PersistentCache(RESPONSE_CACHE_PATH, "responses", max_entries=RESPONSE_CACHE_MAX_ENTRIES)
+# Canonical form of each generated itinerary's request, for the similarity index
+similar_request_cache = PersistentCache(RESPONSE_CACHE_PATH, "similar_requests", max_entries=RESPONSE_CACHE_MAX_ENTRIES)
+
+# Built from similar_request_cache on first use
+_similarity_index: Optional[SimilarityIndex] = None
+
+# Generations in flight by fingerprint, so concurrent identical requests share one
+_in_flight: Dict[str, asyncio.Task] = {}
+
+def _text(value: Optional[str]) -> Optional[str]:
+    """Collapse whitespace and case; empty text counts as missing"""
+    text = " ".join((value or "").split()).casefold()
+    return text or None
+
+def _terms(values: Optional[List[str]]) -> List[str]:
+    """Normalized, deduplicated and sorted list, so order and spelling variants do not matter"""
+    return sorted({normalize_cache_text(value) for value in values or [] if normalize_cache_text(value)})
+
+def canonical_request(request: ItineraryRequest) -> Dict[str, Any]:
+    """
+    Canonical form of an itinerary request: requests that mean the same trip (differing
+    only in list order, whitespace, case or punctuation of names) map to the same form.
+    """
+    preferences = request.preferences
+    accessibility = preferences.accessibility
+    needs = {
+        "mobility": accessibility.mobilityNeeds,
+        "hearing": accessibility.hearingNeeds,
+        "vision": accessibility.visionNeeds,
+        "dietary": accessibility.dietaryRestrictions,
+        "notes": _text(accessibility.notes)
+    } if accessibility else {}
+
+    return {
+        "destination": normalize_cache_text(request.location.destination),
+        "base_city": normalize_cache_text(request.location.baseCity),
+        "start": request.dates.startDate.strip(),
+        "end": request.dates.endDate.strip(),
+        "flexible": request.dates.isFlexible,
+        "travelers": [request.travelers.count, request.travelers.adults, request.travelers.children, request.travelers.infants],
+        "budget": [request.budget.ceiling, request.budget.currency.strip().upper()] if request.budget else None,
+        "trip_style": _terms(request.tripStyle),
+        "interests": _terms(preferences.interests),
+        "travel_style": _terms(preferences.travelStyle),
+        "dietary": _terms(preferences.dietaryPreferences),
+        "pace": normalize_cache_text(preferences.pace),
+        # An accessibility block without any need is the same as none
+        "accessibility": needs if any(needs.values()) else None,
+        "context": _text(request.additionalContext)
+    }
+
+def request_fingerprint(request: ItineraryRequest) -> str:
+    """Stable fingerprint of a request's canonical form"""
+    canonical = json.dumps([FINGERPRINT_VERSION, canonical_request(request)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+def response_ttl(request: ItineraryRequest, now: Optional[float] = None) -> float:
+    """
+    How long an itinerary for this request may be reused, in seconds.
+
+    Trips within the forecast range embed a live forecast, so their itineraries expire
+    like forecasts; later trips keep theirs up to RESPONSE_CACHE_MAX_TTL. Nothing is
+    reused past the trip start, and trips already under way are not cached.
+    """
+    try:
+        start = datetime.strptime(request.dates.startDate.strip(), "%Y-%m-%d").timestamp()
+    except ValueError:
+        return 0.0
+    until_start = start - (now or time.time())
+    if until_start <= 0:
+        return 0.0
+    ttl = WEATHER_TTL if until_start <= WEATHER_FORECAST_DAYS * 24 * 3600 else RESPONSE_CACHE_MAX_TTL
+    return min(ttl, until_start)
+
+def cache_status(hit: bool, ttl: Optional[float] = None, stored: bool = False, collapsed: bool = False,
+                 detail: Optional[str] = None) -> str:
+    """Cache-Status header value (RFC 9211)"""
+    parts = [CACHE_STATUS_NAME]
+    if hit:
+        parts.append("hit")
+    else:
+        parts.append("fwd=uri-miss")
+        if stored:
+            parts.append("stored")
+        if collapsed:
+            parts.append("collapsed")
+    if ttl is not None:
+        parts.append(f"ttl={int(ttl)}")
+    if detail:
+        parts.append(f"detail={detail}")
+    return "; ".join(parts)
+
+def get_cached_response(fingerprint: str) -> Tuple[Optional[Any], float]:
+    """
+    Look up a cached itinerary.
+
+    Returns:
+        Tuple of (itinerary or None on a miss, seconds it stays cached)
+    """
+    entry = response_cache.get(fingerprint)
+    if entry is MISSING or not isinstance(entry, dict) or "response" not in entry:
+        return None, 0.0
+    return entry["response"], max(0.0, entry["expires_at"] - time.time())
+
+def cache_response(fingerprint: str, response: Any, ttl_seconds: float) -> None:
+    response_cache.set(fingerprint, {"response": response, "expires_at": time.time() + ttl_seconds}, ttl_seconds)
+
+def _trip_dates(canonical: Dict[str, Any]) -> Optional[Tuple[datetime, int]]:
+    """Start date and length in days of a canonical request's trip"""
+    try:
+        start = datetime.strptime(canonical["start"], "%Y-%m-%d")
+        end = datetime.strptime(canonical["end"], "%Y-%m-%d")
+    except (KeyError, ValueError):
+        return None
+    return start, (end - start).days
+
+def refittable(source: Dict[str, Any], target: Dict[str, Any]) -> bool:
+    """
+    Whether an itinerary generated for the canonical request source can be re-fitted to
+    target: the same trip length starting at most SIMILAR_MAX_DATE_SHIFT_DAYS apart, a
+    party of the same kind and about the same size, a comparable budget in the same
+    currency, and identical dietary, accessibility and free-text requirements.
+    """
+    if any(source.get(field) != target.get(field) for field in ("flexible", "dietary", "accessibility", "context")):
+        return False
+
+    source_dates, target_dates = _trip_dates(source), _trip_dates(target)
+    if source_dates is None or target_dates is None or source_dates[1] != target_dates[1]:
+        return False
+    if abs((target_dates[0] - source_dates[0]).days) > SIMILAR_MAX_DATE_SHIFT_DAYS:
+        return False
+
+    source_count, _, source_children, source_infants = source["travelers"]
+    target_count, _, target_children, target_infants = target["travelers"]
+    if (source_children + source_infants > 0) != (target_children + target_infants > 0):
+        return False
+    if abs(target_count - source_count) > SIMILAR_MAX_TRAVELER_DIFFERENCE:
+        return False
+
+    if source["budget"] is None or target["budget"] is None:
+        return source["budget"] == target["budget"]
+    (source_ceiling, source_currency), (target_ceiling, target_currency) = source["budget"], target["budget"]
+    if source_currency != target_currency or min(source_ceiling, target_ceiling) <= 0:
+        return False
+    return max(source_ceiling, target_ceiling) / min(source_ceiling, target_ceiling) <= SIMILAR_MAX_BUDGET_RATIO
+
+def _get_similarity_index() -> SimilarityIndex:
+    global _similarity_index
+    if _similarity_index is None:
+        index = SimilarityIndex(RESPONSE_CACHE_MAX_ENTRIES)
+        for fingerprint, entry in similar_request_cache.items():
+            index.add(
+                fingerprint, request_fields(entry["request"], entry["destination"]), entry["request"],
+                entry.get("expires_at")
+            )
+        _similarity_index = index
+    return _similarity_index
+
+def remember_request(fingerprint: str, request: ItineraryRequest, ttl_seconds: float) -> None:
+    """Make a cached itinerary's request findable by similar requests"""
+    canonical = canonical_request(request)
+    destination = request.location.destination
+    expires_at = time.time() + ttl_seconds
+    similar_request_cache.set(
+        fingerprint, {"request": canonical, "destination": destination, "expires_at": expires_at}, ttl_seconds
+    )
+    _get_similarity_index().add(fingerprint, request_fields(canonical, destination), canonical, expires_at)
+
+def find_similar_response(request: ItineraryRequest) -> Optional[Tuple[Dict[str, Any], Dict[str, Any], float, float]]:
+    """
+    Cached itinerary of the most similar earlier request that can be re-fitted to this one.
+
+    Returns:
+        Tuple of (itinerary, canonical form of its request, seconds it stays cached,
+        similarity), or None
+    """
+    index = _get_similarity_index()
+    target = canonical_request(request)
+    matches = index.search(
+        request_fields(target, request.location.destination), limit=5, threshold=SIMILAR_REQUEST_THRESHOLD
+    )
+    for fingerprint, similarity, source in matches:
+        if not refittable(source, target):
+            continue
+        cached, remaining = get_cached_response(fingerprint)
+        if cached is None:
+            # Expired or evicted since it was indexed
+            index.remove(fingerprint)
+            similar_request_cache.delete(fingerprint)
+            continue
+        return cached, source, remaining, similarity
+    return None
+
+def _finish_flight(flight_key: str, task: asyncio.Task) -> None:
+    _in_flight.pop(flight_key, None)
+    # Mark a failure as seen even if every caller gave up waiting for it
+    if not task.cancelled():
+        task.exception()
+
+async def get_or_generate_response(request: ItineraryRequest, generate: Callable[[], Awaitable[Dict[str, Any]]],
+                                   store: bool = True, shared_key: str = "",
+                                   refit: Optional[Callable[[Dict[str, Any], Dict[str, Any], ItineraryRequest],
+                                                            Awaitable[Optional[Dict[str, Any]]]]] = None
+                                   ) -> Tuple[Dict[str, Any], str]:
+    """
+    Serve an itinerary from the response cache, re-fit the cached itinerary of a
+    near-duplicate request, or generate it once for all concurrent identical requests.
+
+    Args:
+        request: The itinerary request object
+        generate: Coroutine function generating the itinerary
+        store: Whether a generated itinerary may be cached
+        shared_key: Extra key part for in-flight sharing, for requests that are answered
+            alike from the cache but generated differently
+        refit: Coroutine function adapting a cached itinerary (and the canonical form of
+            its request) to this request, returning None when it cannot
+
+    Returns:
+        Tuple of (itinerary, Cache-Status header value)
+    """
+    fingerprint = request_fingerprint(request)
+    cached, remaining = get_cached_response(fingerprint)
+    if cached is not None:
+        metrics.increment("responses.hits")
+        return cached, cache_status(True, ttl=remaining)
+
+    flight_key = f"{fingerprint}|{shared_key}"
+    task = _in_flight.get(flight_key)
+    collapsed = task is not None
+    if task is None:
+        async def reuse_similar(ttl: float) -> Optional[Tuple[Dict[str, Any], float]]:
+            similar = find_similar_response(request)
+            if similar is None:
+                return None
+            cached, source, remaining, similarity = similar
+            try:
+                itinerary = await refit(cached, source, request)
+            except Exception as e:
+                logger.warning(f"Could not re-fit a similar itinerary for {request.location.destination}: {str(e)}")
+                return None
+            if not itinerary:
+                return None
+            # The reused components are as old as the source itinerary, so expire with it.
+            # A re-fitted itinerary holds no in-process image ids, so it is cached whatever
+            # store says; it is not indexed, so re-fits never drift from a re-fit
+            ttl = min(ttl, remaining)
+            cache_response(fingerprint, itinerary, ttl)
+            metrics.increment("responses.similar_hits")
+            logger.info(f"Re-fitted a cached itinerary ({similarity:.2f} similar) for {request.location.destination}")
+            return itinerary, ttl
+
+        async def generate_and_store():
+            ttl = response_ttl(request)
+            if refit is not None and SIMILAR_REQUESTS_ENABLED and ttl > 0:
+                reused = await reuse_similar(ttl)
+                if reused is not None:
+                    return reused[0], reused[1], True
+
+            itinerary = await generate()
+            ttl = response_ttl(request)
+            if store and ttl > 0 and itinerary.get("itinerary"):
+                cache_response(fingerprint, itinerary, ttl)
+                remember_request(fingerprint, request, ttl)
+                metrics.increment("responses.stored")
+                return itinerary, ttl, False
+            return itinerary, None, False
+
+        # Generation runs as its own task so a caller giving up does not cancel it for the others
+        task = asyncio.create_task(generate_and_store())
+        _in_flight[flight_key] = task
+        task.add_done_callback(lambda done: _finish_flight(flight_key, done))
+        metrics.increment("responses.misses")
+    else:
+        metrics.increment("responses.collapsed")
+        logger.info(f"Joining the in-flight generation for {request.location.destination}")
+
+    itinerary, ttl, similar = await asyncio.shield(task)
+    if similar:
+        return itinerary, cache_status(True, ttl=ttl, detail="similar")
+    return itinerary, cache_status(False, ttl=ttl, stored=ttl is not None, collapsed=collapsed)
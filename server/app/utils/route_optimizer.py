@@ -0,0 +1,112 @@
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on 2-opt improvement passes per route
+MAX_TWO_OPT_PASSES = 20
+
+def route_length(distances: np.ndarray, points: List[Optional[int]]) -> float:
+    """
+    Length of a route visiting points in order.
+
+    Args:
+        distances: Square distance matrix
+        points: Point index per stop; None for stops without coordinates, which add no distance
+
+    Returns:
+        Total distance in the units of the matrix
+    """
+    total = 0.0
+    for a, b in zip(points, points[1:]):
+        if a is not None and b is not None:
+            total += distances[a, b]
+    return float(total)
+
+def _nearest_neighbour(distances: np.ndarray, points: List[Optional[int]], movable: List[bool],
+                       allowed: Optional[np.ndarray] = None) -> Optional[List[int]]:
+    """
+    Fill movable positions in order, each with the remaining stop closest to its neighbours.
+
+    Returns None if some position is left with no remaining stop allowed there.
+    """
+    order = list(range(len(points)))
+    remaining = [position for position, can_move in enumerate(movable) if can_move]
+    previous = None
+    for position in range(len(points)):
+        if movable[position]:
+            # Look ahead to the next stop if it is anchored, so a stop near it is kept for last
+            following = position + 1
+            next_point = points[following] if following < len(points) and not movable[following] else None
+
+            def cost(candidate):
+                point = points[candidate]
+                return (
+                    (distances[previous, point] if previous is not None else 0.0) +
+                    (distances[point, next_point] if next_point is not None else 0.0)
+                )
+
+            candidates = [stop for stop in remaining if allowed is None or allowed[position, stop]]
+            if not candidates:
+                return None
+            chosen = min(candidates, key=cost) if previous is not None or next_point is not None else candidates[0]
+            remaining.remove(chosen)
+            order[position] = chosen
+        previous = points[order[position]]
+    return order
+
+def order_stops(distances: np.ndarray, points: List[Optional[int]], movable: List[bool],
+                allowed: Optional[np.ndarray] = None) -> Tuple[List[int], float, float]:
+    """
+    Reorder a day's stops to shorten the route, keeping anchored stops (e.g. meals) in place.
+
+    Movable stops are first placed with a nearest neighbour pass, then improved with 2-opt
+    moves (reversing the stops held by a run of movable positions) until no move helps.
+
+    Args:
+        distances: Square distance matrix between points
+        points: Point index per stop, in schedule order; None for stops without coordinates
+        movable: Whether each stop may move to another movable position
+        allowed: Optional square boolean matrix; allowed[k, s] says whether the stop at
+            original position s may be placed at position k (the diagonal must be True)
+
+    Returns:
+        Tuple of (order, original_length, optimized_length) where order[k] is the original
+        position of the stop placed at position k
+    """
+    original_length = route_length(distances, points)
+    slots = [position for position, can_move in enumerate(movable) if can_move]
+    if len(slots) < 2:
+        return list(range(len(points))), original_length, original_length
+
+    def length(order):
+        return route_length(distances, [points[position] for position in order])
+
+    def fits(order):
+        return allowed is None or all(allowed[slot, order[slot]] for slot in slots)
+
+    order = _nearest_neighbour(distances, points, movable, allowed)
+    best = length(order) if order is not None else original_length
+    if order is None or best > original_length:
+        order, best = list(range(len(points))), original_length
+
+    for _ in range(MAX_TWO_OPT_PASSES):
+        improved = False
+        for i in range(len(slots) - 1):
+            for j in range(i + 1, len(slots)):
+                candidate = list(order)
+                reversed_stops = [order[slot] for slot in slots[i:j + 1]][::-1]
+                for slot, stop in zip(slots[i:j + 1], reversed_stops):
+                    candidate[slot] = stop
+                if not fits(candidate):
+                    continue
+                candidate_length = length(candidate)
+                if candidate_length < best - 1e-9:
+                    order, best = candidate, candidate_length
+                    improved = True
+        if not improved:
+            break
+
+    return order, original_length, best
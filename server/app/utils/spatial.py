@@ -0,0 +1,273 @@
+import logging
+import math
+import re
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.helpers import haversine_distances
+
+logger = logging.getLogger(__name__)
+
+KM_PER_DEGREE_LAT = 111.32
+
+# Limits for the per-destination indexes kept across requests
+MAX_DESTINATION_INDEXES = 200
+MAX_VENUES_PER_DESTINATION = 2000
+
+def venue_name(venue: Dict[str, Any]) -> str:
+    """Display name of an activity, restaurant or hotel"""
+    return venue.get("title") or venue.get("name") or ""
+
+def venue_coordinates(venue: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Return (lat, lng) for a venue with usable coordinates, otherwise None"""
+    location = venue.get("location")
+    if not isinstance(location, dict):
+        return None
+    coordinates = location.get("coordinates") or {}
+    lat = coordinates.get("lat")
+    lng = coordinates.get("lng")
+    if not isinstance(lat, (int, float)) or not isinstance(lng, (int, float)):
+        return None
+    if (lat == 0 and lng == 0) or abs(lat) > 90 or abs(lng) > 180:
+        return None
+    return (float(lat), float(lng))
+
+def _venue_key(kind: str, venue: Dict[str, Any]) -> str:
+    name = " ".join(re.sub(r"[^\w\s]", " ", venue_name(venue).lower()).split())
+    return f"{kind}|{name}"
+
+class VenueIndex:
+    """
+    Spatial index over venues (activities, restaurants, hotels) with coordinates.
+
+    Venues are bucketed on a fixed lat/lng grid; queries collect the candidate cells
+    and measure exact distances with one vectorized haversine call over NumPy arrays.
+    """
+
+    def __init__(self, cell_size_km: float = 2.0):
+        self.cell_size_km = cell_size_km
+        self._cell_degrees = cell_size_km / KM_PER_DEGREE_LAT
+        self.venues: List[Dict[str, Any]] = []
+        self.kinds: List[str] = []
+        self._keys: Dict[str, int] = {}
+        self._lats: List[float] = []
+        self._lngs: List[float] = []
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._lat_array = np.empty(0)
+        self._lng_array = np.empty(0)
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self.venues)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (math.floor(lat / self._cell_degrees), math.floor(lng / self._cell_degrees))
+
+    def _arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._dirty:
+            self._lat_array = np.asarray(self._lats, dtype=np.float64)
+            self._lng_array = np.asarray(self._lngs, dtype=np.float64)
+            self._dirty = False
+        return self._lat_array, self._lng_array
+
+    def add(self, venue: Dict[str, Any], kind: str) -> bool:
+        """
+        Add a venue to the index.
+
+        Args:
+            venue: Venue dictionary with location.coordinates
+            kind: Venue kind ("activity", "restaurant" or "hotel")
+
+        Returns:
+            True if the venue was added, False if it has no coordinates or is already indexed
+        """
+        coordinates = venue_coordinates(venue)
+        key = _venue_key(kind, venue)
+        if coordinates is None or key in self._keys:
+            return False
+
+        index = len(self.venues)
+        self._keys[key] = index
+        self.venues.append(venue)
+        self.kinds.append(kind)
+        self._lats.append(coordinates[0])
+        self._lngs.append(coordinates[1])
+        self._cells.setdefault(self._cell(*coordinates), []).append(index)
+        self._dirty = True
+        return True
+
+    def add_many(self, venues: List[Dict[str, Any]], kind: str) -> int:
+        """Add several venues of the same kind, returning how many were indexed"""
+        return sum(1 for venue in venues if self.add(venue, kind))
+
+    def _candidates(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> List[int]:
+        low = self._cell(min_lat, min_lng)
+        high = self._cell(max_lat, max_lng)
+        # Scanning the occupied cells is cheaper than walking a huge empty range
+        if (high[0] - low[0] + 1) * (high[1] - low[1] + 1) > len(self._cells):
+            return [
+                i for cell, members in self._cells.items()
+                if low[0] <= cell[0] <= high[0] and low[1] <= cell[1] <= high[1]
+                for i in members
+            ]
+        candidates = []
+        for i in range(low[0], high[0] + 1):
+            for j in range(low[1], high[1] + 1):
+                candidates.extend(self._cells.get((i, j), ()))
+        return candidates
+
+    def _filter(self, indexes, kind: Optional[str], exclude: Optional[set]) -> List[int]:
+        return [
+            i for i in indexes
+            if (kind is None or self.kinds[i] == kind)
+            and (not exclude or venue_name(self.venues[i]) not in exclude)
+        ]
+
+    def within_radius(self, lat: float, lng: float, radius_km: float,
+                      kind: Optional[str] = None, exclude: Optional[set] = None) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Find venues within radius_km of a point.
+
+        Args:
+            lat, lng: Query point
+            radius_km: Search radius in kilometers
+            kind: Optional venue kind filter
+            exclude: Optional set of venue names to skip
+
+        Returns:
+            List of (distance_km, venue) tuples sorted by distance
+        """
+        lat_span = radius_km / KM_PER_DEGREE_LAT
+        lng_span = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        candidates = self._filter(
+            self._candidates(lat - lat_span, lng - lng_span, lat + lat_span, lng + lng_span), kind, exclude
+        )
+        if not candidates:
+            return []
+
+        lats, lngs = self._arrays()
+        candidate_array = np.asarray(candidates)
+        distances = haversine_distances(lat, lng, lats[candidate_array], lngs[candidate_array])
+        order = np.argsort(distances)
+        return [
+            (float(distances[i]), self.venues[candidates[i]])
+            for i in order if distances[i] <= radius_km
+        ]
+
+    def nearest(self, lat: float, lng: float, k: int,
+                kind: Optional[str] = None, exclude: Optional[set] = None) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Find the k venues nearest to a point.
+
+        The search radius doubles until k venues are found, so every venue inside the
+        final radius has been considered and the k closest of them are exact.
+
+        Args:
+            lat, lng: Query point
+            k: Number of venues to return
+            kind: Optional venue kind filter
+            exclude: Optional set of venue names to skip
+
+        Returns:
+            List of (distance_km, venue) tuples sorted by distance
+        """
+        if k <= 0 or not self.venues:
+            return []
+
+        radius_km = self.cell_size_km
+        while True:
+            found = self.within_radius(lat, lng, radius_km, kind, exclude)
+            if len(found) >= k or radius_km >= 20037:  # Half the Earth's circumference covers everything
+                return found[:k]
+            radius_km *= 2
+
+    def in_bbox(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+                kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Find venues inside a bounding box.
+
+        Args:
+            min_lat, min_lng: South-west corner
+            max_lat, max_lng: North-east corner
+            kind: Optional venue kind filter
+
+        Returns:
+            List of venues inside the box
+        """
+        return [
+            self.venues[i]
+            for i in self._filter(self._candidates(min_lat, min_lng, max_lat, max_lng), kind, None)
+            if min_lat <= self._lats[i] <= max_lat and min_lng <= self._lngs[i] <= max_lng
+        ]
+
+    def centroid(self, kind: Optional[str] = None) -> Optional[Tuple[float, float]]:
+        """Mean position of the indexed venues (optionally of one kind)"""
+        lats, lngs = self._arrays()
+        if kind is not None:
+            mask = np.asarray([k == kind for k in self.kinds], dtype=bool)
+            lats, lngs = lats[mask], lngs[mask]
+        if len(lats) == 0:
+            return None
+        return (float(lats.mean()), float(lngs.mean()))
+
+# Venues seen across requests, keyed by normalized destination
+_DESTINATION_INDEXES: "OrderedDict[str, VenueIndex]" = OrderedDict()
+
+def get_destination_index(destination: str) -> VenueIndex:
+    """
+    Get the venue index shared by all requests for a destination.
+
+    Args:
+        destination: Destination name from the request
+
+    Returns:
+        VenueIndex for the destination (created if needed)
+    """
+    key = " ".join(destination.lower().split())
+    index = _DESTINATION_INDEXES.get(key)
+    if index is None:
+        index = VenueIndex()
+        _DESTINATION_INDEXES[key] = index
+        while len(_DESTINATION_INDEXES) > MAX_DESTINATION_INDEXES:
+            _DESTINATION_INDEXES.popitem(last=False)
+    _DESTINATION_INDEXES.move_to_end(key)
+    return index
+
+def build_request_index(activities: List[Dict[str, Any]], restaurants: List[Dict[str, Any]],
+                        hotels: List[Dict[str, Any]]) -> VenueIndex:
+    """
+    Build the venue index for one request. It is not shared: remember_destination_venues
+    merges venues into the destination index.
+
+    Args:
+        activities: Activity dictionaries
+        restaurants: Restaurant dictionaries
+        hotels: Accommodation dictionaries
+
+    Returns:
+        VenueIndex with the request's venues
+    """
+    index = VenueIndex()
+    index.add_many(activities, "activity")
+    index.add_many(restaurants, "restaurant")
+    index.add_many(hotels, "hotel")
+    logger.info(f"Indexed {len(index)} venues with coordinates")
+    return index
+
+def remember_destination_venues(destination: str, index: VenueIndex) -> None:
+    """
+    Merge indexed venues into the destination index (bounded in size). The index is
+    shared by every trip to the destination, so pass copies of the venues as generated,
+    not ones already priced for a request.
+    """
+    destination_index = get_destination_index(destination)
+    added = 0
+    for venue, kind in zip(index.venues, index.kinds):
+        if len(destination_index) >= MAX_VENUES_PER_DESTINATION:
+            break
+        if destination_index.add(venue, kind):
+            added += 1
+    if added:
+        logger.info(f"Added {added} venues to the {destination} index ({len(destination_index)} total)")
@@ -0,0 +1,147 @@
+import logging
+import re
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+import numpy as np
+
+from app.utils.helpers import haversine_matrix
+
+logger = logging.getLogger(__name__)
+
+# Average door-to-door speed (km/h), fixed overhead (minutes: boarding, check-in, parking),
+# road detour over the great circle distance, and whether terrain slows the mode down
+MODE_PROFILES = {
+    "walk": (4.5, 0, 1.25, True),
+    "bicycle": (14.0, 0, 1.25, True),
+    "car": (55.0, 10, 1.3, True),
+    "bus": (40.0, 20, 1.35, True),
+    "metro": (30.0, 10, 1.2, False),
+    "train": (60.0, 30, 1.25, True),
+    "ferry": (25.0, 30, 1.1, False),
+    "flight": (650.0, 150, 1.05, False)
+}
+DEFAULT_MODE = "car"
+
+# Checked in order, so "metro train" is a metro and "taxi to the airport" is a car.
+# Keywords match whole words (plurals included), so a "trail" is not a "rail".
+MODE_KEYWORDS = [
+    ("flight", ("flight", "fly", "flying", "plane", "airline", "airplane", "aeroplane")),
+    ("metro", ("metro", "subway", "tram", "underground", "monorail")),
+    ("train", ("train", "rail", "railway")),
+    ("ferry", ("ferry", "ferries", "boat", "cruise", "ship")),
+    ("bus", ("bus", "coach", "shuttle")),
+    ("walk", ("walk", "walking", "foot", "trek", "trekking", "hike", "hiking")),
+    ("bicycle", ("bicycle", "bike", "biking", "cycle", "cycling")),
+    ("car", ("car", "taxi", "cab", "drive", "driving", "jeep", "rickshaw", "autorickshaw", "auto"))
+]
+_MODE_PATTERNS = [
+    (key, re.compile(r"\b(?:" + "|".join(keywords) + r")(?:s|es)?\b"))
+    for key, keywords in MODE_KEYWORDS
+]
+
+# Terrain slows surface transport by TERRAIN_SLOWDOWN_PER_KM for every km of elevation
+# above TERRAIN_BASE_ELEVATION_M, up to MAX_TERRAIN_FACTOR
+TERRAIN_BASE_ELEVATION_M = 500.0
+TERRAIN_SLOWDOWN_PER_KM = 0.3
+MAX_TERRAIN_FACTOR = 2.5
+
+# Journeys reaching this elevation are described as mountain routes
+MOUNTAIN_ELEVATION_M = 1500.0
+# Journeys this long are described as long-haul, with connections likely
+LONG_HAUL_DISTANCE_KM = 500.0
+
+def travel_mode(mode: Optional[str]) -> str:
+    """Map a free-text transport mode (e.g. "Volvo bus", "taxi") to a MODE_PROFILES key"""
+    text = (mode or "").lower()
+    for key, pattern in _MODE_PATTERNS:
+        if pattern.search(text):
+            return key
+    return DEFAULT_MODE
+
+def terrain_factor(elevation_m) -> np.ndarray:
+    """Slowdown multiplier for surface travel at the given elevation(s) in meters"""
+    elevation = np.nan_to_num(np.asarray(elevation_m, dtype=np.float64))
+    above = np.maximum(0.0, elevation - TERRAIN_BASE_ELEVATION_M) / 1000
+    return np.minimum(1.0 + TERRAIN_SLOWDOWN_PER_KM * above, MAX_TERRAIN_FACTOR)
+
+def travel_minutes(distance_km, modes: Union[str, List[str]], elevation_m=0.0) -> np.ndarray:
+    """
+    Estimate travel times from great circle distances.
+
+    Args:
+        distance_km: Great circle distance(s) in kilometers
+        modes: One mode for all distances, or a mode per distance (free text is fine)
+        elevation_m: Highest elevation along each leg, in meters
+
+    Returns:
+        NumPy array of travel times in minutes, shaped like distance_km
+    """
+    distance = np.asarray(distance_km, dtype=np.float64)
+    if isinstance(modes, str):
+        profiles = np.array(MODE_PROFILES[travel_mode(modes)], dtype=np.float64)
+    else:
+        profiles = np.array([MODE_PROFILES[travel_mode(mode)] for mode in modes], dtype=np.float64)
+        profiles = profiles.reshape(distance.shape + (4,))
+    speed, overhead, detour, uses_terrain = np.moveaxis(profiles, -1, 0)
+
+    slowdown = np.where(uses_terrain > 0, terrain_factor(elevation_m), 1.0)
+    return overhead + distance * detour / speed * 60 * slowdown
+
+def travel_time_matrix(points: List[Tuple[float, float]], mode: str = DEFAULT_MODE,
+                       elevation_m=0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Distances and travel times between every pair of points in one vectorized pass.
+
+    Args:
+        points: List of (lat, lng) tuples
+        mode: Transport mode used between the points
+        elevation_m: Elevation of the area in meters, or one elevation per point
+            (each leg then uses the higher of its two ends)
+
+    Returns:
+        Tuple of (distance_km, minutes) square matrices; the diagonal is zero
+    """
+    if not points:
+        return np.zeros((0, 0)), np.zeros((0, 0))
+    coordinates = np.asarray(points, dtype=np.float64)
+    distances = haversine_matrix(coordinates[:, 0], coordinates[:, 1])
+
+    elevation = np.asarray(elevation_m, dtype=np.float64)
+    if elevation.ndim == 1:
+        elevation = np.maximum(elevation[:, None], elevation[None, :])
+    minutes = travel_minutes(distances, mode, elevation)
+    np.fill_diagonal(minutes, 0.0)
+    return distances, minutes
+
+def estimate_journey(origin: Tuple[float, float], destination: Tuple[float, float],
+                     max_elevation_m: float = 0.0) -> Dict[str, Any]:
+    """
+    Estimate a journey between two places for every transport mode.
+
+    Args:
+        origin, destination: (lat, lng) tuples
+        max_elevation_m: Highest point along the route in meters
+
+    Returns:
+        Dictionary with distance_km, max_elevation_m, terrain_factor, mountain, long_haul
+        and minutes (estimated minutes per mode)
+    """
+    distances, _ = travel_time_matrix([origin, destination])
+    distance = float(distances[0, 1])
+    modes = list(MODE_PROFILES)
+    minutes = travel_minutes(np.full(len(modes), distance), modes, max_elevation_m)
+
+    return {
+        "distance_km": round(distance, 1),
+        "max_elevation_m": float(max_elevation_m),
+        "terrain_factor": round(float(terrain_factor(max_elevation_m)), 2),
+        "mountain": max_elevation_m >= MOUNTAIN_ELEVATION_M,
+        "long_haul": distance >= LONG_HAUL_DISTANCE_KM,
+        "minutes": {mode: int(round(value)) for mode, value in zip(modes, minutes)}
+    }
+
+def journey_minutes(journey: Optional[Dict[str, Any]], mode: Optional[str]) -> Optional[int]:
+    """Estimated minutes for a journey by the given (free-text) mode, if the journey is known"""
+    if not journey:
+        return None
+    return journey["minutes"].get(travel_mode(mode))
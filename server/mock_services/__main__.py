@@ -0,0 +1,61 @@
+"""
+Run the local stand-in servers for the outbound APIs.
+
+    python -m mock_services
+
+then point the app at them with the printed environment variables. Latency, error
+rate and payload size are read from STANDIN_* variables (see StandInConfig), either
+for every service (STANDIN_LATENCY_MS=200) or one (STANDIN_PEXELS_ERROR_RATE=0.05).
+"""
+import argparse
+import asyncio
+import logging
+
+from aiohttp import web # type: ignore
+
+from mock_services.hotel_scraper import create_hotel_scraper_app
+from mock_services.open_meteo import create_open_meteo_app
+from mock_services.pexels import create_pexels_app
+from mock_services.wikimedia import create_wikimedia_app
+
+logger = logging.getLogger("mock_services")
+
+# (environment variable, app factory, default port, URL path)
+STAND_INS = [
+    ("HOTEL_SCRAPER_API_URL", create_hotel_scraper_app, 7860, "/api/hotels"),
+    ("PEXELS_API_URL", create_pexels_app, 7861, "/v1/search"),
+    ("WIKIMEDIA_API_URL", create_wikimedia_app, 7862, "/w/api.php"),
+    ("OPEN_METEO_API_URL", create_open_meteo_app, 7863, "/v1/forecast"),
+    ("OPEN_METEO_ARCHIVE_URL", create_open_meteo_app, 7864, "/v1/archive"),
+]
+
+async def serve(host: str, port_offset: int) -> None:
+    runners = []
+    try:
+        for env_name, factory, port, path in STAND_INS:
+            runner = web.AppRunner(factory())
+            await runner.setup()
+            await web.TCPSite(runner, host, port + port_offset).start()
+            runners.append(runner)
+            print(f"export {env_name}=http://{host}:{port + port_offset}{path}")
+        print("export PEXELS_API=stand-in")
+        logger.info("Stand-in servers running, press Ctrl+C to stop")
+        await asyncio.Event().wait()
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-ins for the hotel scraper, Pexels, Wikimedia and Open-Meteo")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port-offset", type=int, default=0, help="Added to every default port")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    try:
+        asyncio.run(serve(args.host, args.port_offset))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
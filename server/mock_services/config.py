@@ -0,0 +1,77 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import random
+
+from aiohttp import web # type: ignore
+from pydantic import BaseModel # type: ignore
+
+logger = logging.getLogger(__name__)
+
+class StandInConfig(BaseModel):
+    """
+    Behaviour of a stand-in server.
+
+    Latency follows a lognormal distribution around latency_ms (latency_jitter is its
+    sigma, 0 gives a fixed latency), so tail latencies can be reproduced. Errors are
+    returned as 503s at error_rate. payload_items controls how many results a
+    response carries (photos, images, search hits).
+    """
+    latency_ms: float = 50.0
+    latency_jitter: float = 0.5
+    item_latency_ms: float = 0.0
+    error_rate: float = 0.0
+    payload_items: int = 10
+    seed: int = 0
+
+    @classmethod
+    def from_env(cls, service: str, **defaults) -> "StandInConfig":
+        """
+        Read settings from STANDIN_<SERVICE>_<FIELD>, falling back to STANDIN_<FIELD>
+        and then to the given defaults.
+
+        Args:
+            service: Service name, e.g. "pexels"
+            defaults: Overrides for the built-in defaults
+        """
+        values = dict(defaults)
+        for field in cls.model_fields:
+            for name in (f"STANDIN_{service.upper()}_{field.upper()}", f"STANDIN_{field.upper()}"):
+                if name in os.environ:
+                    values[field] = os.environ[name]
+                    break
+        return cls(**values)
+
+def stable_seed(*parts) -> int:
+    """Deterministic seed derived from request content, independent of PYTHONHASHSEED"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return int(digest[:12], 16)
+
+def make_behaviour_middleware(config: StandInConfig, name: str):
+    """
+    Build an aiohttp middleware that injects latency and errors before each handler.
+
+    A single seeded RNG drives both, so a fixed request sequence sees the same
+    latencies and failures on every run.
+    """
+    rng = random.Random(config.seed)
+
+    @web.middleware
+    async def behaviour(request, handler):
+        if config.latency_ms > 0:
+            latency = config.latency_ms * math.exp(rng.gauss(0, config.latency_jitter)) if config.latency_jitter else config.latency_ms
+            await asyncio.sleep(latency / 1000)
+        if config.error_rate and rng.random() < config.error_rate:
+            logger.info(f"{name} stand-in injecting an error for {request.path}")
+            return web.json_response({"error": "Injected failure"}, status=503)
+        return await handler(request)
+
+    return behaviour
+
+def create_app(name: str, config: StandInConfig) -> web.Application:
+    """Create an aiohttp application with the stand-in behaviour middleware and config attached"""
+    app = web.Application(middlewares=[make_behaviour_middleware(config, name)])
+    app["config"] = config
+    return app
@@ -0,0 +1,52 @@
+import asyncio
+import random
+
+from aiohttp import web # type: ignore
+
+from mock_services.config import StandInConfig, create_app, stable_seed
+
+AMENITIES = [
+    "Free Wi-Fi", "Swimming pool", "Spa", "Fitness center", "Restaurant", "Bar",
+    "Room service", "Airport shuttle", "Parking", "Air conditioning", "Laundry", "Garden"
+]
+
+def scrape_hotel(hotel_name: str, destination: str, config: StandInConfig) -> dict:
+    """Deterministic scraper result for one hotel, shaped like the real scraper's"""
+    rng = random.Random(stable_seed(config.seed, hotel_name, destination))
+    # Some hotels are never found, as with the real scraper
+    if rng.random() < 0.1:
+        return {"hotel_name": hotel_name, "error": "Hotel not found"}
+
+    slug = "-".join(hotel_name.lower().split())
+    return {
+        "hotel_name": hotel_name,
+        "data": {
+            # Ratings are out of 10 like the booking sites the scraper reads
+            "rating": round(rng.uniform(6.0, 9.8), 1),
+            "images": [f"https://images.example.com/hotels/{slug}/{i}.jpg" for i in range(config.payload_items)],
+            "amenities": rng.sample(AMENITIES, k=rng.randint(3, 8)),
+            "booking_link": f"https://booking.example.com/hotel/{slug}"
+        }
+    }
+
+async def scrape_hotels(request: web.Request) -> web.Response:
+    """POST /api/hotels with {"hotels": [{"hotel_name", "destination"}]}"""
+    config = request.app["config"]
+    try:
+        payload = await request.json()
+    except ValueError:
+        return web.json_response({"status": "error", "message": "Invalid JSON"}, status=400)
+
+    hotels = payload.get("hotels") or []
+    # The real scraper visits each hotel in turn
+    if config.item_latency_ms:
+        await asyncio.sleep(config.item_latency_ms * len(hotels) / 1000)
+
+    results = [scrape_hotel(hotel.get("hotel_name", ""), hotel.get("destination", ""), config) for hotel in hotels]
+    return web.json_response({"status": "success", "results": results})
+
+def create_hotel_scraper_app(config: StandInConfig = None) -> web.Application:
+    """Stand-in for HOTEL_SCRAPER_API_URL (serves /api/hotels)"""
+    app = create_app("hotel scraper", config or StandInConfig.from_env("scraper", latency_ms=800, item_latency_ms=400))
+    app.router.add_post("/api/hotels", scrape_hotels)
+    return app
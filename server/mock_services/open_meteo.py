@@ -0,0 +1,171 @@
+from datetime import date, datetime, timedelta, timezone
+
+import flatbuffers # type: ignore
+import numpy as np
+from aiohttp import web # type: ignore
+from openmeteo_sdk.Variable import Variable # type: ignore
+
+from mock_services.config import StandInConfig, create_app, stable_seed
+
+# Field counts of the openmeteo_sdk tables, needed to start each flatbuffer object
+WEATHER_API_RESPONSE_FIELDS = 15
+VARIABLES_WITH_TIME_FIELDS = 4
+VARIABLE_WITH_VALUES_FIELDS = 13
+
+WEATHER_CODE_CHOICES = [0, 0, 1, 1, 2, 2, 3, 3, 45, 51, 61, 63, 80, 81, 95]
+
+def _variable_enum(name: str) -> int:
+    """Map an Open-Meteo variable name to its openmeteo_sdk Variable"""
+    for prefix, variable in (
+        ("temperature", Variable.temperature),
+        ("precipitation_probability", Variable.precipitation_probability),
+        ("precipitation", Variable.precipitation),
+        ("wind_speed", Variable.wind_speed),
+        ("wind_direction", Variable.wind_direction),
+        ("weather_code", Variable.weather_code)
+    ):
+        if name.startswith(prefix):
+            return variable
+    return Variable.undefined
+
+def synthesize_hourly(latitude: float, longitude: float, start: date, days: int, seed: int) -> dict:
+    """Plausible, repeatable hourly weather for a location and date range"""
+    rng = np.random.default_rng(stable_seed(seed, round(latitude, 2), round(longitude, 2), start.isoformat()))
+    hours = np.arange(days * 24)
+
+    day_base = 28 - 0.45 * abs(latitude) + rng.normal(0, 2, days)
+    temperature = np.repeat(day_base, 24) + 5 * np.sin((hours % 24 - 9) / 24 * 2 * np.pi) + rng.normal(0, 0.5, len(hours))
+    weather_code = np.repeat(rng.choice(WEATHER_CODE_CHOICES, days), 24).astype(np.float64)
+    wet = weather_code >= 51
+    precipitation = np.where(wet, rng.gamma(1.5, 0.8, len(hours)), 0.0)
+    precipitation_probability = np.clip(np.where(wet, 60, 10) + rng.normal(0, 10, len(hours)), 0, 100)
+    wind_speed = np.clip(rng.gamma(2.0, 5.0, len(hours)), 0, None)
+    wind_direction = np.repeat(rng.uniform(0, 360, days), 24)
+
+    return {
+        "temperature": temperature,
+        "weather_code": weather_code,
+        "precipitation": precipitation,
+        "precipitation_probability": precipitation_probability,
+        "wind_speed": wind_speed,
+        "wind_direction": wind_direction
+    }
+
+def hourly_values(name: str, hourly: dict) -> np.ndarray:
+    """Values of an hourly variable"""
+    for key in sorted(hourly, key=len, reverse=True):
+        if name.startswith(key):
+            return hourly[key]
+    return np.zeros(len(hourly["temperature"]))
+
+def daily_values(name: str, hourly: dict) -> np.ndarray:
+    """Values of a daily variable, aggregated from the hourly series"""
+    by_day = hourly_values(name, hourly).reshape(-1, 24)
+    if name.endswith("_min"):
+        return by_day.min(axis=1)
+    if name.endswith("_sum"):
+        return by_day.sum(axis=1)
+    if name.endswith("_mean") or name.endswith("_dominant"):
+        return by_day.mean(axis=1)
+    return by_day.max(axis=1)
+
+def _build_variables(builder, start: int, end: int, interval: int, series) -> int:
+    offsets = []
+    for variable, values in series:
+        vector = builder.CreateNumpyVector(np.asarray(values, dtype=np.float32))
+        builder.StartObject(VARIABLE_WITH_VALUES_FIELDS)
+        builder.PrependUint8Slot(0, variable, 0)
+        builder.PrependUOffsetTRelativeSlot(3, vector, 0)
+        offsets.append(builder.EndObject())
+
+    builder.StartVector(4, len(offsets), 4)
+    for offset in reversed(offsets):
+        builder.PrependUOffsetTRelative(offset)
+    variables = builder.EndVector()
+
+    builder.StartObject(VARIABLES_WITH_TIME_FIELDS)
+    builder.PrependInt64Slot(0, start, 0)
+    builder.PrependInt64Slot(1, end, 0)
+    builder.PrependInt32Slot(2, interval, 0)
+    builder.PrependUOffsetTRelativeSlot(3, variables, 0)
+    return builder.EndObject()
+
+def build_location_response(latitude: float, longitude: float, start: date, days: int,
+                            daily_names, hourly_names, seed: int) -> bytes:
+    """Encode one location as an openmeteo_sdk WeatherApiResponse flatbuffer"""
+    hourly = synthesize_hourly(latitude, longitude, start, days, seed)
+    start_ts = int(datetime(start.year, start.month, start.day, tzinfo=timezone.utc).timestamp())
+    end_ts = start_ts + days * 86400
+
+    builder = flatbuffers.Builder(1024)
+    timezone_name = builder.CreateString("GMT")
+    timezone_abbreviation = builder.CreateString("GMT")
+    daily = _build_variables(
+        builder, start_ts, end_ts, 86400,
+        [(_variable_enum(name), daily_values(name, hourly)) for name in daily_names]
+    ) if daily_names else None
+    hourly_block = _build_variables(
+        builder, start_ts, end_ts, 3600,
+        [(_variable_enum(name), hourly_values(name, hourly)) for name in hourly_names]
+    ) if hourly_names else None
+
+    builder.StartObject(WEATHER_API_RESPONSE_FIELDS)
+    builder.PrependFloat32Slot(0, latitude, 0.0)
+    builder.PrependFloat32Slot(1, longitude, 0.0)
+    builder.PrependFloat32Slot(2, 100.0, 0.0)
+    builder.PrependInt32Slot(6, 0, 0)
+    builder.PrependUOffsetTRelativeSlot(7, timezone_name, 0)
+    builder.PrependUOffsetTRelativeSlot(8, timezone_abbreviation, 0)
+    if daily is not None:
+        builder.PrependUOffsetTRelativeSlot(10, daily, 0)
+    if hourly_block is not None:
+        builder.PrependUOffsetTRelativeSlot(11, hourly_block, 0)
+    builder.Finish(builder.EndObject())
+    return bytes(builder.Output())
+
+def _list_param(query, name: str):
+    values = []
+    for value in query.getall(name, []):
+        values.extend(part for part in value.split(",") if part)
+    return values
+
+async def forecast(request: web.Request) -> web.Response:
+    """GET /v1/forecast (or /v1/archive) with comma-separated coordinates and format=flatbuffers"""
+    config = request.app["config"]
+    query = request.query
+    if query.get("format") != "flatbuffers":
+        return web.json_response({"error": True, "reason": "The stand-in only serves format=flatbuffers"}, status=400)
+
+    try:
+        latitudes = [float(value) for value in _list_param(query, "latitude")]
+        longitudes = [float(value) for value in _list_param(query, "longitude")]
+        if query.get("start_date"):
+            start = date.fromisoformat(query["start_date"])
+            end = date.fromisoformat(query.get("end_date", query["start_date"]))
+        else:
+            start = date.today()
+            end = start + timedelta(days=int(query.get("forecast_days", "7")) - 1)
+    except ValueError as e:
+        return web.json_response({"error": True, "reason": str(e)}, status=400)
+
+    if not latitudes or len(latitudes) != len(longitudes) or end < start:
+        return web.json_response({"error": True, "reason": "Invalid coordinates or date range"}, status=400)
+
+    days = (end - start).days + 1
+    daily_names = _list_param(query, "daily")
+    hourly_names = _list_param(query, "hourly")
+
+    # Each location is a flatbuffer prefixed with its little-endian length
+    body = bytearray()
+    for latitude, longitude in zip(latitudes, longitudes):
+        message = build_location_response(latitude, longitude, start, days, daily_names, hourly_names, config.seed)
+        body += len(message).to_bytes(4, byteorder="little") + message
+    return web.Response(body=bytes(body), content_type="application/octet-stream")
+
+def create_open_meteo_app(config: StandInConfig = None) -> web.Application:
+    """Stand-in for OPEN_METEO_API_URL and OPEN_METEO_ARCHIVE_URL (serves /v1/forecast and /v1/archive)"""
+    app = create_app("open-meteo", config or StandInConfig.from_env("open_meteo", latency_ms=80))
+    app.router.add_get("/v1/forecast", forecast)
+    # Synthetic history looks just like a synthetic forecast
+    app.router.add_get("/v1/archive", forecast)
+    return app
@@ -0,0 +1,48 @@
+import random
+
+from aiohttp import web # type: ignore
+
+from mock_services.config import StandInConfig, create_app, stable_seed
+
+async def search_photos(request: web.Request) -> web.Response:
+    """GET /v1/search?query=...&per_page=...&orientation=..."""
+    config = request.app["config"]
+    if not request.headers.get("Authorization"):
+        return web.json_response({"error": "Unauthorized"}, status=401)
+
+    query = request.query.get("query", "")
+    per_page = min(int(request.query.get("per_page", "15")), 80)
+    count = min(per_page, config.payload_items)
+    rng = random.Random(stable_seed(config.seed, query))
+    first_id = rng.randint(100000, 9000000)
+
+    photos = []
+    for i in range(count):
+        photo_id = first_id + i
+        base = f"https://images.pexels.example.com/photos/{photo_id}/pexels-photo-{photo_id}.jpeg"
+        photos.append({
+            "id": photo_id,
+            "width": 4000,
+            "height": 2667,
+            "alt": query,
+            "src": {
+                "original": base,
+                "large": f"{base}?h=650&w=940",
+                "medium": f"{base}?h=350",
+                "small": f"{base}?h=130",
+                "landscape": f"{base}?h=627&w=1200"
+            }
+        })
+
+    return web.json_response({
+        "page": 1,
+        "per_page": per_page,
+        "total_results": count,
+        "photos": photos
+    })
+
+def create_pexels_app(config: StandInConfig = None) -> web.Application:
+    """Stand-in for PEXELS_API_URL (serves /v1/search)"""
+    app = create_app("pexels", config or StandInConfig.from_env("pexels", latency_ms=150))
+    app.router.add_get("/v1/search", search_photos)
+    return app
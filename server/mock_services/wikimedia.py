@@ -0,0 +1,97 @@
+import math
+import random
+
+from aiohttp import web # type: ignore
+
+from mock_services.config import StandInConfig, create_app, stable_seed
+
+def _image_page(page_id: int, title: str, coordinates=None) -> dict:
+    slug = "_".join(title.split()) or "Image"
+    page = {
+        "pageid": page_id,
+        "ns": 6,
+        "title": f"File:{slug}_{page_id}.jpg",
+        "imagerepository": "local",
+        "imageinfo": [{
+            "url": f"https://upload.wikimedia.example.org/commons/{page_id % 16:x}/{slug}_{page_id}.jpg",
+            "descriptionurl": f"https://commons.wikimedia.example.org/wiki/File:{slug}_{page_id}.jpg"
+        }]
+    }
+    if coordinates:
+        page["coordinates"] = [{"lat": coordinates[0], "lon": coordinates[1], "primary": "", "globe": "earth"}]
+    return page
+
+def geosearch_pages(params, config: StandInConfig) -> dict:
+    """Geotagged files scattered around ggscoord within ggsradius meters"""
+    lat, lng = (float(value) for value in params.get("ggscoord", "0|0").split("|"))
+    radius_km = float(params.get("ggsradius", "1000")) / 1000
+    limit = int(params.get("ggslimit", "10")) if params.get("ggslimit", "10") != "max" else 500
+    rng = random.Random(stable_seed(config.seed, "geo", round(lat, 3), round(lng, 3)))
+
+    pages = {}
+    for _ in range(min(limit, config.payload_items)):
+        distance = radius_km * math.sqrt(rng.random())
+        bearing = rng.uniform(0, 2 * math.pi)
+        point = (
+            lat + distance / 111.32 * math.cos(bearing),
+            lng + distance / (111.32 * max(math.cos(math.radians(lat)), 1e-6)) * math.sin(bearing)
+        )
+        page_id = rng.randint(1000000, 99999999)
+        pages[str(page_id)] = _image_page(page_id, f"Geotagged {lat:.3f} {lng:.3f}", point)
+    return pages
+
+def listing_pages(seed_text: str, limit_value: str, config: StandInConfig, found_rate: float) -> dict:
+    """Files for a category or search listing; some listings come back empty"""
+    rng = random.Random(stable_seed(config.seed, seed_text))
+    if rng.random() >= found_rate:
+        return {}
+    limit = int(limit_value) if limit_value != "max" else 500
+    pages = {}
+    for _ in range(min(limit, config.payload_items)):
+        page_id = rng.randint(1000000, 99999999)
+        pages[str(page_id)] = _image_page(page_id, seed_text)
+    return pages
+
+def category_info_pages(titles: str, config: StandInConfig) -> dict:
+    """categoryinfo for each title, with missing categories as negative page ids"""
+    pages = {}
+    for index, title in enumerate(titles.split("|")):
+        rng = random.Random(stable_seed(config.seed, "category", title))
+        if rng.random() < 0.4:
+            page_id = rng.randint(1000000, 99999999)
+            pages[str(page_id)] = {
+                "pageid": page_id, "ns": 14, "title": title,
+                "categoryinfo": {"size": config.payload_items, "pages": 0, "files": config.payload_items, "subcats": 0}
+            }
+        else:
+            pages[str(-(index + 1))] = {"ns": 14, "title": title, "missing": ""}
+    return pages
+
+async def api(request: web.Request) -> web.Response:
+    """GET /w/api.php?action=query with the generators the activities service uses"""
+    config = request.app["config"]
+    params = request.query
+    if params.get("action") != "query":
+        return web.json_response({"error": {"code": "badvalue", "info": "Only action=query is supported"}})
+
+    generator = params.get("generator")
+    if generator == "geosearch":
+        pages = geosearch_pages(params, config)
+    elif generator == "categorymembers":
+        pages = listing_pages(params.get("gcmtitle", ""), params.get("gcmlimit", "10"), config, found_rate=0.9)
+    elif generator == "search":
+        pages = listing_pages(params.get("gsrsearch", ""), params.get("gsrlimit", "10"), config, found_rate=0.8)
+    elif "titles" in params:
+        pages = category_info_pages(params["titles"], config)
+    else:
+        pages = {}
+
+    if not pages:
+        return web.json_response({"batchcomplete": ""})
+    return web.json_response({"batchcomplete": "", "query": {"pages": pages}})
+
+def create_wikimedia_app(config: StandInConfig = None) -> web.Application:
+    """Stand-in for WIKIMEDIA_API_URL (serves /w/api.php)"""
+    app = create_app("wikimedia", config or StandInConfig.from_env("wikimedia", latency_ms=120))
+    app.router.add_get("/w/api.php", api)
+    return app
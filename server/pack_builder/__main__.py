@@ -0,0 +1,56 @@
+"""
+Build destination packs offline.
+
+    python -m pack_builder Manali Goa "Leh|Leh Ladakh" --base-city Delhi --base-city Mumbai
+
+runs the component services (LLM, Wikimedia, Pexels, hotel scraper, Open-Meteo) for each
+destination and writes one pack per destination under DESTINATION_PACKS_PATH, which the
+server answers from before generating anything. Names after a "|" are aliases the
+destination is also requested by.
+"""
+import argparse
+import asyncio
+import logging
+
+from dotenv import load_dotenv
+
+from app.services.pack_store import DESTINATION_PACKS_PATH
+from app.utils.http_client import close_http_sessions
+from pack_builder.builder import build_pack
+
+logger = logging.getLogger("pack_builder")
+
+async def build(destinations, base_cities, out_dir: str, rounds: int) -> None:
+    try:
+        for entry in destinations:
+            destination, *aliases = [name.strip() for name in entry.split("|") if name.strip()]
+            try:
+                await build_pack(destination, base_cities, out_dir, rounds, aliases)
+            except Exception as e:
+                logger.error(f"Failed to build the pack for {destination}: {str(e)}")
+    finally:
+        await close_http_sessions()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build destination packs for zero-LLM cold starts")
+    parser.add_argument("destinations", nargs="*", help="Destinations to pack, as name or name|alias|...")
+    parser.add_argument("--destinations-file", help="File with one destination per line, same format")
+    parser.add_argument("--base-city", action="append", required=True,
+                        help="Base city to pack essential info and coordinates for (repeatable)")
+    parser.add_argument("--out", default=DESTINATION_PACKS_PATH, help="Pack directory")
+    parser.add_argument("--rounds", type=int, default=2, help="Venue generation rounds per destination")
+    args = parser.parse_args()
+
+    destinations = list(args.destinations)
+    if args.destinations_file:
+        with open(args.destinations_file) as f:
+            destinations += [line.strip() for line in f if line.strip()]
+    if not destinations:
+        parser.error("no destinations given")
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    asyncio.run(build(destinations, args.base_city, args.out, args.rounds))
+
+if __name__ == "__main__":
+    main()
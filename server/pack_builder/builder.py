@@ -0,0 +1,87 @@
+import logging
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.models.request import ItineraryRequest
+from app.services.accommodations_service import add_dining_images, generate_accommodations, generate_dining
+from app.services.activities_service import add_activity_images, generate_activities, pooled_activities
+from app.services.itinerary_service import ESSENTIAL_INFO_FALLBACK, generate_essential_info
+from app.services.venue_store import ACTIVITY_CATEGORIES, excluded_names, sample_request, venue_key
+from app.services.weather_service import get_climate_normals, get_coordinates
+from app.utils.destination_pack import write_pack
+from app.utils.image_cache import normalize_cache_text
+
+logger = logging.getLogger(__name__)
+
+def pack_directory(out_dir: str, destination: str) -> Path:
+    """Directory of a destination's pack inside out_dir"""
+    return Path(out_dir) / re.sub(r"\s+", "-", normalize_cache_text(destination))
+
+def _merge(venues: List[Dict[str, Any]], new_venues: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    known = {venue_key(venue) for venue in venues}
+    return venues + [venue for venue in new_venues if venue_key(venue) and venue_key(venue) not in known]
+
+async def build_venues(request: ItineraryRequest, rounds: int) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Generate a destination's venues, each round asking for places not generated yet,
+    and resolve their images.
+    """
+    destination = request.location.destination
+    activities, accommodations, dining = [], [], []
+    for _ in range(rounds):
+        activities = _merge(activities, pooled_activities(
+            await generate_activities(request, exclude=excluded_names(activities) or None)
+        ))
+        accommodations = _merge(accommodations, await generate_accommodations(request, excluded_names(accommodations) or None))
+        dining = _merge(dining, await generate_dining(request, excluded_names(dining) or None))
+
+    by_category = {category: [activity for activity in activities if activity.get("category") == category]
+                   for category in ACTIVITY_CATEGORIES}
+    await add_activity_images(by_category, destination)
+    await add_dining_images(dining)
+    return {"activities": activities, "accommodations": accommodations, "dining": dining}
+
+async def build_pack(destination: str, base_cities: List[str], out_dir: str, rounds: int = 1,
+                     aliases: Optional[List[str]] = None) -> Path:
+    """
+    Run the component services for a destination and write its pack.
+
+    Args:
+        destination: Destination name
+        base_cities: Base cities to pack essential info and coordinates for
+        out_dir: Directory holding all packs
+        rounds: Venue generation rounds; each adds places the previous ones missed
+        aliases: Other names the destination is requested by
+
+    Returns:
+        Path of the written pack
+    """
+    logger.info(f"Building destination pack for {destination}")
+    request = sample_request(destination, base_cities[0])
+    venues = await build_venues(request, rounds)
+
+    places = {}
+    for place in [destination] + base_cities:
+        coordinates = await get_coordinates(place)
+        if coordinates:
+            places[place] = coordinates
+
+    essential_info = {}
+    for base_city in base_cities:
+        info = await generate_essential_info(sample_request(destination, base_city), {})
+        if isinstance(info, dict) and info.get("emergency_contacts") and info != ESSENTIAL_INFO_FALLBACK:
+            essential_info[base_city] = info
+
+    climate = None
+    if destination in places:
+        climate = await get_climate_normals(*places[destination])
+
+    path = write_pack(str(pack_directory(out_dir, destination)), destination, venues, places,
+                      essential_info, climate, aliases)
+    logger.info(
+        f"Wrote {path}: {', '.join(f'{len(items)} {kind}' for kind, items in venues.items())}, "
+        f"{len(places)} places, essential info for {len(essential_info)} base cities, "
+        f"{'with' if climate is not None else 'without'} climate normals"
+    )
+    return path
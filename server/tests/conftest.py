@@ -0,0 +1,11 @@
+import pytest
+
+from app.utils import knowledge_cache
+from app.utils.persistent_cache import PersistentCache
+
+@pytest.fixture
+def knowledge_store(tmp_path, monkeypatch):
+    """An empty knowledge cache for the test"""
+    store = PersistentCache(str(tmp_path / "knowledge.sqlite"), "knowledge")
+    monkeypatch.setattr(knowledge_cache, "knowledge_cache", store)
+    return store
@@ -0,0 +1,43 @@
+from app.services.activities_service import deduplicate_activities, is_duplicate_activity
+from app.services.itinerary_service import fill_day_gaps
+from app.utils.spatial import VenueIndex
+
+def activity(title, lat=32.2432, lng=77.1892, **fields):
+    return {"title": title, "location": {"coordinates": {"lat": lat, "lng": lng}}, **fields}
+
+def test_cross_category_duplicates_are_merged():
+    activities = {
+        "must_see": [activity("Hadimba Temple", priority=2)],
+        "cultural": [activity("Visit the Hadimba Temple", lat=32.2433, priority=1), activity("Manu Temple", lat=32.26)],
+    }
+    assert deduplicate_activities(activities, ["must_see", "cultural"]) == 1
+    assert [a["title"] for a in activities["must_see"]] == ["Hadimba Temple"]
+    assert [a["title"] for a in activities["cultural"]] == ["Manu Temple"]
+    assert activities["must_see"][0]["tags"] == ["must_see", "cultural"]
+    assert activities["must_see"][0]["priority"] == 1
+
+def test_near_titles_need_to_be_close():
+    activities = {
+        "outdoor": [
+            activity("Solang Valley Paragliding"),
+            activity("Paragliding in Solang Valley", lat=32.2437),
+            activity("Solang Valley Paragliding", lat=32.40),
+        ],
+    }
+    assert deduplicate_activities(activities, ["outdoor"]) == 1
+    assert len(activities["outdoor"]) == 2
+
+def test_same_title_without_coordinates_is_duplicate():
+    assert is_duplicate_activity({"title": "Mall Road"}, [activity("The Mall Road")])
+    assert not is_duplicate_activity({"title": "Old Manali"}, [activity("Mall Road")])
+
+def test_fill_day_gaps_skips_duplicate_fillers():
+    trip_index = VenueIndex()
+    destination_index = VenueIndex()
+    destination_index.add_many([
+        activity("Visit Hadimba Temple", lat=32.2433),
+        activity("Vashisht Hot Springs", lat=32.2700),
+    ], "activity")
+    days = {1: {"activities": [activity("Hadimba Temple")], "restaurants": []}}
+    assert fill_day_gaps(days, trip_index, destination_index, 2, 0) == 1
+    assert [a["title"] for a in days[1]["activities"]] == ["Hadimba Temple", "Vashisht Hot Springs"]
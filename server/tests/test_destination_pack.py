@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from app.services import pack_store
+from app.services.pack_store import pack_coordinates
+from app.utils.destination_pack import CLIMATE_COLUMNS, DestinationPack, write_pack
+
+@pytest.fixture
+def pack(tmp_path):
+    climate = np.full((12, len(CLIMATE_COLUMNS)), np.nan)
+    climate[9] = [22.0, 8.0, 40.0, 0.2, 15.0]
+    directory = write_pack(
+        str(tmp_path / "manali"),
+        "Manali",
+        {
+            "activities": [{"title": "Hadimba Temple"}, {"title": "Solang Valley"}],
+            "dining": [{"name": "Café 1947"}]
+        },
+        {"Manali": (32.2432, 77.1892), "Solang Valley": (32.3166, 77.1577)},
+        {"Delhi": {"emergency_contacts": ["112"]}},
+        climate=climate,
+        aliases=["Manali, India"]
+    )
+    return DestinationPack(str(directory))
+
+def test_venues_by_kind(pack):
+    assert [venue["title"] for venue in pack.venues("activities")] == ["Hadimba Temple", "Solang Valley"]
+    assert pack.venues("dining") == [{"name": "Café 1947"}]
+    assert pack.venues("accommodations") == []
+    assert pack.venues("unknown") == []
+
+def test_coordinates_resolve_aliases(pack):
+    assert pack.coordinates("Manali") == pytest.approx((32.2432, 77.1892))
+    assert pack.coordinates("manali, india") == pytest.approx((32.2432, 77.1892))
+    assert pack.coordinates("Solang Valley") == pytest.approx((32.3166, 77.1577))
+    assert pack.coordinates("Goa") is None
+
+def test_essential_info(pack):
+    assert pack.essential_info("delhi") == {"emergency_contacts": ["112"]}
+    assert pack.essential_info("Mumbai") is None
+
+def test_climate_normals(pack):
+    october = pack.climate_normals(10)
+    assert october["temperature_max"] == pytest.approx(22.0)
+    assert october["wet_day_probability"] == pytest.approx(0.2)
+    assert pack.climate_normals(1) is None
+
+def test_rewriting_a_pack_replaces_it(tmp_path):
+    directory = str(tmp_path / "goa")
+    write_pack(directory, "Goa", {"dining": [{"name": "Old"}]}, {"Goa": (15.3, 74.1)}, {})
+    write_pack(directory, "Goa", {"dining": [{"name": "New"}]}, {"Goa": (15.3, 74.1)}, {})
+    assert DestinationPack(directory).venues("dining") == [{"name": "New"}]
+
+def test_unsupported_version_is_rejected(tmp_path):
+    directory = write_pack(str(tmp_path / "goa"), "Goa", {}, {"Goa": (15.3, 74.1)}, {})
+    manifest = directory / "manifest.json"
+    manifest.write_text(manifest.read_text().replace('"version": 1', '"version": 99'))
+    with pytest.raises(ValueError):
+        DestinationPack(str(directory))
+
+def test_places_are_listed_in_the_manifest(pack):
+    assert pack.places == ["manali", "solang valley"]
+
+def test_pack_coordinates_of_base_cities(tmp_path, monkeypatch):
+    write_pack(str(tmp_path / "manali"), "Manali", {}, {"Manali": (32.2, 77.2), "Delhi": (28.6, 77.2)}, {})
+    goa = write_pack(str(tmp_path / "goa"), "Goa", {}, {"Goa": (15.3, 74.1), "Mumbai": (19.1, 72.9)},
+                     {"Mumbai": {"emergency_contacts": ["112"]}})
+    # Packs built before places were listed resolve their base cities
+    manifest = goa / "manifest.json"
+    manifest.write_text(manifest.read_text().replace('"places"', '"unused"'))
+    monkeypatch.setattr(pack_store, "DESTINATION_PACKS_PATH", str(tmp_path))
+    monkeypatch.setattr(pack_store, "_packs", None)
+    monkeypatch.setattr(pack_store, "_place_packs", {})
+    assert pack_coordinates("Manali") == pytest.approx((32.2, 77.2))
+    assert pack_coordinates("delhi") == pytest.approx((28.6, 77.2))
+    assert pack_coordinates("Mumbai") == pytest.approx((19.1, 72.9))
+    assert pack_coordinates("Pune") is None
@@ -0,0 +1,15 @@
+import pytest
+
+from app.utils.helpers import matches_place
+
+@pytest.mark.parametrize("place_name, query, expected", [
+    ("Manali, Himachal Pradesh", "Manali", True),
+    ("Old Manali", "Manali, Himachal Pradesh", True),
+    ("Manali", "Old Manali", True),
+    ("Shimla", "Manali", False),
+    (", Himachal Pradesh", "Manali", False),
+    ("Manali", ", Himachal Pradesh", False),
+    ("", "Manali", False),
+])
+def test_matches_place(place_name, query, expected):
+    assert matches_place(place_name, query) is expected
@@ -0,0 +1,65 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from app.services import accommodations_service
+from app.services.accommodations_service import split_hotel_stays
+
+@pytest.fixture(autouse=True)
+def stay_rules(monkeypatch):
+    monkeypatch.setattr(accommodations_service, "MIN_HOTEL_STAY_NIGHTS", 2)
+    monkeypatch.setattr(accommodations_service, "HOTEL_CHANGE_MIN_SAVING_KM", 25.0)
+
+def runs(assignment):
+    return [len(list(group)) for _, group in itertools.groupby(assignment)]
+
+def plan_cost(distances, assignment):
+    changes = len(runs(assignment)) - 1
+    return sum(distances[hotel, day] for day, hotel in enumerate(assignment)) + changes * 25.0
+
+def test_one_area_keeps_the_base_hotel():
+    distances = np.array([[2.0, 3.0, 2.0, 4.0], [10.0, 12.0, 9.0, 11.0]])
+    assert split_hotel_stays(distances, np.array([0, 1])) == [0, 0, 0, 0]
+
+def test_two_areas_split_into_two_stays():
+    distances = np.array([
+        [1.0, 2.0, 1.0, 60.0, 70.0, 65.0],
+        [60.0, 70.0, 65.0, 1.0, 2.0, 1.0],
+    ])
+    assert split_hotel_stays(distances, np.array([0, 1])) == [0, 0, 0, 1, 1, 1]
+
+def test_alternating_days_never_make_one_night_stays():
+    distances = np.array([[0.0, 10.0] * 3, [10.0, 0.0] * 3])
+    assert split_hotel_stays(distances, np.array([0, 1])) == [0] * 6
+
+def test_small_saving_does_not_pay_for_a_change():
+    distances = np.array([[5.0, 5.0, 20.0, 20.0], [20.0, 20.0, 5.0, 5.0]])
+    # Moving saves 30 km over the last two days, more than the 25 km a change costs
+    assert split_hotel_stays(distances, np.array([0, 1])) == [0, 0, 1, 1]
+    distances[0, 2:] = 15.0
+    assert split_hotel_stays(distances, np.array([0, 1])) == [0, 0, 0, 0]
+
+def test_ties_go_to_the_better_ranked_hotel():
+    distances = np.array([[3.0, 3.0, 3.0], [3.0, 3.0, 3.0]])
+    assert split_hotel_stays(distances, np.array([1, 0])) == [1, 1, 1]
+
+def test_single_day_trip():
+    distances = np.array([[4.0], [1.0]])
+    assert split_hotel_stays(distances, np.array([1, 0])) == [1]
+
+def test_matches_exhaustive_search():
+    generator = np.random.default_rng(7)
+    for _ in range(30):
+        hotels, days = generator.integers(2, 4), generator.integers(2, 7)
+        distances = generator.uniform(0, 80, size=(hotels, days)).round(1)
+        ranking = np.argsort(distances.sum(axis=1), kind="stable")
+        chosen = split_hotel_stays(distances, ranking)
+        assert min(runs(chosen)) >= 2
+        feasible = [
+            assignment
+            for assignment in itertools.product(range(hotels), repeat=days)
+            if min(runs(assignment)) >= 2
+        ]
+        best = min(plan_cost(distances, assignment) for assignment in feasible)
+        assert plan_cost(distances, chosen) == pytest.approx(best)
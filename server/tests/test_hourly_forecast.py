@@ -0,0 +1,103 @@
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from app.services import weather_service
+from app.services.weather_service import HourlyForecast, cache_hourly_forecast, get_cached_hourly_forecast
+
+def make_forecast(hours=48, start_date="2026-10-28", **overrides):
+    values = {
+        "temperature": np.arange(hours, dtype=float),
+        "precipitation_probability": np.full(hours, 10.0),
+        "precipitation": np.full(hours, 0.5),
+        "wind_speed": np.full(hours, 4.0),
+        "weather_code": np.zeros(hours),
+    }
+    values.update(overrides)
+    return HourlyForecast(start_date, **values)
+
+def test_window_summarizes_hours():
+    window = make_forecast().window("2026-10-28", "09:00", "12:00")
+    assert window["temperature"] == {"min": 9.0, "max": 11.0, "avg": 10.0}
+    assert window["precipitation_mm"] == 1.5
+    assert window["wind_speed"] == 4.0
+    assert window["precipitation_probability"] == 10
+
+def test_window_rounds_partial_hours_out():
+    window = make_forecast().window("2026-10-28", "09:30", "10:15")
+    assert window["temperature"]["min"] == 9.0
+    assert window["temperature"]["max"] == 10.0
+
+def test_window_on_later_day_and_past_midnight():
+    forecast = make_forecast()
+    assert forecast.window("2026-10-29", "08:00", "09:00")["temperature"]["avg"] == 32.0
+    overnight = forecast.window("2026-10-28", "22:00", "02:00")
+    assert overnight["temperature"]["min"] == 22.0
+    assert overnight["temperature"]["max"] == 25.0
+
+def test_window_reports_worst_weather_code():
+    codes = np.zeros(48)
+    codes[10] = 63
+    window = make_forecast(weather_code=codes).window("2026-10-28", "09:00", "12:00")
+    assert window["conditions"] == weather_service.WEATHER_CODES[63]
+
+def test_window_outside_forecast_is_none():
+    forecast = make_forecast()
+    assert forecast.window("2026-10-27", "09:00", "10:00") is None
+    assert forecast.window("2026-10-30", "09:00", "10:00") is None
+    assert forecast.window("2026-10-28", "bad", "10:00") is None
+
+def test_window_skips_missing_values():
+    temperature = np.arange(48, dtype=float)
+    temperature[10] = np.nan
+    precipitation = np.full(48, np.nan)
+    wind = np.full(48, 4.0)
+    wind[9] = np.nan
+    window = make_forecast(temperature=temperature, precipitation=precipitation, wind_speed=wind).window(
+        "2026-10-28", "09:00", "12:00"
+    )
+    assert window["temperature"] == {"min": 9.0, "max": 11.0, "avg": 10.0}
+    assert window["precipitation_mm"] is None
+    assert window["wind_speed"] == 4.0
+
+def test_window_without_temperatures_is_none():
+    temperature = np.arange(48, dtype=float)
+    temperature[9:12] = np.nan
+    assert make_forecast(temperature=temperature).window("2026-10-28", "09:00", "12:00") is None
+
+def test_window_with_all_missing_codes_is_unknown():
+    window = make_forecast(weather_code=np.full(48, np.nan), precipitation_probability=np.full(48, np.nan)).window(
+        "2026-10-28", "09:00", "12:00"
+    )
+    assert window["conditions"] == "Unknown"
+    assert window["precipitation_probability"] is None
+
+def test_covers():
+    forecast = make_forecast()
+    assert forecast.covers("2026-10-28", "2026-10-29")
+    assert not forecast.covers("2026-10-28", "2026-10-30")
+    assert not forecast.covers("2026-10-27", "2026-10-28")
+
+@pytest.fixture
+def hourly_cache(monkeypatch):
+    cache = OrderedDict()
+    monkeypatch.setattr(weather_service, "_HOURLY_CACHE", cache)
+    monkeypatch.setattr(weather_service, "HOURLY_CACHE_MAX_ENTRIES", 2)
+    return cache
+
+def test_hourly_cache_evicts_least_recently_used(hourly_cache):
+    cache_hourly_forecast((1.0, 1.0), make_forecast())
+    cache_hourly_forecast((2.0, 2.0), make_forecast())
+    assert get_cached_hourly_forecast(1.0, 1.0, "2026-10-28", "2026-10-28") is not None
+    cache_hourly_forecast((3.0, 3.0), make_forecast())
+    assert list(hourly_cache) == [(1.0, 1.0), (3.0, 3.0)]
+
+def test_hourly_cache_drops_expired_and_uncovered(hourly_cache):
+    expired = make_forecast()
+    expired.fetched_at -= weather_service.HOURLY_CACHE_TTL_SECONDS + 1
+    hourly_cache[(1.0, 1.0)] = expired
+    assert get_cached_hourly_forecast(1.0, 1.0, "2026-10-28", "2026-10-28") is None
+    assert (1.0, 1.0) not in hourly_cache
+    cache_hourly_forecast((2.0, 2.0), make_forecast())
+    assert get_cached_hourly_forecast(2.0, 2.0, "2026-10-28", "2026-10-30") is None
@@ -0,0 +1,40 @@
+import asyncio
+import warnings
+
+import pytest
+
+from app.utils.http_client import close_http_sessions, get_http_session, open_http_sessions, register_http_client
+
+register_http_client("test-client")
+
+def test_lazy_pool_moves_to_a_new_loop_without_leaking():
+    async def open_session():
+        return get_http_session("test-client")
+
+    first = asyncio.run(open_session())
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", ResourceWarning)
+
+        async def reopen():
+            session = get_http_session("test-client")
+            await asyncio.sleep(0)
+            await close_http_sessions()
+            return session
+
+        second = asyncio.run(reopen())
+    assert second is not first
+    assert first.closed
+
+def test_lifespan_pool_refuses_a_foreign_loop():
+    async def open_pool():
+        open_http_sessions()
+
+    asyncio.run(open_pool())
+    try:
+        async def use():
+            get_http_session("test-client")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(use())
+    finally:
+        asyncio.run(close_http_sessions())
@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+import pytest
+
+from app.utils import knowledge_cache
+from app.utils.knowledge_cache import cache_knowledge, get_knowledge_entry, get_or_generate
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Wall clock the caches see, moved forward by the test"""
+    now = [time.time()]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+class Generator:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return f"value {self.calls}"
+
+def serve(key, generate, **options):
+    return get_or_generate(key, generate, ttl_seconds=100, soft_ttl_seconds=10, **options)
+
+async def settle():
+    """Wait for background refreshes to finish"""
+    while knowledge_cache._refresh_tasks:
+        await asyncio.gather(*knowledge_cache._refresh_tasks)
+
+def test_soft_ttl_caps_at_the_hard_ttl(knowledge_store, clock):
+    cache_knowledge("meta|manali", "value", 10, 60)
+    clock[0] += 5
+    assert get_knowledge_entry("meta|manali") == ("value", False)
+    clock[0] += 10
+    assert get_knowledge_entry("meta|manali") == (None, False)
+
+def test_entries_go_from_fresh_to_stale_to_missing(knowledge_store, clock):
+    cache_knowledge("meta|manali", "value", 100, 10)
+    assert get_knowledge_entry("meta|manali") == ("value", False)
+    clock[0] += 11
+    assert get_knowledge_entry("meta|manali") == ("value", True)
+    clock[0] += 90
+    assert get_knowledge_entry("meta|manali") == (None, False)
+
+def test_fresh_entries_are_served_without_generating(knowledge_store, clock):
+    generate = Generator()
+
+    async def run():
+        first = await serve("meta|manali", generate)
+        clock[0] += 5
+        return first, await serve("meta|manali", generate)
+
+    assert asyncio.run(run()) == ("value 1", "value 1")
+    assert generate.calls == 1
+
+def test_stale_entries_are_served_while_refreshing(knowledge_store, clock):
+    generate = Generator()
+
+    async def run():
+        await serve("meta|manali", generate)
+        clock[0] += 11
+        stale = await serve("meta|manali", generate)
+        await settle()
+        return stale, get_knowledge_entry("meta|manali")
+
+    stale, entry = asyncio.run(run())
+    assert stale == "value 1"
+    assert entry == ("value 2", False)
+    assert generate.calls == 2
+
+def test_concurrent_stale_hits_refresh_once(knowledge_store, clock):
+    generate = Generator()
+
+    async def run():
+        await serve("meta|manali", generate)
+        clock[0] += 11
+        served = await asyncio.gather(*(serve("meta|manali", generate) for _ in range(5)))
+        await settle()
+        return served
+
+    assert asyncio.run(run()) == ["value 1"] * 5
+    assert generate.calls == 2
+    assert not knowledge_cache._refreshing_keys
+
+def test_concurrent_misses_generate_once(knowledge_store, clock):
+    generate = Generator()
+
+    async def run():
+        return await asyncio.gather(*(serve("meta|manali", generate) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["value 1"] * 5
+    assert generate.calls == 1
+
+def test_expired_entries_are_generated_again(knowledge_store, clock):
+    generate = Generator()
+
+    async def run():
+        await serve("meta|manali", generate)
+        clock[0] += 101
+        return await serve("meta|manali", generate)
+
+    assert asyncio.run(run()) == "value 2"
+
+def test_uncacheable_values_are_not_stored(knowledge_store, clock):
+    generate = Generator()
+
+    async def run():
+        await serve("meta|manali", generate, cacheable=lambda value: False)
+        return await serve("meta|manali", generate, cacheable=lambda value: False)
+
+    assert asyncio.run(run()) == "value 2"
+    assert get_knowledge_entry("meta|manali") == (None, False)
+
+def test_failed_refresh_keeps_the_stale_value(knowledge_store, clock):
+    async def fail():
+        raise RuntimeError("LLM unavailable")
+
+    async def run():
+        cache_knowledge("meta|manali", "value", 100, 10)
+        clock[0] += 11
+        stale = await serve("meta|manali", fail)
+        await settle()
+        return stale
+
+    assert asyncio.run(run()) == "value"
+    assert get_knowledge_entry("meta|manali") == ("value", True)
+    assert not knowledge_cache._refreshing_keys
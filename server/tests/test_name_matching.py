@@ -0,0 +1,34 @@
+from app.utils.name_matching import match_names, normalize_hotel_name
+
+def test_normalize_hotel_name():
+    assert normalize_hotel_name("The Oberoi Cecil, Shimla") == "oberoi cecil shimla"
+    assert normalize_hotel_name("Café Résidence Hotel & Spa") == "cafe residence"
+    assert normalize_hotel_name("The Hotel") == "the hotel"
+    assert normalize_hotel_name(None) == ""
+
+def test_exact_keys_match_one_to_one():
+    left = ["Snow Valley Resorts", "Snow Valley Resort", "Span Resort"]
+    right = ["snow valley", "Span Resort & Spa"]
+    assert match_names(left, right) == {0: 0, 2: 1}
+
+def test_fuzzy_matches_need_the_threshold():
+    left = ["Manali Heights Inn", "Apple Country Resort", "Mountain View Cottage"]
+    right = ["Manali Heights Boutique", "Apple Country", "Riverside Camp"]
+    assert match_names(left, right) == {0: 0, 1: 1}
+    assert match_names(left, right, threshold=0.8) == {1: 1}
+
+def test_greedy_assignment_prefers_the_most_similar_pair():
+    # The first left name is closer to the first right name than to the second, but the
+    # second left name is closer still, so it gets the first right name
+    left = ["Pine Grove Cottages", "Pine Grove Manali Cottages"]
+    right = ["Pine Grove Manali Cottages Kullu", "Pine Grove Huts"]
+    assert match_names(left, right) == {1: 0, 0: 1}
+
+def test_each_right_name_is_used_once():
+    left = ["Hill Top Cottage", "Hill Top Cottages Manali"]
+    right = ["Hill Top Cottage Manali"]
+    assert match_names(left, right) == {0: 0}
+
+def test_empty_names_never_match():
+    assert match_names(["", "Hotel"], ["", "hotel"]) == {1: 1}
+    assert match_names([], ["Span Resort"]) == {}
@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+from app.utils.popularity import DecayedCountMinSketch, PopularityTracker
+
+DAY = 24 * 3600
+
+def test_sketch_never_undercounts():
+    sketch = DecayedCountMinSketch(width=64, depth=4, half_life_seconds=DAY)
+    now = time.time()
+    for index in range(200):
+        sketch.add(f"key-{index % 20}", now=now)
+    for index in range(20):
+        assert sketch.estimate(f"key-{index}", now=now) >= 10 - 1e-9
+
+def test_sketch_counts_halve_every_half_life():
+    sketch = DecayedCountMinSketch(half_life_seconds=DAY)
+    now = time.time()
+    assert sketch.add("goa", count=8, now=now) == pytest.approx(8)
+    assert sketch.estimate("goa", now=now + DAY) == pytest.approx(4)
+    assert sketch.estimate("goa", now=now + 3 * DAY) == pytest.approx(1)
+
+def test_sketch_survives_rescaling():
+    sketch = DecayedCountMinSketch(half_life_seconds=1.0)
+    now = time.time()
+    sketch.add("goa", now=now)
+    later = now + 100.0
+    sketch.add("goa", count=2, now=later)
+    assert sketch.estimate("goa", now=later) == pytest.approx(2, rel=1e-6)
+
+def test_tracker_keeps_the_heaviest_keys():
+    tracker = PopularityTracker(capacity=3, half_life_seconds=DAY)
+    now = time.time()
+    for key, count in [("goa", 5), ("manali", 3), ("jaipur", 2), ("leh", 1)]:
+        for _ in range(count):
+            tracker.record(key, payload={"destination": key}, now=now)
+    top = tracker.top(3, now=now)
+    assert [key for key, _, _ in top] == ["goa", "manali", "jaipur"]
+    assert top[0][2] == {"destination": "goa"}
+
+def test_tracker_min_count():
+    tracker = PopularityTracker(capacity=10, half_life_seconds=DAY)
+    now = time.time()
+    tracker.record("goa", now=now)
+    tracker.record("goa", now=now)
+    tracker.record("leh", now=now)
+    assert [key for key, _, _ in tracker.top(5, min_count=2, now=now)] == ["goa"]
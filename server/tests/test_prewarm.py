@@ -0,0 +1,45 @@
+import pytest
+
+from app.models.request import ItineraryRequest
+from app.services import prewarm_service
+from app.services.prewarm_service import hot_steps, record_request
+from app.utils.knowledge_cache import place_key
+from app.utils.popularity import PopularityTracker
+
+@pytest.fixture(autouse=True)
+def trackers(monkeypatch):
+    monkeypatch.setattr(prewarm_service, "destination_popularity", PopularityTracker(10, half_life_seconds=3600))
+    monkeypatch.setattr(prewarm_service, "city_pair_popularity", PopularityTracker(10, half_life_seconds=3600))
+    monkeypatch.setattr(prewarm_service, "get_pack", lambda destination: None)
+
+def make_request(destination="Manali", start="2027-01-05", children=0, context=None):
+    return ItineraryRequest(**{
+        "location": {"destination": destination, "baseCity": "Delhi"},
+        "dates": {"startDate": start, "endDate": start},
+        "travelers": {"count": 2 + children, "adults": 2, "children": children},
+        "tripStyle": ["adventure"],
+        "preferences": {"dietaryPreferences": ["vegan"]},
+        "additionalContext": context,
+    })
+
+def test_popular_entries_are_warmed_from_a_neutral_request():
+    record_request(make_request(start="2027-01-05", children=3, context="Honeymoon"))
+    record_request(make_request(start="2027-03-10"))
+    steps = hot_steps()
+    keys = {step.key for step in steps}
+    assert place_key("forecast", "Manali") in keys
+    assert place_key("coordinates", "Delhi") in keys
+    # City pair entries are keyed by the sample trip's month, not by either request's
+    assert not any("2027-01" in key or "2027-03" in key for key in keys)
+    assert not any("family" in key for key in keys)
+
+def test_weather_is_warmed_without_llm_calls():
+    record_request(make_request())
+    record_request(make_request())
+    weather = [step for step in hot_steps() if step.kind == "weather"]
+    assert len(weather) == 1
+    assert weather[0].llm_calls == 0
+
+def test_rare_entries_are_not_warmed():
+    record_request(make_request())
+    assert hot_steps() == []
@@ -0,0 +1,79 @@
+import time
+
+from app.utils.request_vectors import SimilarityIndex, char_ngrams, request_fields
+
+def fields(destination, interests=("trekking",), pace="moderate"):
+    canonical = {"base_city": "delhi", "trip_style": ["adventure"], "interests": list(interests), "pace": pace}
+    return request_fields(canonical, destination)
+
+def test_request_fields_split_place_and_region():
+    result = fields("Manali, Himachal Pradesh")
+    assert result["place"] == "manali"
+    assert result["region"] == "himachal pradesh"
+    assert result["interests"] == "trekking"
+
+def test_char_ngrams_are_padded():
+    grams = char_ngrams("goa")
+    assert " go" in grams
+    assert "oa " in grams
+
+def test_search_ranks_the_same_place_first():
+    index = SimilarityIndex()
+    index.add("manali", fields("Manali, India"), payload="m")
+    index.add("goa", fields("Goa, India", interests=("beaches",)), payload="g")
+    results = index.search(fields("Manali, Himachal"), limit=2)
+    assert [key for key, _, _ in results] == ["manali", "goa"]
+    assert results[0][2] == "m"
+    assert results[0][1] > results[1][1]
+
+def test_identical_request_is_fully_similar():
+    index = SimilarityIndex()
+    index.add("goa", fields("Goa, India"))
+    index.add("leh", fields("Leh, Ladakh", interests=("monasteries",)))
+    [(key, similarity, _)] = index.search(fields("Goa, India"), limit=1)
+    assert key == "goa"
+    assert similarity > 0.99
+
+def test_threshold_filters_results():
+    index = SimilarityIndex()
+    index.add("goa", fields("Goa, India", interests=("beaches",), pace="relaxed"))
+    assert index.search(fields("Manali, Himachal"), threshold=0.9) == []
+
+def test_add_replaces_and_remove_forgets():
+    index = SimilarityIndex()
+    index.add("trip", fields("Goa, India"))
+    index.add("trip", fields("Manali, India"))
+    assert len(index) == 1
+    [(key, similarity, _)] = index.search(fields("Manali, India"))
+    assert key == "trip" and similarity > 0.99
+
+    index.remove("trip")
+    assert "trip" not in index
+    assert index.search(fields("Manali, India")) == []
+
+def test_index_is_capped_and_evicts_the_oldest():
+    index = SimilarityIndex(capacity=2)
+    index.add("goa", fields("Goa, India"))
+    index.add("leh", fields("Leh, Ladakh"))
+    index.add("manali", fields("Manali, India"))
+    assert len(index) == 2
+    assert "goa" not in index
+    assert {key for key, _, _ in index.search(fields("Goa, India"), limit=5)} == {"leh", "manali"}
+
+def test_expired_entries_are_pruned():
+    index = SimilarityIndex()
+    index.add("old", fields("Goa, India"), expires_at=time.time() - 1)
+    index.add("new", fields("Goa, India"), expires_at=time.time() + 60)
+    assert "old" not in index
+    assert [key for key, _, _ in index.search(fields("Goa, India"))] == ["new"]
+
+def test_similarities_stay_current_after_changes():
+    index = SimilarityIndex()
+    index.add("goa", fields("Goa, India"))
+    first = index.search(fields("Goa, India"))[0][1]
+    for place in ("Leh, India", "Manali, India", "Ooty, India"):
+        index.add(place, fields(place))
+    index.remove("Leh, India")
+    [(key, similarity, _)] = index.search(fields("Goa, India"), limit=1)
+    assert key == "goa"
+    assert similarity > 0.99 and first > 0.99
@@ -0,0 +1,71 @@
+from datetime import datetime
+
+import pytest
+
+from app.models.request import ItineraryRequest
+from app.utils.knowledge_cache import WEATHER_TTL
+from app.utils.response_cache import RESPONSE_CACHE_MAX_TTL, canonical_request, request_fingerprint, response_ttl
+
+def make_request(**overrides):
+    body = {
+        "location": {"destination": "Manali", "baseCity": "Delhi"},
+        "dates": {"startDate": "2026-10-28", "endDate": "2026-10-31"},
+        "travelers": {"count": 2, "adults": 2},
+        "budget": {"ceiling": 60000, "currency": "INR"},
+        "tripStyle": ["adventure", "culture"],
+        "preferences": {"interests": ["trekking", "food"], "pace": "moderate"},
+    }
+    for path, value in overrides.items():
+        *parents, field = path.split(".")
+        target = body
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[field] = value
+    return ItineraryRequest(**body)
+
+@pytest.mark.parametrize("overrides", [
+    {"location.destination": "manali "},
+    {"location.destination": "MANALI"},
+    {"location.baseCity": "  Delhi"},
+    {"tripStyle": ["culture", "adventure"]},
+    {"tripStyle": ["Culture", "adventure", "culture "]},
+    {"preferences.interests": ["Food", "trekking"]},
+    {"dates.startDate": "2026-10-28 "},
+    {"budget.currency": "inr"},
+    {"preferences.accessibility": {"mobilityNeeds": False}},
+    {"additionalContext": "   "},
+])
+def test_equivalent_requests_share_a_fingerprint(overrides):
+    assert canonical_request(make_request(**overrides)) == canonical_request(make_request())
+    assert request_fingerprint(make_request(**overrides)) == request_fingerprint(make_request())
+
+def test_context_whitespace_and_case_do_not_matter():
+    first = make_request(additionalContext="Prefer  quiet\nhotels")
+    second = make_request(additionalContext=" prefer quiet hotels ")
+    assert request_fingerprint(first) == request_fingerprint(second)
+
+@pytest.mark.parametrize("overrides", [
+    {"location.destination": "Shimla"},
+    {"dates.endDate": "2026-11-01"},
+    {"travelers.count": 3},
+    {"budget.ceiling": 70000},
+    {"tripStyle": ["adventure"]},
+    {"preferences.dietaryPreferences": ["vegan"]},
+    {"preferences.accessibility": {"mobilityNeeds": True}},
+    {"additionalContext": "Honeymoon"},
+])
+def test_different_trips_get_different_fingerprints(overrides):
+    assert request_fingerprint(make_request(**overrides)) != request_fingerprint(make_request())
+
+def test_fingerprint_is_stable():
+    fingerprint = request_fingerprint(make_request())
+    assert fingerprint == request_fingerprint(make_request())
+    assert len(fingerprint) == 32
+
+def test_response_ttl():
+    request = make_request()
+    start = datetime(2026, 10, 28).timestamp()
+    assert response_ttl(request, now=start - 3 * 24 * 3600) == WEATHER_TTL
+    assert response_ttl(request, now=start - 30 * 24 * 3600) == RESPONSE_CACHE_MAX_TTL
+    assert response_ttl(request, now=start - 100) == pytest.approx(100)
+    assert response_ttl(request, now=start + 1) == 0.0
@@ -0,0 +1,54 @@
+import numpy as np
+
+from app.utils.route_optimizer import order_stops, route_length
+
+def line_distances(positions):
+    """Distance matrix between points on a line"""
+    positions = np.asarray(positions, dtype=np.float64)
+    return np.abs(positions[:, None] - positions[None, :])
+
+def test_route_length_skips_stops_without_coordinates():
+    distances = line_distances([0, 1, 5])
+    assert route_length(distances, [0, None, 2]) == 0.0
+    assert route_length(distances, [0, 1, 2]) == 5.0
+
+def test_order_stops_shortens_a_zigzag():
+    distances = line_distances([0, 10, 1, 11, 2])
+    order, original, optimized = order_stops(distances, [0, 1, 2, 3, 4], [True] * 5)
+    assert sorted(order) == [0, 1, 2, 3, 4]
+    assert optimized < original
+    assert optimized == route_length(distances, [order[k] for k in range(5)])
+
+def test_order_stops_keeps_anchored_stops_in_place():
+    distances = line_distances([0, 10, 1, 11, 2])
+    movable = [True, False, True, True, False]
+    order, _, _ = order_stops(distances, [0, 1, 2, 3, 4], movable)
+    assert order[1] == 1
+    assert order[4] == 4
+
+def test_order_stops_never_makes_the_route_longer():
+    distances = line_distances([0, 1, 2, 3])
+    order, original, optimized = order_stops(distances, [0, 1, 2, 3], [True] * 4)
+    assert optimized <= original
+    assert order == [0, 1, 2, 3]
+
+def test_order_stops_respects_allowed_slots():
+    distances = line_distances([0, 10, 1, 11])
+    points = [0, 1, 2, 3]
+    unconstrained, _, _ = order_stops(distances, points, [True] * 4)
+    assert unconstrained != [0, 1, 2, 3]
+
+    # Every stop may only stay where it is
+    allowed = np.eye(4, dtype=bool)
+    order, original, optimized = order_stops(distances, points, [True] * 4, allowed)
+    assert order == [0, 1, 2, 3]
+    assert optimized == original
+
+def test_order_stops_only_swaps_into_allowed_slots():
+    distances = line_distances([0, 10, 1, 11])
+    allowed = np.eye(4, dtype=bool)
+    # The stops at positions 1 and 2 may trade places, nothing else moves
+    allowed[1, 2] = allowed[2, 1] = True
+    order, original, optimized = order_stops(distances, [0, 1, 2, 3], [True] * 4, allowed)
+    assert order == [0, 2, 1, 3]
+    assert optimized < original
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from app.utils.travel_time import (
+    MAX_TERRAIN_FACTOR, MODE_PROFILES, estimate_journey, journey_minutes, terrain_factor,
+    travel_minutes, travel_mode, travel_time_matrix
+)
+
+@pytest.mark.parametrize("text, mode", [
+    ("Volvo bus", "bus"),
+    ("buses", "bus"),
+    ("taxi to the airport", "car"),
+    ("metro train", "metro"),
+    ("Railway", "train"),
+    ("trail walk", "walk"),
+    ("auto-rickshaw", "car"),
+    ("ferries", "ferry"),
+    ("business class flight", "flight"),
+    (None, "car"),
+])
+def test_travel_mode(text, mode):
+    assert travel_mode(text) == mode
+
+def test_trail_is_not_a_rail():
+    assert travel_mode("Trail") != "train"
+
+def test_terrain_factor_grows_with_elevation_up_to_the_cap():
+    factors = terrain_factor([0, 500, 2500, 100000])
+    assert factors[0] == factors[1] == 1.0
+    assert 1.0 < factors[2] < MAX_TERRAIN_FACTOR
+    assert factors[3] == MAX_TERRAIN_FACTOR
+
+def test_travel_minutes_per_mode():
+    speed, overhead, detour, _ = MODE_PROFILES["car"]
+    assert travel_minutes(10, "taxi") == pytest.approx(overhead + 10 * detour / speed * 60)
+    walk, flight = travel_minutes([1.0, 1000.0], ["walk", "flight"])
+    assert walk < 30
+    assert flight < travel_minutes(1000.0, "car")
+
+def test_terrain_slows_surface_travel_only():
+    assert travel_minutes(50, "car", 3000) > travel_minutes(50, "car", 0)
+    assert travel_minutes(500, "flight", 3000) == travel_minutes(500, "flight", 0)
+
+def test_travel_time_matrix():
+    distances, minutes = travel_time_matrix([(32.24, 77.19), (32.25, 77.19), (32.24, 77.19)])
+    assert distances.shape == minutes.shape == (3, 3)
+    assert np.all(np.diag(minutes) == 0)
+    assert distances[0, 1] == pytest.approx(1.11, abs=0.01)
+    assert minutes[0, 1] == minutes[1, 0] > 0
+
+def test_travel_time_matrix_without_points():
+    distances, minutes = travel_time_matrix([])
+    assert distances.shape == minutes.shape == (0, 0)
+
+def test_estimate_journey():
+    journey = estimate_journey((28.61, 77.21), (32.24, 77.19), max_elevation_m=2000)
+    assert journey["mountain"]
+    assert not journey["long_haul"]
+    assert journey["minutes"]["car"] > journey["minutes"]["flight"]
+    assert journey_minutes(journey, "Volvo bus") == journey["minutes"]["bus"]
+    assert journey_minutes(None, "bus") is None
@@ -0,0 +1,100 @@
+import pytest
+
+from app.models.request import ItineraryRequest
+from app.services.venue_store import (
+    MIN_RESTAURANTS, localize_prices, record_pool_use, select_activities, select_dining
+)
+
+def make_request(diets=None, mobility=False, children=0, budget=None):
+    return ItineraryRequest(**{
+        "location": {"destination": "Manali", "baseCity": "Delhi"},
+        "dates": {"startDate": "2026-10-28", "endDate": "2026-10-30"},
+        "travelers": {"count": 2 + children, "adults": 2, "children": children},
+        "budget": budget,
+        "tripStyle": ["adventure"],
+        "preferences": {"dietaryPreferences": diets, "accessibility": {"mobilityNeeds": mobility}},
+    })
+
+def restaurant(name, description="", price="₹500"):
+    return {"name": name, "description": description, "price_range": price}
+
+def activity(title, category, description="", priority=3):
+    return {"title": title, "category": category, "description": description, "priority": priority}
+
+@pytest.mark.parametrize("diet, description, expected", [
+    ("vegetarian", "Pure vegetarian thalis", True),
+    ("vegetarian", "Famous non-vegetarian grills", False),
+    ("vegetarian", "Non vegetarian curries", False),
+    ("non-vegetarian", "Non vegetarian curries", True),
+    ("vegan", "Veganism explained over coffee", False),
+    ("vegan", "Vegan bowls", True),
+    ("gluten free", "Gluten-free bakes", True),
+])
+def test_diets_match_whole_words(knowledge_store, diet, description, expected):
+    dining, _ = select_dining([restaurant("Cafe", description)], make_request(diets=[diet]))
+    assert bool(dining) is expected
+
+def test_no_dietary_preference_keeps_everything(knowledge_store):
+    pool = [restaurant("Cafe", "Momos"), restaurant("Dhaba", "Grills")]
+    dining, _ = select_dining(pool, make_request(diets=["No restrictions"]))
+    assert len(dining) == 2
+
+def test_dining_is_thin_when_too_few_are_pooled(knowledge_store):
+    pool = [restaurant(f"Cafe {i}", "vegetarian") for i in range(MIN_RESTAURANTS - 1)]
+    _, thin = select_dining(pool, make_request())
+    assert thin
+
+def test_restricted_shortfall_tops_up_once(knowledge_store):
+    pool = [restaurant(f"Cafe {i}", "Grills and kebabs") for i in range(10)]
+    pool.append(restaurant("Green Bowl", "Vegan bowls"))
+    request = make_request(diets=["Vegan"])
+
+    dining, thin = select_dining(pool, request)
+    assert [venue["name"] for venue in dining] == ["Green Bowl"]
+    assert thin
+    record_pool_use("dining", request, thin)
+
+    # The top-up did not bring enough vegan places; later vegan requests are served as is
+    _, thin = select_dining(pool, request)
+    assert not thin
+    # Other restrictions still get their own top-up, unrestricted requests need none
+    _, thin = select_dining(pool, make_request(diets=["gluten free"]))
+    assert thin
+    _, thin = select_dining(pool, make_request())
+    assert not thin
+
+def test_activities_are_thin_per_pooled_category(knowledge_store):
+    pool = [activity(f"Temple {i}", "cultural") for i in range(3)]
+    pool += [activity(f"Trek {i}", "outdoor", "Steep trek to the pass") for i in range(3)]
+    pool += [activity("Mall Road", "must_see")]
+    request = make_request()
+    activities, thin = select_activities(pool, request)
+    assert len(activities["cultural"]) == 3
+    assert "cultural" not in thin and "outdoor" not in thin
+    assert "must_see" in thin and "hidden_gems" in thin
+
+    restricted = make_request(mobility=True)
+    activities, thin = select_activities(pool, restricted)
+    assert activities["outdoor"] == []
+    assert "outdoor" in thin
+    record_pool_use("activities", restricted, True)
+    _, thin = select_activities(pool, restricted)
+    assert "outdoor" not in thin
+    assert "must_see" in thin
+
+def test_activities_rank_by_priority_and_style(knowledge_store):
+    pool = [
+        activity("Museum", "cultural", priority=4),
+        activity("Monastery", "cultural", priority=1),
+        activity("Adventure Park", "cultural", "adventure rides", priority=4),
+    ]
+    activities, _ = select_activities(pool, make_request())
+    assert [venue["title"] for venue in activities["cultural"]] == ["Monastery", "Adventure Park", "Museum"]
+    assert all("category" not in venue for venue in activities["cultural"])
+
+def test_prices_are_converted_to_the_request_currency(knowledge_store):
+    request = make_request(budget={"ceiling": 1000, "currency": "USD"})
+    dining, _ = select_dining([restaurant("Cafe", price="₹830-1,660")], request)
+    assert dining[0]["price_range"] == "USD 10-20"
+    assert dining[0]["price_currency"] == "USD"
+    assert "pooled_at" not in localize_prices({"name": "Cafe", "pooled_at": 1.0}, "INR")